@@ -0,0 +1,378 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: analises.py
+Descrição: Motor de agregação das colheitas (agrupamento multidimensional)
+"""
+
+import heapq
+
+# ========================================
+# DIMENSÕES E MÉTRICAS DISPONÍVEIS
+# ========================================
+
+# Métricas numéricas agregadas em cada grupo
+METRICAS = ('toneladas', 'perda_toneladas', 'prejuizo_reais')
+
+
+def obter_mes(data):
+    """
+    Extrai o mês de uma data DD/MM/AAAA
+
+    Parâmetros:
+        data (str): Data no formato DD/MM/AAAA
+
+    Retorno:
+        str: Mês no formato AAAA-MM (ordenável)
+    """
+    return f"{data[6:10]}-{data[3:5]}"
+
+
+def obter_safra(data):
+    """
+    Identifica a safra de uma data DD/MM/AAAA
+
+    Parâmetros:
+        data (str): Data no formato DD/MM/AAAA
+
+    Retorno:
+        str: Safra no formato AAAA/AAAA
+
+    Regra: a safra do Centro-Sul vai de abril a março do ano seguinte
+    """
+    ano = int(data[6:10])
+    if int(data[3:5]) < 4:
+        ano -= 1
+    return f"{ano}/{ano + 1}"
+
+
+# Dicionário de extratores: nome da dimensão -> função que gera a chave
+DIMENSOES = {
+    'fazenda': lambda c: c['fazenda'],
+    'mes': lambda c: obter_mes(c['data']),
+    'safra': lambda c: obter_safra(c['data']),
+    'tipo_colheita': lambda c: c['tipo_colheita'],
+}
+
+
+# ========================================
+# AGREGAÇÃO EM PASSADA ÚNICA (HASH)
+# ========================================
+
+def agrupar_colheitas(colheitas, dimensoes=('tipo_colheita',)):
+    """
+    Agrupa colheitas por qualquer combinação de dimensões em uma única passada
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        dimensoes (tuple): Dimensões do agrupamento
+                           ('fazenda', 'mes', 'safra', 'tipo_colheita')
+
+    Retorno:
+        dict: {chave (tuple): {'quantidade': int,
+                               'toneladas': {...},
+                               'perda_toneladas': {...},
+                               'prejuizo_reais': {...}}}
+              Cada métrica traz 'soma', 'media', 'minimo' e 'maximo'.
+              Sem dimensões, o resultado tem um único grupo com chave ().
+
+    Estruturas aplicadas: DICIONÁRIO (tabela hash), TUPLA (chave composta)
+    """
+    for dimensao in dimensoes:
+        if dimensao not in DIMENSOES:
+            raise ValueError(f"Dimensão inválida: {dimensao}. Use: {', '.join(DIMENSOES)}")
+
+    extratores = [DIMENSOES[d] for d in dimensoes]
+
+    # Acumulador por grupo: [quantidade, soma, mínimo, máximo] x métrica
+    acumuladores = {}
+    for colheita in colheitas:
+        chave = tuple(extrair(colheita) for extrair in extratores)
+        acc = acumuladores.get(chave)
+        if acc is None:
+            acc = [0]
+            for metrica in METRICAS:
+                valor = colheita[metrica]
+                acc.extend([0.0, valor, valor])
+            acumuladores[chave] = acc
+
+        acc[0] += 1
+        posicao = 1
+        for metrica in METRICAS:
+            valor = colheita[metrica]
+            acc[posicao] += valor
+            if valor < acc[posicao + 1]:
+                acc[posicao + 1] = valor
+            if valor > acc[posicao + 2]:
+                acc[posicao + 2] = valor
+            posicao += 3
+
+    return {chave: _finalizar_grupo(acc) for chave, acc in acumuladores.items()}
+
+
+def agrupar_colunas(chaves, colunas):
+    """
+    Agrupa dados em formato colunar (uma sequência por métrica) em uma passada
+
+    Parâmetros:
+        chaves (iterable): Chave do grupo de cada linha (TUPLA ou valor simples)
+        colunas (dict): {metrica: sequência de valores} para cada métrica de METRICAS,
+                        ex: array('d'), memoryview ou lista
+
+    Retorno:
+        dict: Mesmo formato de agrupar_colheitas
+
+    Aplicação: formatos colunares (arquivo binário, lotes do Oracle) agregam
+    sem montar um dicionário por colheita
+    """
+    acumuladores = {}
+    linhas = zip(chaves, colunas['toneladas'], colunas['perda_toneladas'], colunas['prejuizo_reais'])
+    for chave, toneladas, perda, prejuizo in linhas:
+        acc = acumuladores.get(chave)
+        if acc is None:
+            acumuladores[chave] = [1, toneladas, toneladas, toneladas,
+                                   perda, perda, perda, prejuizo, prejuizo, prejuizo]
+            continue
+
+        acc[0] += 1
+        acc[1] += toneladas
+        if toneladas < acc[2]:
+            acc[2] = toneladas
+        elif toneladas > acc[3]:
+            acc[3] = toneladas
+        acc[4] += perda
+        if perda < acc[5]:
+            acc[5] = perda
+        elif perda > acc[6]:
+            acc[6] = perda
+        acc[7] += prejuizo
+        if prejuizo < acc[8]:
+            acc[8] = prejuizo
+        elif prejuizo > acc[9]:
+            acc[9] = prejuizo
+
+    return {chave: _finalizar_grupo(acc) for chave, acc in acumuladores.items()}
+
+
+def _finalizar_grupo(acc):
+    """
+    Converte o acumulador interno em dicionário de resultados
+    """
+    quantidade = acc[0]
+    grupo = {'quantidade': quantidade}
+    posicao = 1
+    for metrica in METRICAS:
+        soma = acc[posicao]
+        grupo[metrica] = {
+            'soma': soma,
+            'media': soma / quantidade if quantidade else 0.0,
+            'minimo': acc[posicao + 1],
+            'maximo': acc[posicao + 2],
+        }
+        posicao += 3
+    return grupo
+
+
+def obter_grupo(agrupamento, *chave):
+    """
+    Retorna um grupo do agrupamento ou um grupo vazio se não existir
+
+    Parâmetros:
+        agrupamento (dict): Resultado de agrupar_colheitas
+        *chave: Valores das dimensões (ex: 'manual')
+
+    Retorno:
+        dict: Grupo com quantidade e métricas (zeradas se ausente)
+    """
+    grupo = agrupamento.get(tuple(chave))
+    if grupo is None:
+        grupo = _finalizar_grupo([0] + [0.0, 0.0, 0.0] * len(METRICAS))
+    return grupo
+
+
+def totalizar(agrupamento):
+    """
+    Soma todos os grupos de um agrupamento em um único grupo
+
+    Parâmetros:
+        agrupamento (dict): Resultado de agrupar_colheitas
+
+    Retorno:
+        dict: Grupo total com quantidade e métricas
+    """
+    acc = [0] + [0.0, None, None] * len(METRICAS)
+    for grupo in agrupamento.values():
+        acc[0] += grupo['quantidade']
+        posicao = 1
+        for metrica in METRICAS:
+            valores = grupo[metrica]
+            acc[posicao] += valores['soma']
+            if acc[posicao + 1] is None or valores['minimo'] < acc[posicao + 1]:
+                acc[posicao + 1] = valores['minimo']
+            if acc[posicao + 2] is None or valores['maximo'] > acc[posicao + 2]:
+                acc[posicao + 2] = valores['maximo']
+            posicao += 3
+    return _finalizar_grupo([v if v is not None else 0.0 for v in acc])
+
+
+def mesclar_agrupamentos(a, b):
+    """
+    Mescla dois agrupamentos parciais (ex: calculados em fragmentos diferentes)
+
+    Parâmetros:
+        a (dict): Agrupamento parcial
+        b (dict): Agrupamento parcial com as mesmas dimensões
+
+    Retorno:
+        dict: Agrupamento equivalente a agrupar os dois conjuntos juntos
+    """
+    resultado = dict(a)
+    for chave, grupo in b.items():
+        atual = resultado.get(chave)
+        if atual is None:
+            resultado[chave] = grupo
+            continue
+
+        quantidade = atual['quantidade'] + grupo['quantidade']
+        mesclado = {'quantidade': quantidade}
+        for metrica in METRICAS:
+            x, y = atual[metrica], grupo[metrica]
+            soma = x['soma'] + y['soma']
+            mesclado[metrica] = {
+                'soma': soma,
+                'media': soma / quantidade if quantidade else 0.0,
+                'minimo': min(x['minimo'], y['minimo']),
+                'maximo': max(x['maximo'], y['maximo']),
+            }
+        resultado[chave] = mesclado
+    return resultado
+
+
+# ========================================
+# RANKING DE FAZENDAS (TOP-K EM STREAMING)
+# ========================================
+
+# Critérios aceitos no ranking de fazendas
+CRITERIOS_RANKING = ('prejuizo_reais', 'perda_toneladas', 'razao_perda')
+
+
+def top_k(itens, k, chave):
+    """
+    Seleciona os K maiores itens de um fluxo usando um heap de tamanho K
+
+    Parâmetros:
+        itens (iterable): Fluxo de itens (lista, gerador, cursor...)
+        k (int): Quantidade de itens no resultado
+        chave (function): Função que retorna o valor de ordenação do item
+
+    Retorno:
+        list: Os K maiores itens em ordem decrescente
+
+    Memória: O(K), independente do tamanho do fluxo
+    """
+    if k <= 0:
+        return []
+
+    heap = []
+    for sequencia, item in enumerate(itens):
+        entrada = (chave(item), -sequencia, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entrada)
+        elif entrada[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entrada)
+
+    return [item for _, _, item in sorted(heap, key=lambda e: e[:2], reverse=True)]
+
+
+def totais_por_fazenda(agrupamento):
+    """
+    Converte um agrupamento por fazenda em um fluxo de totais por fazenda
+
+    Parâmetros:
+        agrupamento (dict): Resultado de agrupar_colheitas(..., ('fazenda',))
+
+    Retorno:
+        generator: Dicionários com fazenda, quantidade, somas e razao_perda
+    """
+    for (fazenda,), grupo in agrupamento.items():
+        toneladas = grupo['toneladas']['soma']
+        perda = grupo['perda_toneladas']['soma']
+        yield {
+            'fazenda': fazenda,
+            'quantidade': grupo['quantidade'],
+            'toneladas': toneladas,
+            'perda_toneladas': perda,
+            'prejuizo_reais': grupo['prejuizo_reais']['soma'],
+            'razao_perda': perda / toneladas if toneladas else 0.0,
+        }
+
+
+def top_k_fazendas(colheitas, k=5, criterio='prejuizo_reais'):
+    """
+    Ranking das K fazendas que mais perdem (dados locais)
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        k (int): Tamanho do ranking
+        criterio (str): 'prejuizo_reais', 'perda_toneladas' ou 'razao_perda'
+
+    Retorno:
+        list: K dicionários de totais por fazenda, do pior para o melhor
+
+    Observação: os totais por fazenda saem do agrupamento em passada única;
+    a seleção do ranking usa heap de tamanho K
+    """
+    if criterio not in CRITERIOS_RANKING:
+        raise ValueError(f"Critério inválido: {criterio}. Use: {', '.join(CRITERIOS_RANKING)}")
+
+    por_fazenda = agrupar_colheitas(colheitas, ('fazenda',))
+    return top_k(totais_por_fazenda(por_fazenda), k, lambda t: t[criterio])
+
+
+def heavy_hitters_fazendas(colheitas, k=5, criterio='prejuizo_reais'):
+    """
+    Fazendas com maior perda acumulada em memória O(K) (algoritmo Space-Saving)
+
+    Parâmetros:
+        colheitas (iterable): Fluxo de colheitas em qualquer ordem
+        k (int): Quantidade de contadores mantidos
+        criterio (str): 'prejuizo_reais' ou 'perda_toneladas' (métricas somáveis)
+
+    Retorno:
+        list: TUPLAS (fazenda, estimativa, erro_maximo), da maior para a menor
+
+    Garantia: o valor real de cada fazenda fica entre estimativa - erro_maximo
+    e estimativa; toda fazenda com mais de total/K do critério aparece na lista
+
+    Observação: o menor contador sai de um heap com uma entrada por contador.
+    Estimativas só crescem, então uma entrada pode estar atrasada: a do topo
+    é conferida e, se atrasada, volta ao heap com o valor atual. Cada colheita
+    custa O(log K) amortizado
+    """
+    if criterio not in ('prejuizo_reais', 'perda_toneladas'):
+        raise ValueError("Critério inválido: use 'prejuizo_reais' ou 'perda_toneladas'")
+    if k <= 0:
+        return []
+
+    contadores = {}  # fazenda -> [estimativa, erro]
+    heap = []        # (estimativa quando conferida, fazenda)
+    for colheita in colheitas:
+        fazenda = colheita['fazenda']
+        valor = colheita[criterio]
+        contador = contadores.get(fazenda)
+        if contador is not None:
+            contador[0] += valor
+        elif len(contadores) < k:
+            contadores[fazenda] = [valor, 0.0]
+            heapq.heappush(heap, (valor, fazenda))
+        else:
+            while heap[0][0] != contadores[heap[0][1]][0]:
+                atrasada = heap[0][1]
+                heapq.heapreplace(heap, (contadores[atrasada][0], atrasada))
+            # Substitui o menor contador, herdando seu valor como erro
+            minimo, menor = heap[0]
+            del contadores[menor]
+            contadores[fazenda] = [minimo + valor, minimo]
+            heapq.heapreplace(heap, (minimo + valor, fazenda))
+
+    ranking = sorted(contadores.items(), key=lambda item: item[1][0], reverse=True)
+    return [(fazenda, estimativa, erro) for fazenda, (estimativa, erro) in ranking]
@@ -0,0 +1,452 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: api.py
+Descrição: API HTTP local (asyncio) para os painéis das fazendas, com cache de
+           respostas por versão dos dados e ETag/If-None-Match
+
+Uso:
+    python src/api.py                       # http://127.0.0.1:8080
+    python src/api.py --porta 9000 --endereco 0.0.0.0
+
+Rotas (GET, resposta JSON; ?fonte=json (padrão) ou ?fonte=oracle):
+    /estatisticas                 opções 3 e 7 do menu
+    /comparativo                  opções 4 e 8
+    /busca?fazenda=Santa          opção 9
+    /colheitas?limite=100&deslocamento=0   ordem de cadastro nas duas fontes
+    /saude                        versão atual dos dados (sem cache)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from analises import agrupar_colheitas
+from armazenamento import ARQUIVO_DADOS, caminho_diario, ler_colheitas
+from cli import (COLUNAS_COLHEITA, ErroComando, resumir_comparativo, resumir_estatisticas,
+                 totais_do_agrupamento, totais_do_oracle)
+from funcoes import buscar_colheitas_indexadas, indexar_fazendas
+
+PORTA_PADRAO = int(os.getenv('AGROTECH_API_PORTA', 8080))
+
+# O Oracle não oferece um contador de alterações barato sem privilégios extras:
+# cada resposta do banco vale por esta janela (uma consulta por janela, não por painel)
+TTL_ORACLE = float(os.getenv('AGROTECH_API_TTL_ORACLE', 5))
+
+MAXIMO_RESPOSTAS_CACHE = 256
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+
+ROTAS = ('/estatisticas', '/comparativo', '/busca', '/colheitas')
+MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class ErroApi(Exception):
+    """
+    Erro com status HTTP (a mensagem vai no corpo JSON)
+    """
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ========================================
+# ESTADO DO SERVIÇO
+# ========================================
+
+def criar_estado(caminho_dados=ARQUIVO_DADOS, ttl_oracle=TTL_ORACLE):
+    """
+    Estado compartilhado pelas requisições
+
+    Retorno:
+        dict: Cache de respostas, dados locais por versão, conexão Oracle sob
+              demanda e executores das consultas bloqueantes
+
+    Estrutura aplicada: DICIONÁRIO de estado, alterado só pela thread do laço
+    asyncio (os executores apenas calculam e devolvem resultados)
+
+    Exceções:
+        ValueError: ttl_oracle não positivo (a versão do Oracle é a janela
+                    time // ttl_oracle)
+    """
+    if not ttl_oracle > 0:
+        raise ValueError(f"TTL do Oracle deve ser maior que zero (AGROTECH_API_TTL_ORACLE={ttl_oracle})")
+    import database
+    return {
+        'caminho_dados': caminho_dados,
+        'ttl_oracle': ttl_oracle,
+        'respostas': OrderedDict(),   # (rota, parâmetros) → {'versao', 'etag', 'corpo'}
+        'em_curso': {},               # (rota, parâmetros, versao) → Future (uma consulta por chave)
+        'json': {'versao': None, 'colheitas': [], 'indice': {}},
+        'trava_json': threading.Lock(),
+        'oracle': database.criar_conexao_sob_demanda(),
+        # Uma conexão Oracle não aceita chamadas simultâneas: fila de uma thread só
+        'executor_oracle': ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-oracle'),
+        'executor_json': ThreadPoolExecutor(max_workers=2, thread_name_prefix='api-json'),
+        'estatisticas': {'requisicoes': 0, 'consultas': 0, 'nao_modificadas': 0},
+    }
+
+
+def encerrar_estado(estado):
+    """
+    Fecha a conexão Oracle (se aberta) e os executores
+    """
+    import database
+    estado['executor_oracle'].submit(database.encerrar_conexao_sob_demanda, estado['oracle']).result()
+    estado['executor_oracle'].shutdown()
+    estado['executor_json'].shutdown()
+
+
+def versao_json(caminho_dados):
+    """
+    Versão dos dados locais: identidade do arquivo base e do diário
+
+    Retorno:
+        str: Muda a cada gravação (acréscimo no diário ou compactação)
+
+    Aplicação: dois os.stat por requisição; o JSON só é relido quando muda
+    """
+    partes = []
+    for caminho in (caminho_dados, caminho_diario(caminho_dados)):
+        try:
+            info = os.stat(caminho)
+            partes.append(f"{info.st_ino}.{info.st_mtime_ns}.{info.st_size}")
+        except FileNotFoundError:
+            partes.append('-')
+    return hashlib.blake2b('|'.join(partes).encode(), digest_size=8).hexdigest()
+
+
+# ========================================
+# CONSULTAS (EXECUTADAS FORA DO LAÇO ASYNCIO)
+# ========================================
+
+def _dados_json(estado, versao):
+    """
+    Colheitas e índice por fazenda da versão pedida (relidos só quando a versão muda)
+    """
+    with estado['trava_json']:
+        dados = estado['json']
+        if dados['versao'] != versao:
+            colheitas = ler_colheitas(estado['caminho_dados'])
+            estado['json'] = dados = {'versao': versao, 'colheitas': colheitas,
+                                      'indice': indexar_fazendas(colheitas)}
+        return dados
+
+
+def _pagina(itens, parametros):
+    limite, deslocamento = parametros['limite'], parametros['deslocamento']
+    return {'total': len(itens), 'limite': limite, 'deslocamento': deslocamento,
+            'colheitas': itens[deslocamento:deslocamento + limite]}
+
+
+def consultar_json(estado, rota, parametros, versao):
+    """
+    Resposta de uma rota a partir do JSON local
+    """
+    dados = _dados_json(estado, versao)
+    colheitas = dados['colheitas']
+    if rota == '/estatisticas':
+        return resumir_estatisticas(totais_do_agrupamento(agrupar_colheitas(colheitas, ('tipo_colheita',))))
+    if rota == '/comparativo':
+        return resumir_comparativo(totais_do_agrupamento(agrupar_colheitas(colheitas, ('tipo_colheita',))))
+    if rota == '/busca':
+        return buscar_colheitas_indexadas(colheitas, dados['indice'], parametros['fazenda'])
+    return _pagina(colheitas, parametros)
+
+
+def consultar_oracle(estado, rota, parametros):
+    """
+    Resposta de uma rota a partir do Oracle (conexão aberta no primeiro uso)
+    """
+    import database
+    conn = database.obter_conexao(estado['oracle'])
+    if not conn:
+        raise ErroApi(503, "Oracle indisponível")
+    try:
+        if rota in ('/estatisticas', '/comparativo'):
+            totais = totais_do_oracle(conn)
+            return resumir_estatisticas(totais) if rota == '/estatisticas' else resumir_comparativo(totais)
+    except ErroComando as e:
+        raise ErroApi(503, str(e))
+    # Falha na consulta vira 503 (exceção: a resposta não entra no cache), nunca lista vazia
+    if rota == '/busca':
+        linhas = database.buscar_colheitas_por_fazenda(conn, parametros['fazenda'])
+        if linhas is None:
+            raise ErroApi(503, "Falha ao consultar o Oracle")
+        return [dict(zip(COLUNAS_COLHEITA, linha)) for linha in linhas]
+    pagina = database.listar_colheitas_pagina(conn, parametros['limite'], parametros['deslocamento'])
+    if pagina is None:
+        raise ErroApi(503, "Falha ao consultar o Oracle")
+    total, linhas = pagina
+    return {'total': total, 'limite': parametros['limite'], 'deslocamento': parametros['deslocamento'],
+            'colheitas': [dict(zip(COLUNAS_COLHEITA, linha)) for linha in linhas]}
+
+
+# ========================================
+# CACHE E ETAG
+# ========================================
+
+def _inteiro(parametros, nome, padrao):
+    valor = parametros.get(nome, padrao)
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, f"Parâmetro '{nome}' deve ser inteiro")
+    if valor < 0:
+        raise ErroApi(400, f"Parâmetro '{nome}' não pode ser negativo")
+    return valor
+
+
+def _validar(rota, parametros):
+    """
+    Parâmetros normalizados da rota (parte da chave do cache)
+    """
+    fonte = parametros.get('fonte', 'json')
+    if fonte not in ('json', 'oracle'):
+        raise ErroApi(400, "Parâmetro 'fonte' deve ser json ou oracle")
+    normalizados = {'fonte': fonte}
+    if rota == '/busca':
+        fazenda = parametros.get('fazenda', '').strip()
+        if not fazenda:
+            raise ErroApi(400, "Parâmetro 'fazenda' é obrigatório")
+        normalizados['fazenda'] = fazenda
+    elif rota == '/colheitas':
+        normalizados['limite'] = min(_inteiro(parametros, 'limite', LIMITE_PADRAO), LIMITE_MAXIMO)
+        normalizados['deslocamento'] = _inteiro(parametros, 'deslocamento', 0)
+    return normalizados
+
+
+def _versao(estado, fonte):
+    if fonte == 'oracle':
+        return f"oracle-{int(time.time() // estado['ttl_oracle'])}"
+    return versao_json(estado['caminho_dados'])
+
+
+def _serializar(dados):
+    corpo = json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8')
+    # ETag do conteúdo: uma nova janela do Oracle com os mesmos números ainda responde 304
+    return corpo, '"' + hashlib.blake2b(corpo, digest_size=12).hexdigest() + '"'
+
+
+async def obter_resposta(estado, rota, parametros):
+    """
+    Corpo e ETag de uma rota, do cache quando a versão dos dados não mudou
+
+    Retorno:
+        dict: {'versao', 'etag', 'corpo'}
+
+    Aplicação: requisições simultâneas para a mesma chave esperam a mesma
+    consulta; o cache guarda uma resposta por rota e parâmetros (a da versão
+    mais recente), até MAXIMO_RESPOSTAS_CACHE rotas
+    """
+    chave = (rota, tuple(sorted(parametros.items())))
+    versao = _versao(estado, parametros['fonte'])
+    resposta = estado['respostas'].get(chave)
+    if resposta and resposta['versao'] == versao:
+        estado['respostas'].move_to_end(chave)
+        return resposta
+
+    chave_consulta = chave + (versao,)
+    tarefa = estado['em_curso'].get(chave_consulta)
+    if tarefa is None:
+        tarefa = estado['em_curso'][chave_consulta] = \
+            asyncio.ensure_future(_consultar(estado, chave, parametros, versao))
+        tarefa.add_done_callback(lambda _: estado['em_curso'].pop(chave_consulta, None))
+    # shield: um painel que desconecta não cancela a consulta dos outros
+    return await asyncio.shield(tarefa)
+
+
+async def _consultar(estado, chave, parametros, versao):
+    """
+    Executa a consulta fora do laço e guarda a resposta no cache
+    """
+    laco = asyncio.get_running_loop()
+    rota = chave[0]
+    estado['estatisticas']['consultas'] += 1
+    if parametros['fonte'] == 'oracle':
+        dados = await laco.run_in_executor(estado['executor_oracle'], consultar_oracle, estado, rota, parametros)
+    else:
+        dados = await laco.run_in_executor(estado['executor_json'], consultar_json, estado, rota, parametros, versao)
+    corpo, etag = _serializar(dados)
+    resposta = {'versao': versao, 'etag': etag, 'corpo': corpo}
+    estado['respostas'][chave] = resposta
+    estado['respostas'].move_to_end(chave)
+    while len(estado['respostas']) > MAXIMO_RESPOSTAS_CACHE:
+        estado['respostas'].popitem(last=False)
+    return resposta
+
+
+def _etag_confere(if_none_match, etag):
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in (parte.strip() for parte in if_none_match.split(','))
+
+
+async def responder(estado, metodo, alvo, cabecalhos):
+    """
+    Trata uma requisição
+
+    Retorno:
+        tuple: (status, cabeçalhos extras, corpo em bytes)
+    """
+    estado['estatisticas']['requisicoes'] += 1
+    url = urlsplit(alvo)
+    parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+    try:
+        if metodo not in ('GET', 'HEAD'):
+            raise ErroApi(405, "Use GET")
+        if url.path == '/saude':
+            corpo, _ = _serializar({'status': 'ok', 'versao_json': versao_json(estado['caminho_dados']),
+                                    'momento': datetime.now().isoformat(timespec='seconds'),
+                                    **estado['estatisticas']})
+            return 200, {'Cache-Control': 'no-store'}, corpo
+        if url.path not in ROTAS:
+            raise ErroApi(404, f"Rota desconhecida: {url.path}")
+
+        resposta = await obter_resposta(estado, url.path, _validar(url.path, parametros))
+        extras = {'ETag': resposta['etag'], 'Cache-Control': 'no-cache', 'X-Versao-Dados': resposta['versao']}
+        if _etag_confere(cabecalhos.get('if-none-match'), resposta['etag']):
+            estado['estatisticas']['nao_modificadas'] += 1
+            return 304, extras, b''
+        return 200, extras, resposta['corpo']
+    except ErroApi as e:
+        return e.status, {}, _serializar({'erro': str(e)})[0]
+    except Exception as e:
+        return 500, {}, _serializar({'erro': f"Erro inesperado: {e}"})[0]
+
+
+# ========================================
+# SERVIDOR HTTP (ASYNCIO)
+# ========================================
+
+async def _ler_requisicao(leitor):
+    """
+    Linha de requisição e cabeçalhos (corpo, se houver, é descartado)
+
+    Retorno:
+        tuple: (metodo, alvo, versao_http, cabecalhos) ou None se a conexão fechou
+    """
+    linha = await leitor.readline()
+    if not linha.strip():
+        return None
+    metodo, alvo, versao_http = linha.decode('latin-1').split()
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b'\r\n', b'\n', b''):
+            break
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    tamanho = int(cabecalhos.get('content-length', 0) or 0)
+    if tamanho:
+        await leitor.readexactly(tamanho)
+    return metodo, alvo, versao_http, cabecalhos
+
+
+async def _atender_conexao(estado, leitor, escritor):
+    """
+    Atende uma conexão (keep-alive: várias requisições na mesma conexão)
+    """
+    try:
+        while True:
+            requisicao = await _ler_requisicao(leitor)
+            if requisicao is None:
+                break
+            metodo, alvo, versao_http, cabecalhos = requisicao
+            status, extras, corpo = await responder(estado, metodo, alvo, cabecalhos)
+            manter = versao_http == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+
+            linhas = [f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}",
+                      f"Content-Length: {len(corpo)}",
+                      f"Connection: {'keep-alive' if manter else 'close'}"]
+            if status != 304:
+                linhas.append("Content-Type: application/json; charset=utf-8")
+            linhas += [f"{nome}: {valor}" for nome, valor in extras.items()]
+            escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1'))
+            if metodo != 'HEAD':
+                escritor.write(corpo)
+            await escritor.drain()
+            if not manter:
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        escritor.close()
+
+
+async def iniciar_api(estado, endereco='127.0.0.1', porta=PORTA_PADRAO):
+    """
+    Abre o servidor no laço asyncio atual
+
+    Retorno:
+        asyncio.Server: Servidor escutando (porta=0 escolhe uma porta livre)
+    """
+    return await asyncio.start_server(lambda leitor, escritor: _atender_conexao(estado, leitor, escritor),
+                                      endereco, porta)
+
+
+def iniciar_api_em_thread(caminho_dados=ARQUIVO_DADOS, endereco='127.0.0.1', porta=0, ttl_oracle=TTL_ORACLE):
+    """
+    Sobe a API em uma thread com laço próprio (testes e uso embutido)
+
+    Retorno:
+        dict: {'porta', 'estado', 'parar'} — parar() fecha servidor e conexões
+    """
+    laco = asyncio.new_event_loop()
+    estado = criar_estado(caminho_dados, ttl_oracle)
+    servidor = laco.run_until_complete(iniciar_api(estado, endereco, porta))
+    thread = threading.Thread(target=laco.run_forever, daemon=True)
+    thread.start()
+
+    def parar():
+        async def fechar():
+            servidor.close()
+            await servidor.wait_closed()
+        asyncio.run_coroutine_threadsafe(fechar(), laco).result()
+        laco.call_soon_threadsafe(laco.stop)
+        thread.join()
+        laco.close()
+        encerrar_estado(estado)
+
+    return {'porta': servidor.sockets[0].getsockname()[1], 'estado': estado, 'parar': parar}
+
+
+async def servir(endereco, porta, caminho_dados=ARQUIVO_DADOS):
+    estado = criar_estado(caminho_dados)
+    servidor = await iniciar_api(estado, endereco, porta)
+    print(f"🌐 API em http://{endereco}:{servidor.sockets[0].getsockname()[1]} "
+          f"(rotas: {', '.join(ROTAS + ('/saude',))})")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        encerrar_estado(estado)
+
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP local das análises de colheita")
+    parser.add_argument('--endereco', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--dados', default=ARQUIVO_DADOS, help="Arquivo de dados local")
+    argumentos = parser.parse_args()
+    try:
+        asyncio.run(servir(argumentos.endereco, argumentos.porta, argumentos.dados))
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 API encerrada.")
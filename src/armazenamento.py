@@ -0,0 +1,749 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: armazenamento.py
+Descrição: Armazenamento JSON seguro para vários operadores ao mesmo tempo
+           (trava de escrita, gravação atômica, leitura sem trava e diário
+           de alterações com ids estáveis)
+"""
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from colunar import data_para_inteiro
+from funcoes import calcular_perda_percentual, calcular_prejuizo, validar_alteracao
+from segmentos import (DIRETORIO_SEGMENTOS, acrescentar_segmentos, agrupar_segmentos, carregar_indice,
+                       consultar_segmentos, gravar_segmentos)
+
+try:
+    import fcntl
+except ImportError:         # Windows
+    fcntl = None
+    import msvcrt
+
+ARQUIVO_DADOS = 'dados_colheitas.json'
+SUFIXO_TRAVA = '.lock'
+
+# Diário de alterações (uma linha JSON por colheita alterada, ao lado dos dados).
+# É incorporado ao arquivo base quando passa de metade do tamanho dele
+EXTENSAO_DIARIO = '.diario'
+TAMANHO_MINIMO_COMPACTACAO = 256 * 1024
+
+
+# Última gravação deste processo por arquivo: identidade dos dados ao pegar e
+# ao soltar a trava (None = a gravação falhou no meio)
+_ultima_gravacao = {}
+
+
+# ========================================
+# TRAVA DE ESCRITA (ADVISORY LOCK)
+# ========================================
+
+def caminho_trava(caminho_dados=ARQUIVO_DADOS):
+    """
+    Retorna o caminho do arquivo de trava (ex: dados_colheitas.json.lock)
+
+    A trava fica em um arquivo separado: o arquivo de dados é substituído a
+    cada gravação, então travar o próprio arquivo não protegeria nada
+    """
+    return caminho_dados + SUFIXO_TRAVA
+
+
+@contextmanager
+def travar_escrita(caminho_dados=ARQUIVO_DADOS):
+    """
+    Trava exclusiva entre processos escritores (bloqueia até conseguir)
+
+    Uso:
+        with travar_escrita('dados_colheitas.json'):
+            ...  # ler, alterar e gravar
+
+    Aplicação: fcntl.flock no Linux/macOS, msvcrt.locking no Windows.
+    Leitores não usam a trava, então nunca atrasam os escritores. A identidade
+    dos dados antes e depois do trecho travado fica em _ultima_gravacao
+    (ver identidade_apos_gravacao)
+    """
+    with open(caminho_trava(caminho_dados), 'a+b') as trava:
+        if fcntl:
+            fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+        else:
+            trava.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(trava.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)    # LK_LOCK desiste após ~10 s; tenta de novo
+        chave = os.path.abspath(caminho_dados)
+        try:
+            antes = identidade_dados(caminho_dados)
+            try:
+                yield
+            except BaseException:
+                _ultima_gravacao[chave] = (antes, None)
+                raise
+            _ultima_gravacao[chave] = (antes, identidade_dados(caminho_dados))
+        finally:
+            if fcntl:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+            else:
+                trava.seek(0)
+                msvcrt.locking(trava.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ========================================
+# IDS ESTÁVEIS E DIÁRIO DE ALTERAÇÕES
+# ========================================
+
+def gerar_id():
+    """
+    Gera o id estável de uma colheita nova (hexadecimal de 32 caracteres)
+    """
+    return uuid.uuid4().hex
+
+
+def id_legado(posicao):
+    """
+    Id de uma colheita antiga do arquivo base, gravada antes dos ids
+    """
+    return f"legado-{posicao:08d}"
+
+
+def garantir_ids(colheitas):
+    """
+    Dá ids às colheitas antigas do arquivo base, gravadas antes dos ids
+
+    O id depende só da posição no arquivo base, que não muda até a próxima
+    compactação (quando os ids passam a ser gravados): todos os processos
+    chegam ao mesmo id para o mesmo registro
+    """
+    for posicao, colheita in enumerate(colheitas):
+        if 'id' not in colheita:
+            colheita['id'] = id_legado(posicao)
+    return colheitas
+
+
+def caminho_diario(caminho_dados=ARQUIVO_DADOS):
+    """
+    Retorna o caminho do diário (ex: dados_colheitas.diario)
+    """
+    return os.path.splitext(caminho_dados)[0] + EXTENSAO_DIARIO
+
+
+def _ler_diario(caminho):
+    """
+    Lê as entradas do diário ({'op': 'gravar'|'remover', ...})
+
+    Uma última linha sem quebra de linha é um acréscimo ainda em andamento
+    e é ignorada
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            conteudo = arquivo.read()
+    except FileNotFoundError:
+        return []
+    linhas = conteudo.split('\n')
+    return [json.loads(linha) for linha in linhas[:-1] if linha]
+
+
+def aplicar_diario(colheitas, entradas):
+    """
+    Aplica as entradas do diário sobre as colheitas do arquivo base
+
+    Parâmetros:
+        colheitas (list): Colheitas do arquivo base (com ids)
+        entradas (list): Entradas do diário, em ordem
+
+    Retorno:
+        list: Colheitas resultantes, na ordem de cadastro
+
+    Reaplicar uma entrada não muda o resultado (gravar substitui pelo id,
+    remover um id ausente não faz nada)
+    """
+    posicoes = {colheita['id']: i for i, colheita in enumerate(colheitas)}
+    for entrada in entradas:
+        if entrada['op'] == 'gravar':
+            colheita = entrada['colheita']
+            if colheita['id'] in posicoes:
+                colheitas[posicoes[colheita['id']]] = colheita
+            else:
+                posicoes[colheita['id']] = len(colheitas)
+                colheitas.append(colheita)
+        elif entrada['id'] in posicoes:
+            colheitas[posicoes.pop(entrada['id'])] = None
+    return [colheita for colheita in colheitas if colheita is not None]
+
+
+def ultimas_versoes_diario(caminho_dados=ARQUIVO_DADOS):
+    """
+    Última versão de cada colheita alterada no diário
+
+    Retorno:
+        dict: {id: colheita, ou None se a última entrada a removeu}, na ordem
+              da primeira alteração de cada id
+
+    Aplicação: permite aplicar o diário a um arquivo base lido em fluxo; a
+    memória usada é proporcional ao diário, não ao arquivo base
+    """
+    ultimas = {}
+    for entrada in _ler_diario(caminho_diario(caminho_dados)):
+        if entrada['op'] == 'gravar':
+            ultimas[entrada['colheita']['id']] = entrada['colheita']
+        else:
+            ultimas[entrada['id']] = None
+    return ultimas
+
+
+# ========================================
+# GRAVAÇÃO ATÔMICA E LEITURA SEM TRAVA
+# ========================================
+
+def gravar_atomico(colheitas, caminho_dados=ARQUIVO_DADOS):
+    """
+    Grava a lista inteira em um temporário e o troca pelo arquivo de dados
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        caminho_dados (str): Arquivo de destino
+
+    Aplicação: os.replace é atômico no mesmo sistema de arquivos, então um
+    leitor sempre vê a versão anterior completa ou a nova completa
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho_dados))
+    descritor, temporario = tempfile.mkstemp(prefix='.dados_', suffix='.tmp', dir=diretorio)
+    try:
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(colheitas, arquivo, indent=4, ensure_ascii=False)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho_dados)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _identidade_arquivo(caminho):
+    """
+    Identifica a versão do arquivo base (inode, mtime, tamanho)
+    """
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+
+def ler_colheitas(caminho_dados=ARQUIVO_DADOS):
+    """
+    Lê um instantâneo consistente (arquivo base + diário), sem trava
+
+    Retorno:
+        list: Colheitas gravadas, com ids (lista vazia se não houver dados)
+
+    Erros:
+        json.JSONDecodeError: arquivo corrompido (não ocorre com gravar_atomico)
+
+    Aplicação: se uma compactação trocar o arquivo base durante a leitura,
+    base e diário podem ser de versões diferentes; a leitura é refeita
+    """
+    while True:
+        versao = _identidade_arquivo(caminho_dados)
+        try:
+            with open(caminho_dados, 'r', encoding='utf-8') as arquivo:
+                colheitas = json.load(arquivo)
+        except FileNotFoundError:
+            colheitas = []
+        entradas = _ler_diario(caminho_diario(caminho_dados))
+        if _identidade_arquivo(caminho_dados) == versao:
+            return aplicar_diario(garantir_ids(colheitas), entradas)
+
+
+def _compactar(colheitas, caminho_dados):
+    """
+    Incorpora o diário ao arquivo base (chamada com a trava de escrita)
+
+    Ordem: base nova primeiro, diário vazio depois. Um leitor que pegar a
+    base antiga com o diário já vazio percebe a troca da base e relê.
+    Segmentos existentes são regravados a partir da base nova
+    """
+    gravar_atomico(colheitas, caminho_dados)
+    diario = caminho_diario(caminho_dados)
+    if os.path.exists(diario):
+        temporario = diario + '.tmp'
+        open(temporario, 'w').close()
+        os.replace(temporario, diario)
+    indice = carregar_indice(diretorio_segmentos(caminho_dados))
+    if indice is not None:
+        _espelhar_segmentos(lambda diretorio, identidade: gravar_segmentos(
+            colheitas, diretorio, indice['tamanho'], identidade), caminho_dados)
+
+
+# ========================================
+# ESPELHO EM SEGMENTOS (CONSULTAS POR PERÍODO E FAZENDA)
+# ========================================
+
+def diretorio_segmentos(caminho_dados=ARQUIVO_DADOS):
+    """
+    Retorna o diretório dos segmentos ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), DIRETORIO_SEGMENTOS)
+
+
+def identidade_dados(caminho_dados=ARQUIVO_DADOS):
+    """
+    Versão do arquivo base e do diário (inode, mtime, tamanho de cada um)
+
+    Retorno:
+        list: [base, diário], None para arquivo inexistente (formato do índice dos segmentos)
+    """
+    return [list(identidade) if identidade else None
+            for identidade in (_identidade_arquivo(caminho_dados),
+                               _identidade_arquivo(caminho_diario(caminho_dados)))]
+
+
+def identidade_apos_gravacao(identidade_salva, caminho_dados=ARQUIVO_DADOS):
+    """
+    Identidade a gravar em um derivado (cubo, esboços) que acabou de receber
+    a última gravação deste processo
+
+    Parâmetros:
+        identidade_salva (list): Identidade dos dados em que o derivado estava em dia
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        list: Identidade tirada dentro da trava logo após a gravação, se a
+              gravação partiu de identidade_salva; None se outra gravação
+              (de outro operador ou sem o derivado) ficou no meio
+
+    Aplicação: custa só um os.stat por arquivo; nenhum conteúdo é relido
+    """
+    antes, depois = _ultima_gravacao.get(os.path.abspath(caminho_dados), (None, None))
+    if identidade_salva is None or identidade_salva != antes:
+        return None
+    return depois
+
+
+def segmentos_atuais(caminho_dados=ARQUIVO_DADOS):
+    """
+    Indica se os segmentos espelham exatamente os dados atuais
+
+    Retorno:
+        bool: False se não houver segmentos ou se os dados mudaram sem eles
+              (atualizações e remoções só chegam aos segmentos na compactação)
+    """
+    indice = carregar_indice(diretorio_segmentos(caminho_dados))
+    return indice is not None and indice.get('identidade') == identidade_dados(caminho_dados)
+
+
+def _espelhar_segmentos(gravar, caminho_dados):
+    """
+    Aplica uma gravação aos segmentos com a versão atual dos dados (chamada
+    com a trava de escrita); uma falha só deixa os segmentos desatualizados
+    """
+    try:
+        gravar(diretorio_segmentos(caminho_dados), identidade_dados(caminho_dados))
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Segmentos não atualizados ({e}); consultas usam o JSON até a próxima compactação")
+
+
+def consultar_colheitas(caminho_dados=ARQUIVO_DADOS, fazenda=None, data_inicio=None, data_fim=None):
+    """
+    Colheitas gravadas de uma fazenda (nome exato) e/ou período (DD/MM/AAAA, inclusivo)
+
+    Retorno:
+        list: Colheitas em ordem de data
+
+    Aplicação: com segmentos atualizados, lê só os que os mapas de zona não
+    descartam; sem eles, lê o JSON inteiro. Mesmos critérios de filtrar_colheitas
+    """
+    if segmentos_atuais(caminho_dados):
+        candidatas, _, _ = consultar_segmentos(diretorio_segmentos(caminho_dados), data_inicio, data_fim,
+                                               fazenda)
+    else:
+        candidatas = ler_colheitas(caminho_dados)
+    selecionadas = filtrar_colheitas(candidatas, fazenda=fazenda, data_inicio=data_inicio, data_fim=data_fim)
+    return sorted(selecionadas, key=lambda colheita: data_para_inteiro(colheita['data']))
+
+
+def agrupar_colheitas_gravadas(caminho_dados=ARQUIVO_DADOS, data_inicio=None, data_fim=None):
+    """
+    Agrupamento por tipo das colheitas gravadas, pelos resumos dos segmentos
+
+    Parâmetros:
+        caminho_dados (str): Arquivo de dados
+        data_inicio, data_fim (str): Período DD/MM/AAAA (inclusivo, None = aberto)
+
+    Retorno:
+        dict: Agrupamento por ('tipo_colheita',), ou None se os segmentos não
+              espelham os dados atuais (quem chama agrupa de outra fonte)
+
+    Aplicação: sem período, todos os segmentos respondem pelos grupos
+    pré-calculados do índice e nenhum deles é lido
+    """
+    if not segmentos_atuais(caminho_dados):
+        return None
+    agrupamento, _, _ = agrupar_segmentos(diretorio_segmentos(caminho_dados), data_inicio, data_fim)
+    return agrupamento
+
+
+def registrar_alteracoes(entradas, caminho_dados=ARQUIVO_DADOS):
+    """
+    Acrescenta entradas ao diário (chamada com a trava de escrita)
+
+    Parâmetros:
+        entradas (list): [{'op': 'gravar', 'colheita': {...}} ou {'op': 'remover', 'id': ...}]
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        bool: True se o diário atingiu o limite e deve ser compactado
+
+    Aplicação: grava só as colheitas alteradas; o custo não depende do
+    tamanho do arquivo base
+    """
+    diario = caminho_diario(caminho_dados)
+    linhas = ''.join(json.dumps(entrada, ensure_ascii=False) + '\n' for entrada in entradas)
+    with open(diario, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(linhas)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+        tamanho_diario = arquivo.tell()
+
+    tamanho_base = _identidade_arquivo(caminho_dados)
+    tamanho_base = tamanho_base[2] if tamanho_base else 0
+    return tamanho_diario > max(TAMANHO_MINIMO_COMPACTACAO, tamanho_base // 2)
+
+
+# Colheitas gravadas por caminho: versão do base, colheitas do base por id
+# (lidas só se preciso), diário (inode) e quanto dele já foi lido, com a
+# última versão de cada id no diário (None = removida)
+_ids_gravados = {}
+
+
+def _estado_gravadas(caminho_dados):
+    """
+    Estado das colheitas gravadas em base + diário (chamada com a trava de escrita)
+
+    Retorno:
+        dict: {'base', 'base_por_id', 'inode_diario', 'lido', 'no_diario'}
+
+    Aplicação: o estado fica guardado entre chamadas e só o trecho do diário
+    acrescentado desde a última é lido (a última entrada de cada id decide).
+    As colheitas do arquivo base só são carregadas quando um id não aparece
+    no diário, e valem até a próxima compactação (base e diário novos)
+    """
+    chave = os.path.abspath(caminho_dados)
+    base = _identidade_arquivo(caminho_dados)
+    diario = caminho_diario(caminho_dados)
+    try:
+        info = os.stat(diario)
+        inode_diario, tamanho_diario = info.st_ino, info.st_size
+    except FileNotFoundError:
+        inode_diario, tamanho_diario = None, 0
+
+    estado = _ids_gravados.get(chave)
+    if (estado is None or estado['base'] != base or estado['inode_diario'] != inode_diario
+            or tamanho_diario < estado['lido']):
+        estado = {'base': base, 'base_por_id': None, 'inode_diario': inode_diario, 'lido': 0, 'no_diario': {}}
+        _ids_gravados[chave] = estado
+
+    if tamanho_diario > estado['lido']:
+        with open(diario, 'rb') as arquivo:
+            arquivo.seek(estado['lido'])
+            trecho = arquivo.read()
+        # Uma última linha sem quebra de linha ainda está sendo acrescentada
+        completo = trecho.rfind(b'\n') + 1
+        for linha in trecho[:completo].split(b'\n'):
+            if not linha:
+                continue
+            entrada = json.loads(linha)
+            if entrada['op'] == 'gravar':
+                estado['no_diario'][entrada['colheita']['id']] = entrada['colheita']
+            else:
+                estado['no_diario'][entrada['id']] = None
+        estado['lido'] += completo
+    return estado
+
+
+def _colheita_gravada(estado, caminho_dados, id_colheita):
+    """
+    Versão gravada de uma colheita (None se não existe ou foi removida)
+    """
+    if id_colheita in estado['no_diario']:
+        return estado['no_diario'][id_colheita]
+    if estado['base_por_id'] is None:
+        if estado['base'] is None:
+            estado['base_por_id'] = {}
+        else:
+            with open(caminho_dados, 'r', encoding='utf-8') as arquivo:
+                estado['base_por_id'] = {colheita['id']: colheita for colheita in garantir_ids(json.load(arquivo))}
+    return estado['base_por_id'].get(id_colheita)
+
+
+def _id_gravado(caminho_dados):
+    """
+    Monta o teste "id já gravado?" para base + diário (chamada com a trava de escrita)
+
+    Retorno:
+        function: gravado(id) -> bool
+    """
+    estado = _estado_gravadas(caminho_dados)
+    return lambda id_colheita: _colheita_gravada(estado, caminho_dados, id_colheita) is not None
+
+
+def acrescentar_colheitas(novas, caminho_dados=ARQUIVO_DADOS):
+    """
+    Acrescenta colheitas sem perder as gravadas por outros operadores
+
+    Parâmetros:
+        novas (list): Colheitas a acrescentar (recebem id se ainda não tiverem)
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        list: Colheitas gravadas, com ids (colheitas cujo id já estava gravado,
+              como uma pendência reprocessada, são puladas)
+
+    Aplicação: dentro da trava, só acrescenta as novas ao diário; duas
+    gravações nunca se sobrepõem e o arquivo base só é lido e reescrito
+    quando o diário atinge o limite de compactação. Id gerado agora não
+    precisa de conferência, então um cadastro comum não lê o arquivo base
+    """
+    with travar_escrita(caminho_dados):
+        gravado = _id_gravado(caminho_dados)
+        gravadas, ids_lote = [], set()
+        for colheita in novas:
+            id_novo = 'id' not in colheita
+            if id_novo:
+                colheita['id'] = gerar_id()
+            if (id_novo or not gravado(colheita['id'])) and colheita['id'] not in ids_lote:
+                ids_lote.add(colheita['id'])
+                gravadas.append(colheita)
+        if not gravadas:
+            return []
+
+        espelhar = segmentos_atuais(caminho_dados)
+        compactar = registrar_alteracoes([{'op': 'gravar', 'colheita': c} for c in gravadas], caminho_dados)
+        # Sem arquivo base ainda (primeiro cadastro): cria-o já com o diário incorporado
+        if compactar or not os.path.exists(caminho_dados):
+            _compactar(ler_colheitas(caminho_dados), caminho_dados)
+        elif espelhar:
+            _espelhar_segmentos(lambda diretorio, identidade: acrescentar_segmentos(
+                gravadas, diretorio, identidade), caminho_dados)
+    return gravadas
+
+
+def substituir_colheitas(colheitas, caminho_dados=ARQUIVO_DADOS):
+    """
+    Faz o arquivo conter exatamente as colheitas informadas
+
+    Parâmetros:
+        colheitas (list): Conteúdo desejado (colheitas sem id recebem um)
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        int: Entradas gravadas no diário (0 = nada mudou)
+
+    Aplicação: compara com o conteúdo gravado pelos ids e registra no diário
+    só as colheitas novas, alteradas ou removidas; o arquivo base só é
+    reescrito na compactação. Colheitas novas ficam no fim do arquivo
+    """
+    with travar_escrita(caminho_dados):
+        gravadas = {colheita['id']: colheita for colheita in ler_colheitas(caminho_dados)}
+        entradas = []
+        for colheita in colheitas:
+            colheita.setdefault('id', gerar_id())
+            if gravadas.pop(colheita['id'], None) != colheita:
+                entradas.append({'op': 'gravar', 'colheita': colheita})
+        entradas.extend({'op': 'remover', 'id': id_colheita} for id_colheita in gravadas)
+
+        existe = os.path.exists(caminho_dados)
+        if (entradas and registrar_alteracoes(entradas, caminho_dados)) or not existe:
+            _compactar(ler_colheitas(caminho_dados), caminho_dados)
+    return len(entradas)
+
+
+def compactar_diario(caminho_dados=ARQUIVO_DADOS):
+    """
+    Incorpora o diário ao arquivo base imediatamente
+
+    Retorno:
+        int: Quantidade de colheitas no arquivo base compactado
+    """
+    with travar_escrita(caminho_dados):
+        colheitas = ler_colheitas(caminho_dados)
+        _compactar(colheitas, caminho_dados)
+    return len(colheitas)
+
+
+# ========================================
+# ATUALIZAÇÃO E REMOÇÃO LOCAIS
+# ========================================
+
+# Índice id -> posição da última lista em memória consultada
+_indice_posicoes = {'lista': None, 'posicoes': {}}
+
+
+def _posicao_por_id(colheitas, id_colheita):
+    """
+    Posição de uma colheita na lista pelo id (None se não existir)
+
+    Aplicação: consulta o índice id -> posição da lista, conferindo a posição
+    achada; o índice é refeito (uma passada) só quando a lista é outra ou
+    mudou de forma a invalidá-lo (remoções deslocam as posições seguintes)
+    """
+    if _indice_posicoes['lista'] is colheitas:
+        posicao = _indice_posicoes['posicoes'].get(id_colheita)
+        if posicao is not None and posicao < len(colheitas) and colheitas[posicao].get('id') == id_colheita:
+            return posicao
+
+    posicoes = {colheita.get('id'): posicao for posicao, colheita in enumerate(colheitas)}
+    _indice_posicoes.update(lista=colheitas, posicoes=posicoes)
+    return posicoes.get(id_colheita)
+
+
+def atualizar_colheita_json(colheitas, id_colheita, campo, novo_valor, caminho_dados=ARQUIVO_DADOS):
+    """
+    Atualiza um campo de uma colheita local, recalculando perda e prejuízo
+
+    Parâmetros:
+        colheitas (list): Colheitas em memória (atualizadas no lugar)
+        id_colheita (str): Id da colheita
+        campo (str): 'fazenda', 'tipo_colheita' ou 'toneladas'
+        novo_valor: Novo valor do campo
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        tuple: (colheita_antiga, colheita_nova) ou None se não atualizou
+
+    Aplicação: grava uma única entrada no diário, sem reescrever o arquivo.
+    A alteração é aplicada à versão gravada, relida dentro da trava: a edição
+    de outro operador no mesmo registro é mantida, e um registro que outro
+    operador removeu não volta
+    """
+    erro = validar_alteracao(campo, novo_valor)
+    if erro:
+        print(f"❌ {erro}")
+        return None
+
+    posicao = _posicao_por_id(colheitas, id_colheita)
+    if posicao is None:
+        print(f"⚠️  Colheita {id_colheita} não encontrada.")
+        return None
+
+    try:
+        with travar_escrita(caminho_dados):
+            antiga = _colheita_gravada(_estado_gravadas(caminho_dados), caminho_dados, id_colheita)
+            if antiga is None:
+                colheitas.pop(posicao)
+                print(f"⚠️  Colheita {id_colheita} foi removida por outro operador.")
+                return None
+            nova = dict(antiga, **{campo: novo_valor})
+            nova['perda_percentual'] = calcular_perda_percentual(nova['tipo_colheita'])
+            nova['perda_toneladas'], nova['prejuizo_reais'] = calcular_prejuizo(nova['toneladas'],
+                                                                                nova['perda_percentual'])
+            if registrar_alteracoes([{'op': 'gravar', 'colheita': nova}], caminho_dados):
+                _compactar(ler_colheitas(caminho_dados), caminho_dados)
+    except Exception as e:
+        print(f"❌ Erro ao atualizar: {e}")
+        return None
+
+    colheitas[posicao] = nova
+    print(f"✅ Colheita {id_colheita} atualizada!")
+    return antiga, nova
+
+
+def deletar_colheita_json(colheitas, id_colheita, caminho_dados=ARQUIVO_DADOS):
+    """
+    Remove uma colheita local
+
+    Parâmetros:
+        colheitas (list): Colheitas em memória (atualizadas no lugar)
+        id_colheita (str): Id da colheita
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        dict: Colheita removida ou None se não removeu
+    """
+    posicao = _posicao_por_id(colheitas, id_colheita)
+    if posicao is None:
+        print(f"⚠️  Colheita {id_colheita} não encontrada.")
+        return None
+
+    try:
+        with travar_escrita(caminho_dados):
+            if registrar_alteracoes([{'op': 'remover', 'id': id_colheita}], caminho_dados):
+                _compactar(ler_colheitas(caminho_dados), caminho_dados)
+    except Exception as e:
+        print(f"❌ Erro ao deletar: {e}")
+        return None
+
+    print(f"✅ Colheita {id_colheita} removida!")
+    return colheitas.pop(posicao)
+
+
+def filtrar_colheitas(colheitas, ids=None, fazenda=None, data_inicio=None, data_fim=None):
+    """
+    Seleciona colheitas por ids, fazenda (nome exato) e/ou período (DD/MM/AAAA, inclusivo)
+
+    Mesmos critérios de deletar_colheitas_filtro no Oracle
+
+    Retorno:
+        list: Colheitas que atendem a todos os filtros informados
+    """
+    ids = set(ids) if ids is not None else None
+    inicio = data_para_inteiro(data_inicio) if data_inicio else None
+    fim = data_para_inteiro(data_fim) if data_fim else None
+    selecionadas = []
+    for colheita in colheitas:
+        if ids is not None and colheita.get('id') not in ids:
+            continue
+        if fazenda and colheita['fazenda'] != fazenda:
+            continue
+        if inicio or fim:
+            data = data_para_inteiro(colheita['data'])
+            if (inicio and data < inicio) or (fim and data > fim):
+                continue
+        selecionadas.append(colheita)
+    return selecionadas
+
+
+def deletar_colheitas_json_lote(colheitas, ids=None, fazenda=None, data_inicio=None, data_fim=None,
+                                caminho_dados=ARQUIVO_DADOS):
+    """
+    Remove muitas colheitas locais de uma vez (por ids, fazenda e/ou período)
+
+    Parâmetros:
+        colheitas (list): Colheitas em memória (atualizadas no lugar)
+        ids (list): Ids das colheitas (None = não filtra por id)
+        fazenda (str): Nome exato da fazenda
+        data_inicio (str): Data inicial DD/MM/AAAA, inclusiva
+        data_fim (str): Data final DD/MM/AAAA, inclusiva
+        caminho_dados (str): Arquivo de dados
+
+    Retorno:
+        list: Colheitas removidas (vazia se nada atendeu ao filtro) ou None em caso de erro
+
+    Aplicação: todas as remoções vão ao diário em uma única gravação
+    """
+    if ids is None and not (fazenda or data_inicio or data_fim):
+        print("❌ Informe ids, fazenda e/ou período para a remoção em lote.")
+        return None
+
+    removidas = filtrar_colheitas(colheitas, ids, fazenda, data_inicio, data_fim)
+    if not removidas:
+        return []
+
+    try:
+        with travar_escrita(caminho_dados):
+            if registrar_alteracoes([{'op': 'remover', 'id': c['id']} for c in removidas], caminho_dados):
+                _compactar(ler_colheitas(caminho_dados), caminho_dados)
+    except Exception as e:
+        print(f"❌ Erro ao deletar em lote: {e}")
+        return None
+
+    ids_removidos = {c['id'] for c in removidas}
+    colheitas[:] = [c for c in colheitas if c['id'] not in ids_removidos]
+    return removidas
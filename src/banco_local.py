@@ -0,0 +1,580 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: banco_local.py
+Descrição: Substituto local do Oracle sobre SQLite, com a mesma API usada do
+           oracledb e modelo opcional de latência de rede
+
+Uso: AGROTECH_BACKEND=sqlite python src/main.py
+     (AGROTECH_SQLITE_ARQUIVO, AGROTECH_LATENCIA_MS, AGROTECH_JITTER_MS e
+      AGROTECH_LATENCIA_SEMENTE ajustam arquivo e latência simulada)
+
+O SQL de database.py é traduzido para o dialeto do SQLite (tipos do DDL,
+TO_DATE/TO_CHAR, data + dias, ROWNUM e FETCH FIRST/OFFSET), então as mesmas funções
+rodam sem o servidor da FIAP: em CI, no notebook e em testes de carga.
+EXPLAIN PLAN, DBMS_XPLAN.DISPLAY e USER_TABLES.NUM_ROWS são emulados a partir
+do EXPLAIN QUERY PLAN do SQLite (usados pelo rastreio de planos)
+"""
+
+import functools
+import json
+import math
+import os
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+
+ARQUIVO_PADRAO = 'oracle_local.db'
+
+# Tipo declarado das colunas de data: convertido em datetime na leitura,
+# como o DATE do Oracle (nome próprio para não alterar o "DATE" global do sqlite3)
+TIPO_DATA = 'DATA_ORACLE'
+
+# Constantes usadas por database.py (output type handler); no SQLite os
+# números já chegam como float, então o handler não é chamado
+DB_TYPE_NUMBER = 'NUMBER'
+DB_TYPE_BINARY_DOUBLE = 'BINARY_DOUBLE'
+
+
+# ========================================
+# ERROS NO FORMATO DO ORACLE
+# ========================================
+
+class _ErroOracle:
+    """
+    Objeto de erro como o do oracledb (error, = e.args; error.code, error.message)
+    """
+
+    def __init__(self, codigo, mensagem):
+        self.code = codigo
+        self.message = mensagem
+
+    def __str__(self):
+        return f"ORA-{self.code:05d}: {self.message}"
+
+
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    def __str__(self):
+        return str(self.args[0])
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+# Mensagens do SQLite → códigos ORA equivalentes
+CODIGOS_ERRO = (
+    ('already exists', 955),       # ORA-00955: nome já usado por um objeto existente
+    ('no such table', 942),        # ORA-00942: tabela ou view não existe
+    ('no such column', 904),       # ORA-00904: identificador inválido
+    ('duplicate column', 1430),    # ORA-01430: coluna já existe na tabela
+    ('UNIQUE constraint', 1),      # ORA-00001: restrição exclusiva violada
+    ('NOT NULL constraint', 1400), # ORA-01400: não é possível inserir NULL
+    ('syntax error', 900),         # ORA-00900: instrução SQL inválida
+)
+
+
+def _traduzir_erro(e):
+    """
+    Converte um erro do sqlite3 em DatabaseError com código ORA
+    """
+    mensagem = str(e)
+    codigo = next((codigo for trecho, codigo in CODIGOS_ERRO if trecho in mensagem), 20000)
+    classe = IntegrityError if isinstance(e, sqlite3.IntegrityError) else DatabaseError
+    return classe(_ErroOracle(codigo, mensagem))
+
+
+# ========================================
+# TRADUÇÃO DO SQL
+# ========================================
+
+# Tipos do DDL (aplicados só em CREATE TABLE)
+TRADUCOES_DDL = (
+    (re.compile(r'NUMBER\s+GENERATED\s+ALWAYS\s+AS\s+IDENTITY\s+PRIMARY\s+KEY', re.I),
+     'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'VARCHAR2\s*\(\s*\d+\s*\)', re.I), 'TEXT'),
+    (re.compile(r'NUMBER\s*\(\s*\d+\s*,\s*\d+\s*\)', re.I), 'REAL'),
+    (re.compile(r'NUMBER\s*\(\s*\d+\s*\)', re.I), 'INTEGER'),
+    (re.compile(r'\bNUMBER\b', re.I), 'NUMERIC'),
+    (re.compile(r'\b(DATE|TIMESTAMP)\b', re.I), TIPO_DATA),
+)
+
+# Expressões e paginação
+TRADUCOES_SQL = (
+    # data + n dias
+    (re.compile(r'(TO_DATE\([^()]*\))\s*\+\s*(\d+)', re.I), r'SOMAR_DIAS(\1, \2)'),
+    (re.compile(r'\bSYSDATE\b', re.I), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'\bNVL\(', re.I), 'IFNULL('),
+    (re.compile(r'OFFSET\s+(\S+)\s+ROWS?\s+FETCH\s+NEXT\s+(\S+)\s+ROWS?\s+ONLY', re.I), r'LIMIT \2 OFFSET \1'),
+    (re.compile(r'FETCH\s+FIRST\s+(\S+)\s+ROWS?\s+ONLY', re.I), r'LIMIT \1'),
+)
+
+# DELETE ... WHERE <filtro> AND ROWNUM <= :limite (remoção em blocos)
+DELETE_ROWNUM = re.compile(r'^\s*DELETE\s+FROM\s+(\w+)\s+WHERE\s+(.*?)\s+AND\s+ROWNUM\s*<=\s*(\S+)\s*$',
+                           re.I | re.S)
+
+
+@functools.lru_cache(maxsize=256)
+def traduzir_sql(sql):
+    """
+    Traduz um comando do dialeto Oracle usado em database.py para o SQLite
+
+    Parâmetros:
+        sql (str): Comando no dialeto Oracle
+
+    Retorno:
+        str: Comando equivalente no SQLite (cache por texto do comando)
+    """
+    traduzido = sql
+    if re.match(r'\s*CREATE\s+TABLE', sql, re.I):
+        for padrao, substituto in TRADUCOES_DDL:
+            traduzido = padrao.sub(substituto, traduzido)
+    for padrao, substituto in TRADUCOES_SQL:
+        traduzido = padrao.sub(substituto, traduzido)
+
+    rownum = DELETE_ROWNUM.match(traduzido)
+    if rownum:
+        tabela, filtro, limite = rownum.groups()
+        traduzido = (f"DELETE FROM {tabela} WHERE rowid IN "
+                     f"(SELECT rowid FROM {tabela} WHERE {filtro} LIMIT {limite})")
+    return traduzido
+
+
+# ========================================
+# FUNÇÕES DO ORACLE NO SQLITE
+# ========================================
+
+# Máscaras de data do Oracle → strftime
+MASCARAS_DATA = {'SYYYY': '%Y', 'YYYY': '%Y', 'HH24': '%H', 'MI': '%M', 'SS': '%S', 'MM': '%m', 'DD': '%d'}
+_PADRAO_MASCARA = re.compile('|'.join(MASCARAS_DATA))
+
+
+@functools.lru_cache(maxsize=32)
+def _formato_python(mascara):
+    return _PADRAO_MASCARA.sub(lambda m: MASCARAS_DATA[m.group(0)], mascara)
+
+
+def _texto_data(valor):
+    """
+    Data no formato gravado pelo SQLite ('AAAA-MM-DD HH:MM:SS'), que ordena como texto
+    """
+    return valor.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_date(texto, mascara='YYYY-MM-DD'):
+    if texto is None:
+        return None
+    return _texto_data(datetime.strptime(str(texto).strip(), _formato_python(mascara)))
+
+
+def _to_char(valor, mascara=None):
+    if valor is None or mascara is None:
+        return None if valor is None else str(valor)
+    return datetime.fromisoformat(valor).strftime(_formato_python(mascara))
+
+
+def _somar_dias(valor, dias):
+    if valor is None:
+        return None
+    return _texto_data(datetime.fromisoformat(valor) + timedelta(days=dias))
+
+
+def _converter_data(valor):
+    return datetime.fromisoformat(valor.decode('utf-8'))
+
+
+def _adaptar_bind(valor):
+    """
+    Datas do Python viram texto no formato das colunas de data
+    """
+    if isinstance(valor, datetime):
+        return _texto_data(valor)
+    if isinstance(valor, date):
+        return _texto_data(datetime(valor.year, valor.month, valor.day))
+    return valor
+
+
+def _adaptar_binds(parametros):
+    if parametros is None:
+        return ()
+    if isinstance(parametros, dict):
+        return {chave: _adaptar_bind(valor) for chave, valor in parametros.items()}
+    return [_adaptar_bind(valor) for valor in parametros]
+
+
+sqlite3.register_converter(TIPO_DATA, _converter_data)
+
+
+# ========================================
+# PLANOS DE EXECUÇÃO (EXPLAIN PLAN / DBMS_XPLAN)
+# ========================================
+
+EXPLAIN_PLAN = re.compile(r"^\s*EXPLAIN\s+PLAN\s+SET\s+STATEMENT_ID\s*=\s*'([^']*)'\s+FOR\s+(.*)$", re.I | re.S)
+DBMS_XPLAN = re.compile(r"DBMS_XPLAN\.DISPLAY\s*\(\s*'[^']*'\s*,\s*(?::(\w+)|'([^']*)')", re.I)
+BIND_NOMEADO = re.compile(r':(\w+)')
+
+# Detalhe do EXPLAIN QUERY PLAN → (operação, opções) do Oracle; grupo 1 = objeto
+OPERACOES_PLANO = (
+    (re.compile(r'^SCAN (?:TABLE )?\w+ USING (?:COVERING )?INDEX (\w+)'), ('INDEX', 'FULL SCAN')),
+    (re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)'), ('TABLE ACCESS', 'FULL')),
+    (re.compile(r'^SEARCH (?:TABLE )?(\w+) USING INTEGER PRIMARY KEY'), ('TABLE ACCESS', 'BY INDEX ROWID')),
+    (re.compile(r'^SEARCH (?:TABLE )?\w+ USING (?:COVERING )?INDEX (\w+)'), ('INDEX', 'RANGE SCAN')),
+    (re.compile(r'^USE TEMP B-TREE FOR (GROUP BY|ORDER BY|DISTINCT)()'), ('SORT', None)),
+)
+
+
+def _operacao_plano(detalhe):
+    """
+    Converte uma linha do EXPLAIN QUERY PLAN em (operação, opções, objeto)
+    """
+    for padrao, (operacao, opcoes) in OPERACOES_PLANO:
+        encontrado = padrao.match(detalhe)
+        if encontrado:
+            if operacao == 'SORT':
+                return operacao, encontrado.group(1), None
+            return operacao, opcoes, encontrado.group(1).upper()
+    return detalhe.upper(), None, None
+
+
+def _formatar_plano(linhas, plan_hash):
+    """
+    Saída no formato do DBMS_XPLAN.DISPLAY (Plan hash value + tabela Id/Operation/Name)
+    """
+    operacoes = [(id_, ' ' * profundidade + ' '.join(filter(None, (operacao, opcoes))), objeto or '')
+                 for id_, profundidade, operacao, opcoes, objeto in linhas]
+    largura_operacao = max(len('Operation'), *(len(operacao) for _, operacao, _ in operacoes))
+    largura_nome = max(len('Name'), *(len(nome) for _, _, nome in operacoes))
+    separador = '-' * (largura_operacao + largura_nome + 14)
+    saida = [f"Plan hash value: {plan_hash}", '', separador,
+             f"| Id  | {'Operation':<{largura_operacao}} | {'Name':<{largura_nome}} |", separador]
+    saida += [f"| {id_:>3} | {operacao:<{largura_operacao}} | {nome:<{largura_nome}} |"
+              for id_, operacao, nome in operacoes]
+    saida.append(separador)
+    return saida
+
+
+def _explicar(sqlite, statement_id, sql):
+    """
+    EXPLAIN PLAN: grava na plan_table as operações do plano escolhido pelo SQLite
+    """
+    traduzido = traduzir_sql(sql)
+    # Como no Oracle, os binds ficam sem valor
+    binds = {nome: None for nome in BIND_NOMEADO.findall(traduzido)}
+    # O EXPLAIN preparado não é invalidado por mudanças no esquema (ex: novo
+    # índice); a versão do esquema no texto evita reusar o do cache do sqlite3
+    versao, = sqlite.execute('PRAGMA schema_version').fetchone()
+    detalhes = sqlite.execute(f'EXPLAIN QUERY PLAN /* esquema {versao} */ {traduzido}', binds).fetchall()
+
+    comando = sql.split(None, 1)[0].upper()
+    linhas = [(0, 0, f"{comando} STATEMENT", None, None)]
+    ids = {0: (0, 0)}
+    for no, pai, _, detalhe in detalhes:
+        _, profundidade = ids.get(pai, (0, 0))
+        ids[no] = (len(linhas), profundidade + 1)
+        linhas.append((len(linhas), profundidade + 1) + _operacao_plano(detalhe))
+
+    # Hash da forma do plano (operações e objetos), como o plan hash value
+    plan_hash = zlib.crc32(repr([linha[2:] for linha in linhas]).encode('utf-8'))
+    sqlite.execute("DELETE FROM plan_table WHERE statement_id = ?", (statement_id,))
+    sqlite.executemany(
+        "INSERT INTO plan_table (statement_id, plan_hash, id, depth, operation, options, object_name) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(statement_id, plan_hash) + linha for linha in linhas])
+
+
+def _exibir_plano(sqlite, statement_id):
+    """
+    DBMS_XPLAN.DISPLAY: linhas de texto do plano gravado na plan_table
+    """
+    linhas = sqlite.execute(
+        "SELECT id, depth, operation, options, object_name, plan_hash FROM plan_table "
+        "WHERE statement_id = ? ORDER BY id", (statement_id,)).fetchall()
+    if not linhas:
+        return [f"Error: cannot fetch plan for statement_id '{statement_id}'"]
+    return _formatar_plano([linha[:5] for linha in linhas], linhas[0][5])
+
+
+# ========================================
+# MODELO DE LATÊNCIA DE REDE
+# ========================================
+
+class ModeloLatencia:
+    """
+    Atraso simulado por ida e volta ao servidor: média + ruído gaussiano (jitter)
+
+    Com a mesma semente a sequência de atrasos se repete, então comparações
+    entre versões do código (lotes, pool, cache) são reproduzíveis
+    """
+
+    def __init__(self, media_ms=0.0, jitter_ms=0.0, semente=None):
+        self.media_ms = media_ms
+        self.jitter_ms = jitter_ms
+        self.idas_e_voltas = 0
+        self._gerador = random.Random(semente)
+        self._trava = threading.Lock()
+
+    def proximo_atraso(self):
+        """
+        Próximo atraso em segundos (nunca negativo)
+        """
+        with self._trava:
+            self.idas_e_voltas += 1
+            atraso = self.media_ms
+            if self.jitter_ms:
+                atraso += self._gerador.gauss(0, self.jitter_ms)
+        return max(atraso, 0.0) / 1000
+
+    def esperar(self, idas_e_voltas=1):
+        for _ in range(idas_e_voltas):
+            atraso = self.proximo_atraso()
+            if atraso:
+                time.sleep(atraso)
+
+
+def _latencia_do_ambiente():
+    return ModeloLatencia(float(os.getenv('AGROTECH_LATENCIA_MS', 0)),
+                          float(os.getenv('AGROTECH_JITTER_MS', 0)),
+                          os.getenv('AGROTECH_LATENCIA_SEMENTE'))
+
+
+# ========================================
+# CONEXÃO E CURSOR (API DO ORACLEDB)
+# ========================================
+
+class Cursor:
+    """
+    Cursor com a interface do oracledb usada em database.py
+    """
+
+    def __init__(self, conexao):
+        self.connection = conexao
+        self.arraysize = 100
+        self.outputtypehandler = None
+        self._cursor = conexao._sqlite.cursor()
+        self._contagens = []
+        self._lidas = 0
+        self._linhas_lote = None
+
+    @property
+    def rowcount(self):
+        # Após executemany, o total do lote (como no oracledb)
+        return self._cursor.rowcount if self._linhas_lote is None else self._linhas_lote
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def _executar(self, funcao, *args):
+        try:
+            return funcao(*args)
+        except sqlite3.Error as e:
+            raise _traduzir_erro(e) from e
+
+    def execute(self, sql, parametros=None, **binds):
+        self.connection._latencia.esperar()
+        self._lidas = 0
+        self._linhas_lote = None
+        binds = binds or parametros
+
+        explicacao = EXPLAIN_PLAN.match(sql)
+        if explicacao:
+            self._executar(_explicar, self.connection._sqlite, *explicacao.groups())
+            return self
+        exibicao = DBMS_XPLAN.search(sql)
+        if exibicao:
+            nome, literal = exibicao.groups()
+            statement_id = binds[nome] if nome else literal
+            plano = self._executar(_exibir_plano, self.connection._sqlite, statement_id)
+            self._executar(self._cursor.execute, "SELECT value AS plan_table_output FROM json_each(?) ORDER BY key",
+                           (json.dumps(plano),))
+            return self
+
+        self._executar(self._cursor.execute, traduzir_sql(sql), _adaptar_binds(binds))
+        return self
+
+    def executemany(self, sql, sequencia, arraydmlrowcounts=False, **opcoes):
+        """
+        Uma única ida e volta para o lote inteiro, como o array DML do Oracle
+        """
+        self.connection._latencia.esperar()
+        traduzido = traduzir_sql(sql)
+        self._contagens = []
+        self._linhas_lote = None
+        for parametros in sequencia:
+            self._executar(self._cursor.execute, traduzido, _adaptar_binds(parametros))
+            self._contagens.append(self._cursor.rowcount)
+        self._linhas_lote = sum(self._contagens)
+
+    def getarraydmlrowcounts(self):
+        return list(self._contagens)
+
+    def _buscar(self, quantidade):
+        """
+        Lê linhas cobrando uma ida e volta a cada 'arraysize' linhas consumidas
+        """
+        linhas = self._executar(self._cursor.fetchall) if quantidade is None \
+            else self._executar(self._cursor.fetchmany, quantidade)
+        lote = max(self.arraysize, 1)
+        antes, self._lidas = self._lidas, self._lidas + len(linhas)
+        self.connection._latencia.esperar(math.ceil(self._lidas / lote) - math.ceil(antes / lote))
+        return linhas
+
+    def fetchone(self):
+        linhas = self._buscar(1)
+        return linhas[0] if linhas else None
+
+    def fetchmany(self, quantidade=None):
+        return self._buscar(quantidade or self.arraysize)
+
+    def fetchall(self):
+        return self._buscar(None)
+
+    def __iter__(self):
+        while True:
+            linhas = self.fetchmany()
+            if not linhas:
+                return
+            yield from linhas
+
+    def var(self, tipo, arraysize=None, **opcoes):
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """
+    Conexão com a interface do oracledb usada em database.py
+    """
+
+    def __init__(self, arquivo, latencia):
+        self._latencia = latencia
+        # A conexão pode ser aberta pela thread de aquecimento e usada pelo menu
+        self._sqlite = sqlite3.connect(arquivo, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._sqlite.create_function('TO_DATE', 2, _to_date, deterministic=True)
+        self._sqlite.create_function('TO_DATE', 1, _to_date, deterministic=True)
+        self._sqlite.create_function('TO_CHAR', 2, _to_char, deterministic=True)
+        self._sqlite.create_function('TO_CHAR', 1, _to_char, deterministic=True)
+        self._sqlite.create_function('SOMAR_DIAS', 2, _somar_dias, deterministic=True)
+        # UPPER/LOWER do SQLite só tratam ASCII ('São' → 'SãO'); o Oracle trata acentos
+        self._sqlite.create_function('UPPER', 1, lambda t: None if t is None else str(t).upper(), deterministic=True)
+        self._sqlite.create_function('LOWER', 1, lambda t: None if t is None else str(t).lower(), deterministic=True)
+        self._sqlite.create_function('CONTAR_LINHAS', 1, self._contar_linhas)
+        self._criar_dicionario()
+
+    def _contar_linhas(self, tabela):
+        # NUM_ROWS exato (no Oracle vem das estatísticas coletadas)
+        return self._sqlite.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0]
+
+    def _criar_dicionario(self):
+        """
+        Tabelas do Oracle consultadas por database.py e pelo rastreio: dual, o
+        dicionário de partições (vazio: a tabela local nunca é particionada),
+        user_tables e a plan_table do EXPLAIN PLAN
+        """
+        self._sqlite.executescript(f"""
+            CREATE TABLE IF NOT EXISTS dual (dummy TEXT);
+            INSERT INTO dual SELECT 'X' WHERE NOT EXISTS (SELECT 1 FROM dual);
+            CREATE TABLE IF NOT EXISTS user_part_key_columns (name TEXT, column_name TEXT);
+            CREATE TABLE IF NOT EXISTS user_tab_partitions (
+                table_name TEXT, partition_name TEXT, high_value TEXT, partition_position INTEGER
+            );
+            CREATE VIEW IF NOT EXISTS user_tables AS
+                SELECT UPPER(name) AS table_name, CONTAR_LINHAS(name) AS num_rows
+                FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';
+            CREATE TABLE IF NOT EXISTS plan_table (
+                statement_id TEXT, plan_hash INTEGER, id INTEGER, depth INTEGER,
+                operation TEXT, options TEXT, object_name TEXT
+            );
+        """)
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        self._latencia.esperar()
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._latencia.esperar()
+        self._sqlite.rollback()
+
+    def close(self):
+        self._sqlite.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexões com a interface do oracledb (acquire, release e close)
+    """
+
+    def __init__(self, maximo, abrir):
+        self._maximo = maximo
+        self._abrir = abrir
+        self._abertas = 0
+        self._livres = queue.LifoQueue()
+        self._trava = threading.Lock()
+
+    def acquire(self):
+        # Abre conexões sob demanda até o máximo; depois espera uma ser devolvida
+        with self._trava:
+            abrir = self._livres.empty() and self._abertas < self._maximo
+            if abrir:
+                self._abertas += 1
+        if not abrir:
+            return self._livres.get()
+        try:
+            return self._abrir()
+        except BaseException:
+            with self._trava:
+                self._abertas -= 1
+            raise
+
+    def release(self, conexao):
+        self._livres.put(conexao)
+
+    def close(self, force=False):
+        while not self._livres.empty():
+            self._livres.get_nowait().close()
+
+
+def create_pool(user=None, password=None, dsn=None, min=1, max=2, increment=1,
+                arquivo=None, latencia=None, **opcoes):
+    """
+    Cria o pool local (conexões abertas no primeiro acquire, até max)
+    """
+    return ConnectionPool(max, lambda: connect(arquivo=arquivo, latencia=latencia))
+
+
+def connect(user=None, password=None, dsn=None, arquivo=None, latencia=None, **opcoes):
+    """
+    Abre a conexão local (usuário, senha e dsn são aceitos e ignorados)
+
+    Parâmetros:
+        arquivo (str): Banco SQLite (padrão: AGROTECH_SQLITE_ARQUIVO ou oracle_local.db;
+                       ':memory:' para um banco temporário)
+        latencia (ModeloLatencia): Atraso simulado (padrão: variáveis AGROTECH_LATENCIA_*)
+
+    Retorno:
+        Connection: Conexão com a API do oracledb
+    """
+    latencia = latencia or _latencia_do_ambiente()
+    # Abrir a sessão custa algumas idas e voltas no Oracle (handshake e autenticação)
+    latencia.esperar(3)
+    try:
+        return Connection(arquivo or os.getenv('AGROTECH_SQLITE_ARQUIVO', ARQUIVO_PADRAO), latencia)
+    except sqlite3.Error as e:
+        raise _traduzir_erro(e) from e
@@ -0,0 +1,397 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: benchmark.py
+Descrição: Suíte de benchmark com gerador determinístico de colheitas
+           sintéticas, resultados em JSON e comparação com linha de base
+
+Uso:
+    python benchmark.py                                  # escalas 10^3, 10^4, 10^5
+    python benchmark.py --escalas 1e3,1e6 --repeticoes 5
+    python benchmark.py --gravar-linha-base              # guarda a linha de base
+    python benchmark.py --linha-base benchmark_linha_base.json --tolerancia 0.2
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from funcoes import (calcular_perda_percentual, calcular_prejuizo, exibir_estatisticas,
+                     exibir_comparativo_tipos, buscar_colheitas_por_fazenda,
+                     calcular_economia_potencial)
+from main import carregar_json, salvar_json
+from armazenamento import compactar_diario
+from relatorio import gerar_relatorio_txt
+
+ARQUIVO_RESULTADOS = 'resultados_benchmark.json'
+ARQUIVO_LINHA_BASE = 'benchmark_linha_base.json'
+VERSAO_RESULTADOS = 1
+ESCALAS_PADRAO = (10 ** 3, 10 ** 4, 10 ** 5)
+
+# Acima deste tamanho as funções que exigem a lista inteira em memória são puladas
+# (o gerador e a gravação do JSON continuam em fluxo)
+LIMITE_MEMORIA_PADRAO = 10 ** 7
+
+
+# ========================================
+# GERADOR DE COLHEITAS SINTÉTICAS
+# ========================================
+
+PREFIXOS_FAZENDAS = ('São José', 'Santa Maria', 'Boa Vista', 'Santa Rita', 'São João', 'Bela Vista',
+                     'Santo Antônio', 'Primavera', 'Esperança', 'Três Irmãos', 'Água Limpa',
+                     'Santa Helena', 'São Francisco', 'Monte Alegre', 'Bom Jardim', 'Recreio')
+
+# Peso relativo de cada mês (safra do Centro-Sul: pico de abril a novembro)
+PESOS_MESES = {1: 1, 2: 1, 3: 2, 4: 6, 5: 9, 6: 10, 7: 10, 8: 10, 9: 9, 10: 8, 11: 5, 12: 2}
+
+
+def nomes_fazendas(quantidade):
+    """
+    Nomes de fazendas realistas e distintos (ex: 'Fazenda Boa Vista II')
+
+    Retorno:
+        list: Nomes, do mais ao menos frequente no gerador
+    """
+    nomes = []
+    for i in range(quantidade):
+        prefixo = PREFIXOS_FAZENDAS[i % len(PREFIXOS_FAZENDAS)]
+        geracao = i // len(PREFIXOS_FAZENDAS)
+        nomes.append(f"Fazenda {prefixo}" + (f" {geracao + 1}" if geracao else ""))
+    return nomes
+
+
+def gerar_colheitas(quantidade, semente=2025, fazendas=500, safras=('2021/2022', '2022/2023', '2023/2024',
+                                                                    '2024/2025', '2025/2026'),
+                    fracao_mecanica=0.7, expoente_zipf=1.1, bloco=10000):
+    """
+    Gera colheitas sintéticas em fluxo, sempre iguais para a mesma semente
+
+    Parâmetros:
+        quantidade (int): Quantidade de colheitas
+        semente (int): Semente do gerador (mesma semente = mesmos dados)
+        fazendas (int): Quantidade de fazendas distintas
+        safras (tuple): Safras cobertas (AAAA/AAAA, abril a março)
+        fracao_mecanica (float): Fração de colheitas mecânicas
+        expoente_zipf (float): Concentração das colheitas nas fazendas maiores
+        bloco (int): Colheitas sorteadas por vez
+
+    Retorno:
+        generator: Dicionários no formato do sistema (com id estável)
+
+    Distribuições: fazendas seguem Zipf (poucas fazendas grandes, muitas
+    pequenas); meses seguem PESOS_MESES; toneladas seguem log-normal
+    (mediana ~800 t)
+    """
+    gerador = random.Random(semente)
+    nomes = nomes_fazendas(fazendas)
+    pesos_fazendas = list(_acumular(1 / (posicao ** expoente_zipf) for posicao in range(1, fazendas + 1)))
+    meses = list(PESOS_MESES)
+    pesos_meses = list(_acumular(PESOS_MESES.values()))
+
+    gerados = 0
+    while gerados < quantidade:
+        tamanho = min(bloco, quantidade - gerados)
+        sorteio_fazendas = gerador.choices(nomes, cum_weights=pesos_fazendas, k=tamanho)
+        sorteio_meses = gerador.choices(meses, cum_weights=pesos_meses, k=tamanho)
+        for fazenda, mes in zip(sorteio_fazendas, sorteio_meses):
+            safra = gerador.choice(safras)
+            ano = int(safra[:4]) if mes >= 4 else int(safra[5:])
+            tipo = 'mecanica' if gerador.random() < fracao_mecanica else 'manual'
+            toneladas = round(gerador.lognormvariate(math.log(800), 0.6), 2)
+            perda_percentual = calcular_perda_percentual(tipo)
+            perda_toneladas, prejuizo_reais = calcular_prejuizo(toneladas, perda_percentual)
+            yield {
+                'fazenda': fazenda,
+                'data': f"{gerador.randint(1, 28):02d}/{mes:02d}/{ano}",
+                'tipo_colheita': tipo,
+                'toneladas': toneladas,
+                'perda_percentual': perda_percentual,
+                'perda_toneladas': perda_toneladas,
+                'prejuizo_reais': prejuizo_reais,
+                'id': f"{gerador.getrandbits(128):032x}",
+            }
+        gerados += tamanho
+
+
+def _acumular(valores):
+    """
+    Soma acumulada (pesos cumulativos para random.choices)
+    """
+    total = 0
+    for valor in valores:
+        total += valor
+        yield total
+
+
+def escrever_json(colheitas, caminho):
+    """
+    Grava colheitas (lista ou gerador) no mesmo formato de salvar_json, em fluxo
+
+    Retorno:
+        int: Quantidade gravada
+    """
+    quantidade = 0
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write('[')
+        for colheita in colheitas:
+            texto = json.dumps(colheita, indent=4, ensure_ascii=False).replace('\n', '\n    ')
+            arquivo.write((',\n    ' if quantidade else '\n    ') + texto)
+            quantidade += 1
+        arquivo.write('\n]' if quantidade else ']')
+    return quantidade
+
+
+# ========================================
+# MEDIÇÃO
+# ========================================
+
+def medir(funcao, repeticoes):
+    """
+    Mede uma função: tempos de várias execuções e pico de memória em uma execução à parte
+
+    Parâmetros:
+        funcao (function): Função sem argumentos
+        repeticoes (int): Execuções cronometradas
+
+    Retorno:
+        dict: {'mediana_s', 'min_s', 'pico_memoria_bytes'}
+
+    A saída no terminal é descartada (as funções de exibição imprimem muito);
+    o tracemalloc fica fora das execuções cronometradas porque as deixa lentas
+    """
+    tempos = []
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+
+        tracemalloc.start()
+        try:
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'mediana_s': statistics.median(tempos), 'min_s': min(tempos), 'pico_memoria_bytes': pico}
+
+
+def casos_benchmark(colheitas):
+    """
+    Funções medidas, cada uma já com seus argumentos (executadas no diretório temporário)
+
+    Retorno:
+        dict: {nome: função sem argumentos}
+    """
+    # Fazenda de popularidade intermediária (nem a maior, nem uma sem colheitas)
+    busca = nomes_fazendas(20)[-1]
+
+    # Sem alteração, salvar_json não teria nada a gravar: cada repetição
+    # altera uma colheita diferente antes de salvar (sempre na mesma ordem)
+    alteracoes = itertools.count()
+
+    def salvar_alterada():
+        colheita = colheitas[next(alteracoes) % len(colheitas)]
+        colheita['toneladas'] = round(colheita['toneladas'] + 1, 2)
+        colheita['perda_toneladas'], colheita['prejuizo_reais'] = calcular_prejuizo(
+            colheita['toneladas'], colheita['perda_percentual'])
+        salvar_json(colheitas)
+
+    return {
+        'carregar_json': carregar_json,
+        'salvar_json': salvar_alterada,
+        'compactar_diario': lambda: compactar_diario('dados_colheitas.json'),
+        'exibir_estatisticas': lambda: exibir_estatisticas(colheitas),
+        'exibir_comparativo_tipos': lambda: exibir_comparativo_tipos(colheitas),
+        'buscar_colheitas_por_fazenda': lambda: buscar_colheitas_por_fazenda(colheitas, busca),
+        'calcular_economia_potencial': lambda: calcular_economia_potencial(colheitas),
+        'gerar_relatorio_txt': lambda: gerar_relatorio_txt(colheitas),
+    }
+
+
+def executar_benchmark(escalas=ESCALAS_PADRAO, repeticoes=3, semente=2025, limite_memoria=LIMITE_MEMORIA_PADRAO,
+                       funcoes=None):
+    """
+    Executa a suíte em cada escala, dentro de um diretório temporário
+
+    Parâmetros:
+        escalas (tuple): Quantidades de colheitas
+        repeticoes (int): Execuções cronometradas por função
+        semente (int): Semente do gerador
+        limite_memoria (int): Maior escala carregada inteira em memória
+        funcoes (list): Restringe a algumas funções (None = todas)
+
+    Retorno:
+        dict: Resultados no formato de ARQUIVO_RESULTADOS
+    """
+    resultados = []
+    diretorio_original = os.getcwd()
+    diretorio = tempfile.mkdtemp(prefix='agrotech_benchmark_')
+    try:
+        os.chdir(diretorio)
+        for linhas in escalas:
+            inicio = time.perf_counter()
+            escrever_json(gerar_colheitas(linhas, semente), 'dados_colheitas.json')
+            geracao_s = time.perf_counter() - inicio
+            print(f"📦 {linhas:>12,} colheitas geradas em {geracao_s:.2f} s")
+            resultados.append(_resultado('gerar_colheitas', linhas, 1,
+                                         {'mediana_s': geracao_s, 'min_s': geracao_s, 'pico_memoria_bytes': None}))
+
+            if linhas > limite_memoria:
+                print(f"   ⏭️  Acima de {limite_memoria:,} colheitas: funções em memória puladas")
+                continue
+
+            colheitas = list(gerar_colheitas(linhas, semente))
+            for nome, funcao in casos_benchmark(colheitas).items():
+                if funcoes and nome not in funcoes:
+                    continue
+                medicao = medir(funcao, repeticoes)
+                resultados.append(_resultado(nome, linhas, repeticoes, medicao))
+                print(f"   {nome:<30} {medicao['mediana_s'] * 1000:>10.1f} ms  "
+                      f"{linhas / medicao['mediana_s'] if medicao['mediana_s'] else 0:>14,.0f} linhas/s  "
+                      f"pico {medicao['pico_memoria_bytes'] / 2 ** 20:>8.1f} MB")
+            del colheitas
+    finally:
+        os.chdir(diretorio_original)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        'versao': VERSAO_RESULTADOS,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'processadores': os.cpu_count(),
+        },
+        'semente': semente,
+        'resultados': resultados,
+    }
+
+
+def _resultado(funcao, linhas, repeticoes, medicao):
+    """
+    Monta um registro de resultado (latência, vazão e memória)
+    """
+    return {
+        'funcao': funcao,
+        'linhas': linhas,
+        'repeticoes': repeticoes,
+        'mediana_s': medicao['mediana_s'],
+        'min_s': medicao['min_s'],
+        'linhas_por_s': linhas / medicao['mediana_s'] if medicao['mediana_s'] else None,
+        'pico_memoria_bytes': medicao['pico_memoria_bytes'],
+    }
+
+
+# ========================================
+# RESULTADOS E LINHA DE BASE
+# ========================================
+
+def salvar_resultados(resultados, caminho=ARQUIVO_RESULTADOS):
+    """
+    Grava os resultados em JSON
+    """
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, indent=4, ensure_ascii=False)
+
+
+def comparar_com_linha_base(resultados, linha_base, tolerancia=0.2):
+    """
+    Compara tempos e memória com a linha de base
+
+    Parâmetros:
+        resultados (dict): Resultados atuais
+        linha_base (dict): Resultados de referência (mesmo formato)
+        tolerancia (float): Piora relativa aceita (0.2 = até 20% mais lento)
+
+    Retorno:
+        list: [{'funcao', 'linhas', 'metrica', 'atual', 'base', 'razao', 'regressao'}]
+              para cada medição presente nos dois arquivos
+    """
+    base = {(r['funcao'], r['linhas']): r for r in linha_base['resultados']}
+    comparacoes = []
+    for atual in resultados['resultados']:
+        referencia = base.get((atual['funcao'], atual['linhas']))
+        if referencia is None:
+            continue
+        for metrica in ('mediana_s', 'pico_memoria_bytes'):
+            if not atual.get(metrica) or not referencia.get(metrica):
+                continue
+            razao = atual[metrica] / referencia[metrica]
+            comparacoes.append({
+                'funcao': atual['funcao'],
+                'linhas': atual['linhas'],
+                'metrica': metrica,
+                'atual': atual[metrica],
+                'base': referencia[metrica],
+                'razao': razao,
+                'regressao': razao > 1 + tolerancia,
+            })
+    return comparacoes
+
+
+def exibir_comparacao(comparacoes):
+    """
+    Exibe a comparação com a linha de base, destacando regressões
+
+    Retorno:
+        int: Quantidade de regressões
+    """
+    print("\n" + "="*78)
+    print("📊 COMPARAÇÃO COM A LINHA DE BASE")
+    print("="*78)
+    for c in comparacoes:
+        marca = "❌ REGRESSÃO" if c['regressao'] else ("✅ melhorou" if c['razao'] < 1 else "   ok")
+        print(f"{c['funcao']:<30} {c['linhas']:>10,} {c['metrica']:<18} {c['razao']:>6.2f}x  {marca}")
+    regressoes = sum(c['regressao'] for c in comparacoes)
+    print("="*78)
+    print(f"{regressoes} regressões em {len(comparacoes)} comparações")
+    return regressoes
+
+
+# ========================================
+# EXECUÇÃO DIRETA
+# ========================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do sistema de perdas na colheita")
+    parser.add_argument('--escalas', default=','.join(str(e) for e in ESCALAS_PADRAO),
+                        help="Quantidades de colheitas separadas por vírgula (ex: 1e3,1e4,1e8)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=2025)
+    parser.add_argument('--limite-memoria', type=float, default=LIMITE_MEMORIA_PADRAO,
+                        help="Maior escala carregada inteira em memória")
+    parser.add_argument('--funcoes', help="Mede só estas funções (separadas por vírgula)")
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--linha-base', help="Arquivo de resultados de referência para comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    parser.add_argument('--gravar-linha-base', action='store_true',
+                        help=f"Grava os resultados também em {ARQUIVO_LINHA_BASE}")
+    argumentos = parser.parse_args()
+
+    escalas = [int(float(e)) for e in argumentos.escalas.split(',')]
+    funcoes = argumentos.funcoes.split(',') if argumentos.funcoes else None
+    resultados = executar_benchmark(escalas, argumentos.repeticoes, argumentos.semente,
+                                    int(argumentos.limite_memoria), funcoes)
+    salvar_resultados(resultados, argumentos.saida)
+    print(f"\n✅ Resultados gravados em {argumentos.saida}")
+
+    if argumentos.gravar_linha_base:
+        salvar_resultados(resultados, ARQUIVO_LINHA_BASE)
+        print(f"✅ Linha de base gravada em {ARQUIVO_LINHA_BASE}")
+
+    if argumentos.linha_base:
+        with open(argumentos.linha_base, 'r', encoding='utf-8') as arquivo:
+            linha_base = json.load(arquivo)
+        if exibir_comparacao(comparar_com_linha_base(resultados, linha_base, argumentos.tolerancia)):
+            sys.exit(1)
@@ -0,0 +1,143 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: benchmark_inicializacao.py
+Descrição: Mede o tempo até o menu principal aparecer (time-to-menu)
+
+Uso: python benchmark_inicializacao.py [registros] [repeticoes]
+"""
+
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import gerar_colheitas, escrever_json
+from cubo import ARQUIVO_CUBO
+from esbocos import ARQUIVO_ESBOCOS
+from instantaneo import ARQUIVO_COLUNAR, ARQUIVO_INSTANTANEO
+
+DIRETORIO_SRC = os.path.dirname(os.path.abspath(__file__))
+MARCADOR_MENU = "Escolha uma opção".encode('utf-8')
+
+# Tudo que a inicialização grava para a próxima: apagado antes de cada medição fria
+# (com a cópia colunar ainda válida, a "partida fria" não leria o JSON)
+ARQUIVOS_CACHE = (ARQUIVO_INSTANTANEO, ARQUIVO_COLUNAR, ARQUIVO_CUBO, ARQUIVO_ESBOCOS)
+
+# Cenários medidos: (descrição, variáveis de ambiente)
+CENARIOS = (
+    ('Oracle sob demanda', {}),
+    ('Oracle aquecido em segundo plano', {'AGROTECH_AQUECER_ORACLE': '1'}),
+)
+
+
+# ========================================
+# MEDIÇÕES
+# ========================================
+
+def medir_tempo_ate_menu(diretorio, ambiente_extra=None):
+    """
+    Executa main.py e mede o tempo até o prompt do menu aparecer
+
+    Parâmetros:
+        diretorio (str): Diretório de trabalho (com dados_colheitas.json)
+        ambiente_extra (dict): Variáveis de ambiente adicionais
+
+    Retorno:
+        float: Segundos entre o início do processo e o prompt do menu
+    """
+    ambiente = dict(os.environ, PYTHONUNBUFFERED='1', **(ambiente_extra or {}))
+    ambiente['PYTHONPATH'] = os.pathsep.join(filter(None, (DIRETORIO_SRC, ambiente.get('PYTHONPATH'))))
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen([sys.executable, os.path.join(DIRETORIO_SRC, 'main.py')],
+                                cwd=diretorio, env=ambiente, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    saida = b''
+    try:
+        # O prompt do input() não termina em quebra de linha: lê em blocos
+        while MARCADOR_MENU not in saida:
+            bloco = os.read(processo.stdout.fileno(), 4096)
+            if not bloco:
+                raise RuntimeError("main.py terminou antes de exibir o menu")
+            saida += bloco
+        decorrido = time.perf_counter() - inicio
+    finally:
+        processo.communicate(b'0\n', timeout=60)
+    return decorrido
+
+
+def medir_importacao():
+    """
+    Mede o tempo de importação dos módulos do sistema (processo novo)
+
+    Retorno:
+        float: Segundos para executar `import main`
+    """
+    codigo = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=DIRETORIO_SRC,
+                               capture_output=True, text=True, check=True)
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+
+def resumir(amostras):
+    """
+    Resume amostras em milissegundos
+
+    Retorno:
+        dict: {'min', 'mediana', 'max'}
+    """
+    return {
+        'min': min(amostras) * 1000,
+        'mediana': statistics.median(amostras) * 1000,
+        'max': max(amostras) * 1000,
+    }
+
+
+def executar_benchmark(registros=10000, repeticoes=5):
+    """
+    Mede o time-to-menu com JSON frio (sem cache) e quente (com cache de inicialização)
+
+    Retorno:
+        dict: {descrição: {'min', 'mediana', 'max'}} em milissegundos
+    """
+    resultados = {'Importação dos módulos': resumir([medir_importacao() for _ in range(repeticoes)])}
+
+    diretorio = tempfile.mkdtemp(prefix='agrotech_inicio_')
+    try:
+        escrever_json(gerar_colheitas(registros), os.path.join(diretorio, 'dados_colheitas.json'))
+
+        for descricao, ambiente in CENARIOS:
+            frio = []
+            for _ in range(repeticoes):
+                for gerado in ARQUIVOS_CACHE:
+                    caminho = os.path.join(diretorio, gerado)
+                    if os.path.exists(caminho):
+                        os.remove(caminho)
+                frio.append(medir_tempo_ate_menu(diretorio, ambiente))
+            quente = [medir_tempo_ate_menu(diretorio, ambiente) for _ in range(repeticoes)]
+            resultados[f"{descricao} (sem cache)"] = resumir(frio)
+            resultados[f"{descricao} (com cache)"] = resumir(quente)
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+
+# ========================================
+# EXECUÇÃO DIRETA
+# ========================================
+
+if __name__ == "__main__":
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("="*70)
+    print(f"⏱️  TEMPO ATÉ O MENU ({registros} colheitas, {repeticoes} repetições)")
+    print("="*70)
+    print(f"{'Cenário':<46} {'mín':>7} {'mediana':>8} {'máx':>7}")
+    print("-"*70)
+    for descricao, tempos in executar_benchmark(registros, repeticoes).items():
+        print(f"{descricao:<46} {tempos['min']:>5.0f}ms {tempos['mediana']:>6.0f}ms {tempos['max']:>5.0f}ms")
+    print("="*70)
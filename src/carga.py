@@ -0,0 +1,487 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: carga.py
+Descrição: Gerador de carga concorrente sobre database.py (vários operadores
+           cadastrando, atualizando e consultando ao mesmo tempo)
+
+Uso:
+    python carga.py misto                                # cenarios/misto.json
+    python carga.py ../cenarios/consultas.json --trabalhadores 16 --duracao 60
+    AGROTECH_BACKEND=sqlite AGROTECH_LATENCIA_MS=5 python carga.py cadastro_pico
+
+O banco é o de database.py: o substituto local (banco_local.py) ou, com
+--permitir-oracle, o Oracle real. As colheitas da carga levam a marca
+MARCA_CARGA no nome da fazenda e são removidas ao final
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import database
+from benchmark import gerar_colheitas
+
+# Prefixo do nome da fazenda nas colheitas cadastradas pela carga (limpeza ao final)
+MARCA_CARGA = '[carga] '
+
+DIRETORIO_CENARIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cenarios')
+ARQUIVO_RESULTADOS = 'resultados_carga.json'
+
+# Valores usados quando o cenário não define o campo
+CENARIO_PADRAO = {
+    'descricao': '',
+    'trabalhadores': 4,
+    'modo': 'threads',
+    'duracao_s': 30,
+    'janela_s': 5,
+    'taxa_por_trabalhador': None,
+    'semente': 1,
+    'preparo': {'colheitas': 1000, 'semente': 2025},
+    'mistura': {'inserir': 40, 'buscar_fazenda': 40, 'estatisticas': 20},
+}
+
+
+# ========================================
+# OPERAÇÕES
+# ========================================
+# Cada operação recebe (conn, contexto) e chama a função de database.py que
+# o menu usaria; falhas são detectadas pela mensagem "❌" que elas imprimem.
+# Atualizações, remoções e buscas por id só sorteiam ids do preparo
+
+def _id_sorteado(contexto):
+    return contexto['gerador'].choice(contexto['ids'])
+
+
+def colheitas_marcadas(quantidade, semente):
+    """
+    Colheitas sintéticas (gerar_colheitas) com MARCA_CARGA no nome da fazenda
+    """
+    for colheita in gerar_colheitas(quantidade, semente=semente):
+        colheita['fazenda'] = MARCA_CARGA + colheita['fazenda']
+        yield colheita
+
+
+def _op_inserir(conn, contexto):
+    return database.inserir_colheita(conn, next(contexto['colheitas']))
+
+
+def _op_atualizar(conn, contexto):
+    gerador = contexto['gerador']
+    if gerador.random() < 0.5:
+        alteracao = (_id_sorteado(contexto), 'toneladas', round(gerador.lognormvariate(math.log(800), 0.6), 2))
+    else:
+        alteracao = (_id_sorteado(contexto), 'tipo_colheita', gerador.choice(('manual', 'mecanica')))
+    return database.atualizar_colheitas_lote(conn, [alteracao], exibir=False) is not None
+
+
+def _op_remover(conn, contexto):
+    return database.deletar_colheitas_lote(conn, [_id_sorteado(contexto)]) is not None
+
+
+def _op_buscar_fazenda(conn, contexto):
+    # Nome sorteado com a mesma distribuição (Zipf) das colheitas cadastradas
+    return database.buscar_colheitas_por_fazenda(conn, next(contexto['colheitas'])['fazenda']) is not None
+
+
+def _op_buscar_id(conn, contexto):
+    database.buscar_colheita_por_id(conn, _id_sorteado(contexto))
+    return True
+
+
+def _op_listar(conn, contexto):
+    database.listar_todas_colheitas(conn)
+    return True
+
+
+def _op_estatisticas(conn, contexto):
+    database.obter_estatisticas_oracle(conn)
+    return True
+
+
+def _op_comparativo(conn, contexto):
+    database.obter_comparativo_tipos_oracle(conn)
+    return True
+
+
+def _op_ranking(conn, contexto):
+    database.obter_top_fazendas_oracle(conn, 5)
+    return True
+
+
+OPERACOES = {
+    'inserir': _op_inserir,
+    'atualizar': _op_atualizar,
+    'remover': _op_remover,
+    'buscar_fazenda': _op_buscar_fazenda,
+    'buscar_id': _op_buscar_id,
+    'listar': _op_listar,
+    'estatisticas': _op_estatisticas,
+    'comparativo': _op_comparativo,
+    'ranking': _op_ranking,
+}
+
+
+# ========================================
+# CENÁRIOS
+# ========================================
+
+def carregar_cenario(nome_ou_caminho):
+    """
+    Lê um cenário JSON (caminho ou nome de um arquivo em cenarios/)
+
+    Retorno:
+        dict: Cenário completo (campos ausentes vêm de CENARIO_PADRAO)
+
+    Levanta:
+        ValueError: Operação desconhecida ou mistura vazia
+    """
+    caminho = nome_ou_caminho
+    if not os.path.exists(caminho):
+        caminho = os.path.join(DIRETORIO_CENARIOS, nome_ou_caminho + ('' if caminho.endswith('.json') else '.json'))
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        cenario = dict(CENARIO_PADRAO, nome=os.path.splitext(os.path.basename(caminho))[0])
+        cenario.update(json.load(arquivo))
+
+    desconhecidas = set(cenario['mistura']) - set(OPERACOES)
+    if desconhecidas:
+        raise ValueError(f"Operações desconhecidas: {', '.join(sorted(desconhecidas))}")
+    if not any(peso > 0 for peso in cenario['mistura'].values()):
+        raise ValueError("A mistura precisa de ao menos uma operação com peso positivo")
+    if cenario['modo'] not in ('threads', 'processos'):
+        raise ValueError("Modo deve ser 'threads' ou 'processos'")
+    return cenario
+
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+class _SaidaCapturada(io.TextIOBase):
+    """
+    Substitui o stdout durante a carga: descarta as mensagens das funções de
+    database.py, guardando por thread a última mensagem de erro ("❌")
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def write(self, texto):
+        if '❌' in texto:
+            self._local.erro = texto.strip()
+        return len(texto)
+
+    def coletar_erro(self):
+        erro = getattr(self._local, 'erro', None)
+        self._local.erro = None
+        return erro
+
+
+_trava_saida = threading.Lock()
+
+
+def _capturar_saida():
+    with _trava_saida:
+        if not isinstance(sys.stdout, _SaidaCapturada):
+            sys.stdout = _SaidaCapturada()
+        return sys.stdout
+
+
+def _trabalhador(cenario, indice, inicio, fim):
+    """
+    Um operador: conexão própria, sorteia operações pela mistura até o fim
+
+    Parâmetros:
+        cenario (dict): Cenário (com 'ids' preenchido pelo preparo)
+        indice (int): Número do trabalhador (semente própria)
+        inicio (float): Instante comum de largada (time.time)
+        fim (float): Instante de parada
+
+    Retorno:
+        list: Amostras (segundos desde a largada, operação, latência, erro ou None)
+
+    Com 'taxa_por_trabalhador' a carga é de malha aberta: as operações têm
+    horário marcado e a latência conta a partir dele, então a fila que se forma
+    quando o banco fica lento aparece nos percentis (sem omissão coordenada)
+    """
+    saida = _capturar_saida()
+    gerador = random.Random(cenario['semente'] * 1000 + indice)
+    contexto = {
+        'gerador': gerador,
+        'ids': cenario['ids'],
+        'colheitas': colheitas_marcadas(10 ** 12, cenario['semente'] * 1000 + indice),
+    }
+    nomes = list(cenario['mistura'])
+    pesos = [cenario['mistura'][nome] for nome in nomes]
+    taxa = cenario['taxa_por_trabalhador']
+
+    amostras = []
+    try:
+        conn = database._abrir_conexao()
+    except Exception as e:
+        return [(0.0, 'conectar', 0.0, str(e))]
+
+    try:
+        time.sleep(max(inicio - time.time(), 0))
+        numero = 0
+        while True:
+            if taxa:
+                marcado = inicio + numero / taxa
+                if marcado >= fim:
+                    break
+                time.sleep(max(marcado - time.time(), 0))
+            else:
+                marcado = time.time()
+                if marcado >= fim:
+                    break
+            nome = gerador.choices(nomes, pesos)[0]
+            saida.coletar_erro()
+            try:
+                confirmada = OPERACOES[nome](conn, contexto)
+                erro = saida.coletar_erro() or (None if confirmada else 'operação não confirmada')
+            except Exception as e:
+                erro = str(e)
+            amostras.append((marcado - inicio, nome, time.time() - marcado, erro))
+            numero += 1
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    return amostras
+
+
+def limpar_carga(conn):
+    """
+    Remove as colheitas marcadas com MARCA_CARGA (preparo e cadastros da carga)
+
+    Retorno:
+        int: Quantidade removida
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM colheitas_cana WHERE fazenda LIKE :marca", {'marca': MARCA_CARGA + '%'})
+        removidas = cursor.rowcount
+        conn.commit()
+        return removidas
+    finally:
+        cursor.close()
+
+
+def preparar_banco(cenario):
+    """
+    Cria a tabela, remove sobras de uma carga interrompida e cadastra as
+    colheitas iniciais (marcadas)
+
+    Retorno:
+        list: Ids das colheitas do preparo (os únicos que a carga altera)
+
+    Levanta:
+        ValueError: Preparo sem colheitas com operações que sorteiam ids
+    """
+    conn = database._abrir_conexao()
+    try:
+        silencio = io.StringIO()
+        saida, sys.stdout = sys.stdout, silencio
+        try:
+            database.criar_tabela(conn)
+            limpar_carga(conn)
+            preparo = cenario['preparo']
+            if preparo.get('colheitas'):
+                database.inserir_colheitas_lote(conn, colheitas_marcadas(preparo['colheitas'],
+                                                                         preparo.get('semente', 2025)))
+        finally:
+            sys.stdout = saida
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id FROM colheitas_cana WHERE fazenda LIKE :marca", {'marca': MARCA_CARGA + '%'})
+            ids = [int(linha[0]) for linha in cursor.fetchall()]
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+    sorteiam_ids = {'atualizar', 'remover', 'buscar_id'}
+    if not ids and any(cenario['mistura'].get(nome, 0) > 0 for nome in sorteiam_ids):
+        raise ValueError("As operações atualizar, remover e buscar_id precisam de colheitas no preparo")
+    return ids
+
+
+def executar_carga(cenario, permitir_oracle=False):
+    """
+    Executa um cenário de carga
+
+    Parâmetros:
+        cenario (dict): Resultado de carregar_cenario
+        permitir_oracle (bool): Aceita rodar no Oracle real (sem isso, só com
+                                AGROTECH_BACKEND=sqlite)
+
+    Retorno:
+        dict: Relatório (ver resumir_carga)
+
+    Levanta:
+        ValueError: Backend Oracle sem permitir_oracle
+    """
+    if os.getenv('AGROTECH_BACKEND') != 'sqlite' and not permitir_oracle:
+        raise ValueError("A carga grava e remove colheitas: use AGROTECH_BACKEND=sqlite "
+                         "ou --permitir-oracle para rodar no Oracle real")
+
+    cenario = dict(cenario, ids=preparar_banco(cenario))
+    trabalhadores = cenario['trabalhadores']
+    executor = ThreadPoolExecutor if cenario['modo'] == 'threads' else ProcessPoolExecutor
+
+    saida_original = sys.stdout
+    # Largada comum depois que todos os trabalhadores existem (processos demoram a subir)
+    inicio = time.time() + (0.2 if cenario['modo'] == 'threads' else 2.0)
+    fim = inicio + cenario['duracao_s']
+    try:
+        with executor(max_workers=trabalhadores) as pool:
+            futuros = [pool.submit(_trabalhador, cenario, indice, inicio, fim) for indice in range(trabalhadores)]
+            amostras = [amostra for futuro in futuros for amostra in futuro.result()]
+    finally:
+        sys.stdout = saida_original
+        # Mesmo interrompida, a carga não deixa colheitas marcadas no banco
+        conn = database._abrir_conexao()
+        try:
+            removidas = limpar_carga(conn)
+        finally:
+            conn.close()
+    return dict(resumir_carga(cenario, amostras), removidas_na_limpeza=removidas)
+
+
+# ========================================
+# RELATÓRIO
+# ========================================
+
+def _percentil(ordenadas, fracao):
+    """
+    Percentil pelo posto mais próximo (lista já ordenada)
+    """
+    if not ordenadas:
+        return None
+    return ordenadas[min(len(ordenadas) - 1, max(math.ceil(fracao * len(ordenadas)) - 1, 0))]
+
+
+def _resumo_latencias(latencias, erros, segundos):
+    ordenadas = sorted(latencias)
+    total = len(ordenadas)
+    em_ms = lambda valor: None if valor is None else valor * 1000
+    return {
+        'operacoes': total,
+        'por_segundo': total / segundos if segundos else None,
+        'erros': erros,
+        'taxa_erros': erros / total if total else 0.0,
+        'p50_ms': em_ms(_percentil(ordenadas, 0.50)),
+        'p95_ms': em_ms(_percentil(ordenadas, 0.95)),
+        'p99_ms': em_ms(_percentil(ordenadas, 0.99)),
+        'max_ms': em_ms(ordenadas[-1] if ordenadas else None),
+    }
+
+
+def resumir_carga(cenario, amostras):
+    """
+    Consolida as amostras: totais, por operação, por janela de tempo e erros
+
+    Retorno:
+        dict: {'cenario', 'executado_em', 'total', 'operacoes', 'janelas', 'erros'}
+    """
+    duracao = cenario['duracao_s']
+    janela = cenario['janela_s']
+
+    por_operacao = {}
+    for _, nome, latencia, erro in amostras:
+        por_operacao.setdefault(nome, ([], []))
+        por_operacao[nome][0].append(latencia)
+        por_operacao[nome][1].append(erro)
+
+    janelas = []
+    for numero in range(math.ceil(duracao / janela)):
+        dentro = [(latencia, erro) for instante, _, latencia, erro in amostras
+                  if numero * janela <= instante < (numero + 1) * janela]
+        largura = min(janela, duracao - numero * janela)
+        janelas.append(dict(inicio_s=numero * janela,
+                            **_resumo_latencias([l for l, _ in dentro], sum(e is not None for _, e in dentro), largura)))
+
+    return {
+        'cenario': {chave: valor for chave, valor in cenario.items() if chave != 'ids'},
+        'backend': os.getenv('AGROTECH_BACKEND', 'oracle'),
+        'executado_em': datetime.now().isoformat(timespec='seconds'),
+        'total': _resumo_latencias([a[2] for a in amostras], sum(a[3] is not None for a in amostras), duracao),
+        'operacoes': {nome: _resumo_latencias(latencias, sum(e is not None for e in erros), duracao)
+                      for nome, (latencias, erros) in sorted(por_operacao.items())},
+        'janelas': janelas,
+        'erros': dict(Counter(a[3][:120] for a in amostras if a[3] is not None).most_common(10)),
+    }
+
+
+def _linha(rotulo, r):
+    formatar = lambda valor: f"{valor:>8.1f}" if valor is not None else f"{'-':>8}"
+    return (f"{rotulo:<16} {r['operacoes']:>8} {r['por_segundo'] or 0:>8.1f} {r['taxa_erros']:>7.1%} "
+            + " ".join(formatar(r[p]) for p in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')))
+
+
+def exibir_relatorio(relatorio):
+    """
+    Exibe o relatório: evolução por janela, totais por operação e erros
+    """
+    cenario = relatorio['cenario']
+    cabecalho = f"{'':<16} {'ops':>8} {'ops/s':>8} {'erros':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8}"
+    print("\n" + "="*82)
+    print(f"🚜 CARGA '{cenario['nome']}' ({cenario['trabalhadores']} {cenario['modo']}, "
+          f"{cenario['duracao_s']} s, backend {relatorio['backend']})")
+    print("="*82)
+    print(cabecalho)
+    print("-"*82)
+    for janela in relatorio['janelas']:
+        print(_linha(f"{janela['inicio_s']:>5}s", janela))
+    print("-"*82)
+    for nome, resumo in relatorio['operacoes'].items():
+        print(_linha(nome, resumo))
+    print("-"*82)
+    print(_linha('TOTAL', relatorio['total']))
+    print(f"🧹 {relatorio['removidas_na_limpeza']} colheitas da carga removidas ao final")
+    if relatorio['erros']:
+        print("\n❌ Erros mais frequentes:")
+        for mensagem, quantidade in relatorio['erros'].items():
+            print(f"  {quantidade:>6}x {mensagem}")
+    print("="*82)
+
+
+# ========================================
+# EXECUÇÃO DIRETA
+# ========================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gerador de carga sobre database.py")
+    parser.add_argument('cenario', help="Arquivo JSON do cenário ou nome em cenarios/")
+    parser.add_argument('--trabalhadores', type=int)
+    parser.add_argument('--duracao', type=float)
+    parser.add_argument('--modo', choices=('threads', 'processos'))
+    parser.add_argument('--saida', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--permitir-oracle', action='store_true',
+                        help="Roda no Oracle real (as colheitas da carga são removidas ao final)")
+    argumentos = parser.parse_args()
+
+    cenario = carregar_cenario(argumentos.cenario)
+    for campo, valor in (('trabalhadores', argumentos.trabalhadores), ('duracao_s', argumentos.duracao),
+                         ('modo', argumentos.modo)):
+        if valor is not None:
+            cenario[campo] = valor
+
+    try:
+        relatorio = executar_carga(cenario, argumentos.permitir_oracle)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    exibir_relatorio(relatorio)
+    with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=4, ensure_ascii=False)
+    print(f"✅ Relatório gravado em {argumentos.saida}")
@@ -0,0 +1,378 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: carga_massa.py
+Descrição: Carga direta do dados_colheitas.json na tabela colheitas_cana, lendo
+           o arquivo em fluxo, em lotes de DML em array, com conexões em
+           paralelo, sem duplicar colheitas e retomável após interrupção
+
+Uso:
+    python src/carga_massa.py                                # dados_colheitas.json
+    python src/carga_massa.py outro.json --conexoes 4 --lote 10000
+    python src/carga_massa.py --do-inicio                    # ignora o ponto de retomada
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from armazenamento import ARQUIVO_DADOS, id_legado, identidade_dados, travar_escrita, ultimas_versoes_diario
+
+TAMANHO_LOTE = 5000
+TAMANHO_BLOCO = 1 << 16
+EXTENSAO_RETOMADA = '.carga'
+
+
+class CargaInterrompida(Exception):
+    """
+    Falha de um lote: os lotes anteriores seguem gravados e o ponto de retomada
+    aponta para o primeiro lote não confirmado
+    """
+
+
+# ========================================
+# LEITURA DO JSON EM FLUXO
+# ========================================
+
+def ler_colheitas_em_fluxo(caminho_dados=ARQUIVO_DADOS, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Percorre a lista JSON do arquivo de dados uma colheita por vez (gerador)
+
+    Parâmetros:
+        caminho_dados (str): Arquivo com uma lista JSON de colheitas
+        tamanho_bloco (int): Caracteres lidos por vez
+
+    Retorno:
+        generator: Dicionários das colheitas, na ordem do arquivo
+
+    Aplicação: só o bloco atual fica na memória; cada objeto é decodificado
+    por raw_decode assim que chega inteiro
+    """
+    with open(caminho_dados, encoding='utf-8') as arquivo:
+        yield from _decodificar_lista(arquivo, caminho_dados, tamanho_bloco)
+
+
+def _decodificar_lista(arquivo, nome, tamanho_bloco):
+    """
+    Decodifica a lista JSON de um arquivo já aberto, um objeto por vez
+    """
+    decodificador = json.JSONDecoder()
+    texto, posicao, fim_arquivo = '', 0, False
+    abriu_lista = False
+
+    def ler_mais():
+        nonlocal texto, posicao, fim_arquivo
+        bloco = arquivo.read(tamanho_bloco)
+        texto, posicao = texto[posicao:] + bloco, 0
+        fim_arquivo = not bloco
+
+    while True:
+        # Pula espaços e separadores ('[' no início, ',' entre objetos)
+        while True:
+            while posicao < len(texto) and texto[posicao] in ' \t\r\n,[':
+                if texto[posicao] == '[':
+                    abriu_lista = True
+                posicao += 1
+            if posicao < len(texto) or fim_arquivo:
+                break
+            ler_mais()
+        if posicao >= len(texto) or texto[posicao] == ']':
+            if not abriu_lista and texto.strip():
+                raise ValueError(f"{nome} não contém uma lista JSON")
+            return
+        try:
+            colheita, posicao = decodificador.raw_decode(texto, posicao)
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+            ler_mais()
+            continue
+        yield colheita
+
+
+@contextmanager
+def gravadas_em_fluxo(caminho_dados=ARQUIVO_DADOS, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Colheitas gravadas (arquivo base + diário) em fluxo, sem compactar o diário
+
+    Uso:
+        with gravadas_em_fluxo('dados_colheitas.json') as (identidade, colheitas):
+            for colheita in colheitas:
+                ...
+
+    Retorno:
+        tuple: (identidade do arquivo base e do diário lidos, no formato de
+               identidade_dados; gerador das colheitas, com ids)
+
+    Aplicação: dentro da trava de escrita só o diário é lido (última versão
+    de cada id) e o arquivo base é aberto; o base é percorrido fora da trava,
+    e uma compactação no meio troca o arquivo por os.replace sem mexer no já
+    aberto. A memória usada é proporcional ao diário, nunca ao arquivo base
+    """
+    with travar_escrita(caminho_dados):
+        identidade = identidade_dados(caminho_dados)
+        ultimas = ultimas_versoes_diario(caminho_dados)
+        try:
+            arquivo = open(caminho_dados, encoding='utf-8')
+        except FileNotFoundError:
+            arquivo = None
+
+    def percorrer():
+        if arquivo is not None:
+            for colheita in _com_ids(_decodificar_lista(arquivo, caminho_dados, tamanho_bloco)):
+                ultima = ultimas.pop(colheita['id'], colheita)
+                if ultima is not None:
+                    yield ultima
+        # Colheitas cadastradas depois da última compactação: só estão no diário
+        for colheita in ultimas.values():
+            if colheita is not None:
+                yield colheita
+
+    try:
+        yield identidade, percorrer()
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+
+
+def _com_ids(colheitas):
+    """
+    Completa o id das colheitas antigas do arquivo base (o mesmo de garantir_ids)
+    """
+    for posicao, colheita in enumerate(colheitas):
+        if 'id' not in colheita:
+            colheita['id'] = id_legado(posicao)
+        yield colheita
+
+
+def binds_carga(colheita):
+    """
+    Binds do INSERT sem duplicadas, com a data já convertida no cliente
+
+    Retorno:
+        dict: Binds de SQL_INSERCAO_SEM_DUPLICADAS
+
+    Aplicação: a data vai como datetime (tipo DATE no bind), sem TO_DATE por
+    linha no servidor e sem ambiguidade de formato; o id do JSON é a chave da
+    deduplicação e as toneladas vão arredondadas como na coluna NUMBER(10,2)
+    """
+    data = colheita['data']
+    return {
+        'id_origem': colheita['id'],
+        'fazenda': colheita['fazenda'],
+        'data': datetime(int(data[6:10]), int(data[3:5]), int(data[0:2])),
+        'tipo': colheita['tipo_colheita'],
+        'toneladas': round(colheita['toneladas'], 2),
+        'perda_perc': colheita['perda_percentual'],
+        'perda_ton': colheita['perda_toneladas'],
+        'prejuizo': colheita['prejuizo_reais'],
+    }
+
+
+# ========================================
+# PONTO DE RETOMADA
+# ========================================
+
+def caminho_retomada(caminho_dados=ARQUIVO_DADOS):
+    """
+    Retorna o caminho do ponto de retomada (ex: dados_colheitas.carga)
+    """
+    return os.path.splitext(caminho_dados)[0] + EXTENSAO_RETOMADA
+
+
+def ler_retomada(caminho_dados=ARQUIVO_DADOS, identidade=None):
+    """
+    Ponto de retomada de uma carga interrompida do mesmo arquivo
+
+    Parâmetros:
+        caminho_dados (str): Arquivo de dados
+        identidade (list): Identidade do arquivo base e do diário a carregar (None = atual)
+
+    Retorno:
+        dict: {'identidade', 'registros', 'inseridas', 'duplicadas', 'rejeitadas'}
+              ou None se não houver (ou se o arquivo base ou o diário mudaram desde então)
+    """
+    try:
+        with open(caminho_retomada(caminho_dados), encoding='utf-8') as arquivo:
+            retomada = json.load(arquivo)
+    except (FileNotFoundError, ValueError):
+        return None
+    if identidade is None:
+        identidade = identidade_dados(caminho_dados)
+    if retomada.get('identidade') != identidade:
+        print("⚠️  Arquivo de dados mudou desde a carga interrompida: recomeçando do início")
+        return None
+    return retomada
+
+
+def _gravar_retomada(caminho_dados, retomada):
+    """
+    Grava o ponto de retomada (temporário + os.replace, nunca pela metade)
+    """
+    destino = caminho_retomada(caminho_dados)
+    descritor, temporario = tempfile.mkstemp(prefix='.carga_', suffix='.tmp',
+                                             dir=os.path.dirname(os.path.abspath(destino)))
+    with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+        json.dump(retomada, arquivo)
+    os.replace(temporario, destino)
+
+
+# ========================================
+# CARGA
+# ========================================
+
+def _lotes(colheitas, tamanho_lote):
+    """
+    Agrupa as colheitas em lotes de binds; registros inválidos são pulados
+
+    Retorno:
+        generator: (binds, registros lidos no lote), inválidos = registros - len(binds)
+    """
+    while True:
+        bloco = list(islice(colheitas, tamanho_lote))
+        if not bloco:
+            return
+        binds = []
+        for colheita in bloco:
+            try:
+                binds.append(binds_carga(colheita))
+            except (KeyError, TypeError, ValueError):
+                continue
+        yield binds, len(bloco)
+
+
+def carregar_json_no_oracle(caminho_dados=ARQUIVO_DADOS, conexoes=1, tamanho_lote=TAMANHO_LOTE,
+                            retomar=True, progresso=None):
+    """
+    Carrega o arquivo de dados no Oracle em lotes, pulando colheitas já cadastradas
+
+    Parâmetros:
+        caminho_dados (str): Lista JSON de colheitas (o diário é aplicado na leitura)
+        conexoes (int): Conexões do pool inserindo lotes ao mesmo tempo
+        tamanho_lote (int): Colheitas por executemany/commit
+        retomar (bool): Continua do ponto de retomada de uma carga interrompida
+        progresso (function): Chamada como progresso(registros) a cada lote confirmado
+
+    Retorno:
+        dict: {'registros', 'inseridas', 'duplicadas', 'rejeitadas',
+               'retomada_em', 'segundos'} ou None em caso de erro (o ponto de
+               retomada fica gravado)
+
+    Aplicação: o ponto de retomada avança só sobre lotes confirmados em
+    sequência (com várias conexões eles terminam fora de ordem). Lotes
+    confirmados depois do ponto são reenviados na retomada e o NOT EXISTS os
+    descarta. A deduplicação é pelo id de cada colheita no JSON: colheitas
+    distintas com os mesmos valores entram todas, e o índice único do
+    id_origem impede que lotes simultâneos gravem o mesmo id duas vezes.
+    O diário não é compactado antes: é aplicado por id ao arquivo base lido
+    em fluxo (gravadas_em_fluxo), então nenhum dos dois é carregado inteiro
+    """
+    import database
+
+    inicio = time.perf_counter()
+    with gravadas_em_fluxo(caminho_dados) as (identidade, gravadas):
+        retomada = ler_retomada(caminho_dados, identidade) if retomar else None
+        contagem = {'registros': 0, 'inseridas': 0, 'duplicadas': 0, 'rejeitadas': 0}
+        if retomada:
+            contagem.update({chave: retomada[chave] for chave in contagem})
+        retomada_em = contagem['registros']
+        colheitas = islice(gravadas, retomada_em, None)
+        lotes = _lotes(colheitas, tamanho_lote)
+
+        # Lotes confirmados fora de ordem esperam aqui até o anterior confirmar
+        confirmados, proximo = {}, 0
+
+        def confirmar(indice, registros, enviados, inseridas):
+            nonlocal proximo
+            if inseridas is None:
+                raise CargaInterrompida(f"Lote {indice + 1} não confirmado")
+            confirmados[indice] = (registros, enviados, inseridas)
+            while proximo in confirmados:
+                registros, enviados, inseridas = confirmados.pop(proximo)
+                contagem['registros'] += registros
+                contagem['inseridas'] += inseridas
+                contagem['duplicadas'] += enviados - inseridas
+                contagem['rejeitadas'] += registros - enviados
+                _gravar_retomada(caminho_dados, dict(contagem, identidade=identidade))
+                proximo += 1
+                if progresso:
+                    progresso(contagem['registros'])
+
+        try:
+            if conexoes <= 1:
+                conn = database.conectar_oracle()
+                if not conn:
+                    return None
+                try:
+                    if not (database.criar_tabela(conn) and database.criar_indices_carga(conn)):
+                        return None
+                    for indice, (binds, registros) in enumerate(lotes):
+                        inseridas = database.inserir_colheitas_sem_duplicadas(conn, binds) if binds else 0
+                        confirmar(indice, registros, len(binds), inseridas)
+                finally:
+                    database.fechar_conexao(conn)
+            else:
+                pool = database.criar_pool(conexoes)
+                if pool is None:
+                    return None
+                try:
+                    with database.conexao_do_pool(pool) as conn:
+                        if not (database.criar_tabela(conn) and database.criar_indices_carga(conn)):
+                            return None
+
+                    def inserir(binds):
+                        with database.conexao_do_pool(pool) as conn:
+                            return database.inserir_colheitas_sem_duplicadas(conn, binds)
+
+                    # No máximo 2 lotes por conexão em memória: a leitura espera os inserts
+                    with ThreadPoolExecutor(max_workers=conexoes, thread_name_prefix='carga') as executor:
+                        pendentes = {}
+                        try:
+                            for indice, (binds, registros) in enumerate(lotes):
+                                pendentes[executor.submit(inserir, binds)] = (indice, registros, len(binds))
+                                while len(pendentes) >= 2 * conexoes:
+                                    prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                                    for futuro in prontos:
+                                        confirmar(*pendentes.pop(futuro), futuro.result())
+                            for futuro in list(pendentes):
+                                confirmar(*pendentes.pop(futuro), futuro.result())
+                        finally:
+                            for futuro in pendentes:
+                                futuro.cancel()
+                finally:
+                    pool.close()
+        except (CargaInterrompida, OSError, ValueError) as e:
+            print(f"❌ Carga interrompida após {contagem['registros']} registros: {e}")
+            return None
+
+        if os.path.exists(caminho_retomada(caminho_dados)):
+            os.remove(caminho_retomada(caminho_dados))
+        return dict(contagem, retomada_em=retomada_em, segundos=round(time.perf_counter() - inicio, 3))
+
+
+# ========================================
+# EXECUÇÃO
+# ========================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga do JSON de colheitas no Oracle")
+    parser.add_argument('arquivo', nargs='?', default=ARQUIVO_DADOS, help="Lista JSON de colheitas")
+    parser.add_argument('--conexoes', type=int, default=1, help="Conexões em paralelo (pool)")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Colheitas por lote")
+    parser.add_argument('--do-inicio', action='store_true', help="Ignora o ponto de retomada")
+    argumentos = parser.parse_args()
+
+    resultado = carregar_json_no_oracle(
+        argumentos.arquivo, argumentos.conexoes, argumentos.lote, retomar=not argumentos.do_inicio,
+        progresso=lambda registros: print(f"   {registros} registros confirmados", end='\r'))
+    if resultado is None:
+        print(f"⚠️  Execute novamente para continuar de onde parou ({caminho_retomada(argumentos.arquivo)})")
+        sys.exit(1)
+    print(f"\n✅ {resultado['inseridas']} colheitas inseridas, {resultado['duplicadas']} já existiam, "
+          f"{resultado['rejeitadas']} inválidas ({resultado['segundos']}s)")
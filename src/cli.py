@@ -0,0 +1,629 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: cli.py
+Descrição: Subcomandos não interativos (cron, scripts e outros serviços) com
+           saída JSON ou CSV, sem passar pelo menu
+
+Uso:
+    python src/cli.py stats                              # JSON local
+    python src/cli.py stats --fonte oracle --formato csv
+    python src/cli.py comparativo --fonte oracle
+    python src/cli.py report --saida relatorio_noturno.txt
+    python src/cli.py search "Santa" --fonte oracle
+    python src/cli.py search "Santa" --inicio 01/05/2025 --fim 31/05/2025
+    python src/cli.py ranking --k 10 --criterio perda_toneladas --fonte oracle
+    python src/cli.py ranking --k 10 --fluxo               # JSON maior que a memória
+    python src/cli.py import novas.csv --oracle
+    python src/cli.py export --formato csv --saida colheitas.csv
+    python src/cli.py export --fonte oracle --formato csv.gz --particao mes --saida exportacao/
+
+A saída de dados vai para stdout (ou --saida); mensagens e erros vão para
+stderr. Código de saída 0 em caso de sucesso e 1 em caso de erro
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+from analises import CRITERIOS_RANKING
+from armazenamento import ARQUIVO_DADOS
+# COLUNAS_COLHEITA é reexportada para api.py
+from funcoes import COLUNAS_COLHEITA, calcular_perda_percentual, calcular_prejuizo
+
+# Cada subcomando importa só o que usa: uma consulta ao JSON não carrega o
+# driver Oracle nem monta cubo e esboços, e uma consulta ao Oracle não lê o JSON
+
+ARQUIVO_RELATORIO = 'relatorio.txt'
+
+TIPOS_COLHEITA = ('manual', 'mecanica')
+
+# Ranking em fluxo: contadores do Space-Saving por posição pedida (mais
+# contadores, estimativas mais próximas do valor real)
+CONTADORES_POR_POSICAO = 10
+FORMATOS_EXPORTACAO = ('json', 'csv', 'csv.gz', 'csv.zst', 'col')
+
+
+class ErroComando(Exception):
+    """
+    Falha de um subcomando (mensagem exibida em stderr, código de saída 1)
+    """
+
+
+# ========================================
+# ACESSO AOS DADOS (SOB DEMANDA)
+# ========================================
+
+def _diretorio_fragmentos():
+    return os.getenv('AGROTECH_FRAGMENTOS')
+
+
+def carregar_colheitas_locais():
+    """
+    Colheitas do armazenamento local: fragmentos, cache de inicialização
+    (se ainda válido) ou o JSON com o diário aplicado
+    """
+    diretorio = _diretorio_fragmentos()
+    if diretorio:
+        from fragmentos import carregar_fragmentos
+        return carregar_fragmentos(diretorio)
+
+    from instantaneo import carregar_instantaneo
+    instantaneo = carregar_instantaneo(ARQUIVO_DADOS)
+    if instantaneo:
+        return instantaneo['colheitas']
+    if not os.path.exists(ARQUIVO_DADOS):
+        return []
+    from armazenamento import ler_colheitas
+    return ler_colheitas(ARQUIVO_DADOS)
+
+
+@contextlib.contextmanager
+def conexao_oracle():
+    """
+    Abre a conexão só para o subcomando e a fecha ao final
+    """
+    import database
+    conn = database.conectar_oracle()
+    if not conn:
+        raise ErroComando("Sem conexão com o Oracle")
+    try:
+        yield conn
+    finally:
+        database.fechar_conexao(conn)
+
+
+def totais_do_agrupamento(por_tipo):
+    """
+    Totais por tipo a partir de um agrupamento por ('tipo_colheita',)
+
+    Retorno:
+        dict: {tipo: {'quantidade', 'toneladas', 'perda_toneladas', 'prejuizo_reais'}}
+    """
+    from analises import obter_grupo
+    totais = {}
+    for tipo in TIPOS_COLHEITA:
+        grupo = obter_grupo(por_tipo, tipo)
+        totais[tipo] = {
+            'quantidade': grupo['quantidade'],
+            'toneladas': grupo['toneladas']['soma'],
+            'perda_toneladas': grupo['perda_toneladas']['soma'],
+            'prejuizo_reais': grupo['prejuizo_reais']['soma'],
+        }
+    return totais
+
+
+def totais_do_oracle(conn):
+    """
+    Totais por tipo do Oracle (mesmo formato de totais_do_agrupamento), de um
+    GROUP BY tipo_colheita no servidor: só uma linha por tipo vem pela rede
+    """
+    import database
+    por_tipo = database.obter_agrupamento_tipos_oracle(conn)
+    if por_tipo is None:
+        raise ErroComando("Falha ao consultar o Oracle")
+    return totais_do_agrupamento(por_tipo)
+
+
+def _totais_locais():
+    """
+    Totais por tipo do armazenamento local; com fragmentos, cada um é agregado
+    no seu processo e nenhum registro é carregado aqui (idem com os segmentos,
+    pelos resumos do índice, e com a cópia colunar)
+    """
+    from analises import agrupar_colheitas
+    diretorio = _diretorio_fragmentos()
+    if diretorio:
+        from fragmentos import agregar_fragmentos
+        return totais_do_agrupamento(agregar_fragmentos(diretorio, (('tipo_colheita',),))[('tipo_colheita',)])
+
+    # Segmentos em dia: soma os grupos pré-calculados, sem ler nenhum segmento
+    from armazenamento import agrupar_colheitas_gravadas
+    por_tipo = agrupar_colheitas_gravadas(ARQUIVO_DADOS)
+    if por_tipo is not None:
+        return totais_do_agrupamento(por_tipo)
+
+    # Cópia colunar ainda válida: agrupa das colunas mapeadas, sem montar os registros
+    from instantaneo import abrir_colunar_atual
+    tabela = abrir_colunar_atual(ARQUIVO_DADOS)
+    if tabela is not None:
+        from colunar import agrupar_colunar, fechar_colunar
+        try:
+            return totais_do_agrupamento(agrupar_colunar(tabela))
+        finally:
+            fechar_colunar(tabela)
+    return totais_do_agrupamento(agrupar_colheitas(carregar_colheitas_locais(), ('tipo_colheita',)))
+
+
+def _totais_oracle():
+    """
+    Totais por tipo no Oracle (uma consulta agrupada)
+    """
+    with conexao_oracle() as conn:
+        return totais_do_oracle(conn)
+
+
+def totais_por_tipo(fonte):
+    """
+    Totais por tipo de colheita da fonte escolhida
+
+    Retorno:
+        dict: {tipo: {'quantidade', 'toneladas', 'perda_toneladas', 'prejuizo_reais'}}
+    """
+    return _totais_oracle() if fonte == 'oracle' else _totais_locais()
+
+
+def resumir_estatisticas(totais):
+    """
+    Estatísticas gerais (as mesmas das opções 3 e 7 do menu) a partir dos totais por tipo
+    """
+    quantidade = sum(t['quantidade'] for t in totais.values())
+    toneladas = sum(t['toneladas'] for t in totais.values())
+    perda = sum(t['perda_toneladas'] for t in totais.values())
+    # Mesma regra de calcular_economia_potencial: mecânica → manual
+    diferenca_perda = calcular_perda_percentual('mecanica') - calcular_perda_percentual('manual')
+    economia_ton, economia_reais = calcular_prejuizo(totais['mecanica']['toneladas'], diferenca_perda)
+    return {
+        'total_colheitas': quantidade,
+        'colheitas_manuais': totais['manual']['quantidade'],
+        'colheitas_mecanicas': totais['mecanica']['quantidade'],
+        'total_toneladas': round(toneladas, 2),
+        'total_perda_toneladas': round(perda, 2),
+        'perda_percentual': round(perda / toneladas * 100, 2) if toneladas else 0.0,
+        'total_prejuizo': round(sum(t['prejuizo_reais'] for t in totais.values()), 2),
+        'economia_potencial_toneladas': round(economia_ton, 2),
+        'economia_potencial_reais': round(economia_reais, 2),
+    }
+
+
+def resumir_comparativo(totais):
+    """
+    Comparativo manual vs mecânica (opções 4 e 8 do menu), uma linha por tipo
+    """
+    linhas = []
+    for tipo, dados in totais.items():
+        toneladas = dados['toneladas']
+        linhas.append({
+            'tipo_colheita': tipo,
+            'quantidade': dados['quantidade'],
+            'toneladas': round(toneladas, 2),
+            'perda_toneladas': round(dados['perda_toneladas'], 2),
+            'perda_percentual': round(dados['perda_toneladas'] / toneladas * 100, 2) if toneladas else 0.0,
+            'prejuizo_reais': round(dados['prejuizo_reais'], 2),
+        })
+    return linhas
+
+
+# ========================================
+# SUBCOMANDOS
+# ========================================
+
+def comando_stats(argumentos):
+    """
+    Estatísticas gerais (opções 3 e 7 do menu)
+    """
+    return dict({'fonte': argumentos.fonte}, **resumir_estatisticas(totais_por_tipo(argumentos.fonte)))
+
+
+def comando_comparativo(argumentos):
+    """
+    Comparativo manual vs mecânica (opções 4 e 8 do menu)
+    """
+    return resumir_comparativo(totais_por_tipo(argumentos.fonte))
+
+
+def comando_report(argumentos):
+    """
+    Relatório TXT (opção 5 do menu) sem abrir o menu nem conectar ao Oracle
+    """
+    from relatorio import gerar_relatorio_txt
+    from cubo import carregar_cubo
+
+    colheitas = carregar_colheitas_locais()
+    if not colheitas:
+        raise ErroComando("Nenhuma colheita para gerar relatório")
+    # Com fragmentos as colheitas já foram lidas: agrega em memória, sem reler
+    cubo = None if _diretorio_fragmentos() else carregar_cubo(colheitas, ARQUIVO_DADOS)
+
+    if not gerar_relatorio_txt(colheitas, cubo, caminho=argumentos.saida):
+        raise ErroComando("Falha ao gerar o relatório")
+    return {'arquivo': argumentos.saida, 'colheitas': len(colheitas),
+            'gerado_em': datetime.now().isoformat(timespec='seconds')}
+
+
+def _ler_periodo(argumentos):
+    """
+    Período de --inicio/--fim, com as datas conferidas
+
+    Retorno:
+        dict: {'data_inicio', 'data_fim'} (None = sem limite)
+    """
+    for data in (argumentos.inicio, argumentos.fim):
+        if data:
+            datetime.strptime(data, '%d/%m/%Y')
+    return {'data_inicio': argumentos.inicio, 'data_fim': argumentos.fim}
+
+
+def _colheitas_do_periodo(periodo):
+    """
+    Colheitas locais de um período; no JSON único lê só os segmentos do
+    período, se houver (em ordem de data)
+    """
+    if _diretorio_fragmentos():
+        from armazenamento import filtrar_colheitas
+        return filtrar_colheitas(carregar_colheitas_locais(), **periodo)
+    from armazenamento import consultar_colheitas
+    return consultar_colheitas(ARQUIVO_DADOS, **periodo)
+
+
+def comando_search(argumentos):
+    """
+    Busca parcial por nome de fazenda (opção 9 do menu), opcionalmente em um período
+
+    Aplicação: com --inicio/--fim, os mapas de zona dos segmentos descartam
+    os períodos fora do filtro antes da busca pelo nome
+    """
+    periodo = _ler_periodo(argumentos)
+    if argumentos.fonte == 'oracle':
+        if argumentos.inicio or argumentos.fim:
+            raise ErroComando("Período na busca disponível só com --fonte json")
+        import database
+        with conexao_oracle() as conn:
+            linhas = database.buscar_colheitas_por_fazenda(conn, argumentos.nome)
+        if linhas is None:
+            raise ErroComando("Falha ao consultar o Oracle")
+        return [dict(zip(COLUNAS_COLHEITA, linha)) for linha in linhas]
+
+    from funcoes import buscar_colheitas_por_fazenda
+    if argumentos.inicio or argumentos.fim:
+        return buscar_colheitas_por_fazenda(_colheitas_do_periodo(periodo), argumentos.nome)
+    return buscar_colheitas_por_fazenda(carregar_colheitas_locais(), argumentos.nome)
+
+
+def comando_ranking(argumentos):
+    """
+    Ranking das fazendas que mais perdem (opção 11 do menu)
+
+    Aplicação: com --fluxo, o JSON local é percorrido uma colheita por vez
+    (arquivo base com o diário aplicado) e o ranking sai do Space-Saving em
+    memória O(K) (heavy_hitters_fazendas): serve a arquivos que não cabem na
+    memória, com estimativas e o erro máximo de cada uma
+    """
+    if argumentos.fonte == 'oracle':
+        if argumentos.fluxo:
+            raise ErroComando("--fluxo disponível só com --fonte json")
+        import database
+        with conexao_oracle() as conn:
+            ranking = database.obter_top_fazendas_oracle(conn, argumentos.k, argumentos.criterio)
+        if ranking is None:
+            raise ErroComando("Falha ao consultar o Oracle")
+        return ranking
+
+    if not argumentos.fluxo:
+        from analises import top_k_fazendas
+        return top_k_fazendas(carregar_colheitas_locais(), argumentos.k, argumentos.criterio)
+
+    if _diretorio_fragmentos():
+        raise ErroComando("--fluxo disponível só no JSON único")
+    if argumentos.criterio == 'razao_perda':
+        raise ErroComando("--fluxo aceita só prejuizo_reais ou perda_toneladas (razão não é somável)")
+    if not os.path.exists(ARQUIVO_DADOS):
+        return []
+    from analises import heavy_hitters_fazendas
+    from carga_massa import gravadas_em_fluxo
+    with gravadas_em_fluxo(ARQUIVO_DADOS) as (_, colheitas):
+        pesadas = heavy_hitters_fazendas(colheitas, argumentos.k * CONTADORES_POR_POSICAO, argumentos.criterio)
+    return [{'fazenda': fazenda, argumentos.criterio: estimativa, 'erro_maximo': erro}
+            for fazenda, estimativa, erro in pesadas[:argumentos.k]]
+
+
+def _ler_arquivo_importacao(caminho, formato):
+    formato = formato or ('csv' if caminho.lower().endswith('.csv') else 'json')
+    with open(caminho, 'r', encoding='utf-8', newline='') as arquivo:
+        if formato == 'csv':
+            return list(csv.DictReader(arquivo))
+        registros = json.load(arquivo)
+    if not isinstance(registros, list):
+        raise ErroComando("O JSON de importação deve ser uma lista de colheitas")
+    return registros
+
+
+def validar_registro(registro):
+    """
+    Valida um registro importado e calcula perda e prejuízo como no cadastro
+
+    Parâmetros:
+        registro (dict): fazenda, data (DD/MM/AAAA), tipo_colheita e toneladas
+
+    Retorno:
+        dict: Colheita completa (mesmos campos do cadastro pelo menu)
+
+    Exceções:
+        ValueError: Campo ausente ou inválido
+    """
+    from funcoes import calcular_perda_percentual, calcular_prejuizo
+
+    fazenda = str(registro.get('fazenda') or '').strip()
+    if not fazenda:
+        raise ValueError("fazenda vazia")
+    data = str(registro.get('data') or '').strip()
+    datetime.strptime(data, '%d/%m/%Y')
+    tipo = str(registro.get('tipo_colheita') or '').strip().lower()
+    if tipo not in TIPOS_COLHEITA:
+        raise ValueError(f"tipo_colheita inválido: {tipo!r}")
+    toneladas = float(registro.get('toneladas'))
+    if toneladas <= 0:
+        raise ValueError("toneladas deve ser maior que zero")
+
+    perda_percent = calcular_perda_percentual(tipo)
+    perda_ton, prejuizo = calcular_prejuizo(toneladas, perda_percent)
+    return {
+        'fazenda': fazenda,
+        'data': data,
+        'tipo_colheita': tipo,
+        'toneladas': toneladas,
+        'perda_percentual': perda_percent,
+        'perda_toneladas': perda_ton,
+        'prejuizo_reais': prejuizo,
+    }
+
+
+def comando_import(argumentos):
+    """
+    Importa colheitas de um arquivo JSON ou CSV para o armazenamento local
+    (uma única gravação sob trava) e, com --oracle, também para o banco
+    """
+    from armazenamento import gerar_id
+
+    colheitas, rejeitadas = [], []
+    for numero, registro in enumerate(_ler_arquivo_importacao(argumentos.arquivo, argumentos.formato_entrada), 1):
+        try:
+            colheita = validar_registro(registro)
+        except (TypeError, ValueError) as e:
+            rejeitadas.append({'registro': numero, 'erro': str(e)})
+            continue
+        colheita['id'] = gerar_id()
+        colheitas.append(colheita)
+
+    resultado = {'lidas': len(colheitas) + len(rejeitadas), 'importadas': len(colheitas),
+                 'rejeitadas': rejeitadas}
+    if not colheitas:
+        return resultado
+
+    diretorio = _diretorio_fragmentos()
+    if diretorio:
+        from fragmentos import acrescentar_fragmentos
+        acrescentar_fragmentos(colheitas, diretorio)
+    else:
+        from armazenamento import acrescentar_colheitas
+        acrescentar_colheitas(colheitas, ARQUIVO_DADOS)
+
+    if argumentos.oracle:
+        import database
+        from gravacao import registrar_pendencia
+        inseridas = None
+        try:
+            with conexao_oracle() as conn:
+                database.criar_tabela(conn)
+                # Lote único (um commit): ou tudo entra no Oracle ou nada entra
+                inseridas = database.inserir_colheitas_lote(conn, colheitas, tamanho_lote=len(colheitas))
+        except ErroComando:
+            pass
+        if inseridas is None:
+            # O JSON já foi gravado: o Oracle fica para o reprocessamento (opção 15)
+            for colheita in colheitas:
+                registrar_pendencia('oracle', colheita, "falha na importação pelo cli.py", ARQUIVO_DADOS)
+            raise ErroComando(f"{len(colheitas)} colheitas gravadas só no armazenamento local; "
+                              f"Oracle pendente (reprocessar pela opção 15)")
+        resultado['oracle'] = inseridas
+    return resultado
+
+
+def comando_export(argumentos):
+    """
+    Exporta as colheitas da fonte escolhida
+
+    Retorno:
+        list | dict: Lista de colheitas (--formato json) ou resumo da
+                     exportação em fluxo (CSV, comprimido ou colunar)
+
+    Aplicação: fora do JSON, as linhas vão lote a lote para o destino por
+    exportacao.py, sem montar a lista inteira; com --particao cada mês ou
+    safra vira um arquivo, exportados em paralelo
+    """
+    if argumentos.formato == 'json' and not argumentos.particao:
+        if argumentos.fonte == 'oracle':
+            import database
+            with conexao_oracle() as conn:
+                linhas = database.listar_todas_colheitas(conn)
+            return [dict(zip(COLUNAS_COLHEITA, linha)) for linha in linhas]
+        return carregar_colheitas_locais()
+
+    import exportacao
+    if argumentos.formato == 'json':
+        raise ErroComando("Partições são exportadas em " + ', '.join(exportacao.FORMATOS))
+    periodo = _ler_periodo(argumentos)
+    colheitas = None
+    if argumentos.fonte == 'json':
+        if (argumentos.inicio or argumentos.fim) and not _diretorio_fragmentos():
+            # Período no JSON único: lê só os segmentos do período, se houver
+            colheitas = _colheitas_do_periodo(periodo)
+        else:
+            colheitas = carregar_colheitas_locais()
+
+    if argumentos.particao:
+        if argumentos.saida == '-':
+            raise ErroComando("Informe em --saida o diretório das partições")
+        return exportacao.exportar_particoes(argumentos.fonte, argumentos.saida, argumentos.formato,
+                                             argumentos.particao, argumentos.paralelo,
+                                             colheitas=colheitas, **periodo)
+    if argumentos.saida == '-' and argumentos.formato != 'csv':
+        raise ErroComando(f"O formato {argumentos.formato} precisa de --saida")
+
+    with contextlib.ExitStack() as pilha:
+        conn = pilha.enter_context(conexao_oracle()) if argumentos.fonte == 'oracle' else None
+        lotes = exportacao.lotes_colheitas(argumentos.fonte, colheitas, conn, **periodo)
+        if argumentos.saida == '-':
+            return {'arquivo': 'stdout', 'linhas': exportacao.escrever_csv(lotes, argumentos.stdout)}
+        return exportacao.exportar(lotes, argumentos.saida, argumentos.formato)
+
+
+COMANDOS = {
+    'stats': comando_stats,
+    'comparativo': comando_comparativo,
+    'report': comando_report,
+    'search': comando_search,
+    'ranking': comando_ranking,
+    'import': comando_import,
+    'export': comando_export,
+}
+
+
+# ========================================
+# SAÍDA (JSON OU CSV)
+# ========================================
+
+def escrever_saida(dados, formato, arquivo):
+    """
+    Escreve o resultado de um subcomando
+
+    Parâmetros:
+        dados (dict | list): Um registro ou uma lista de registros
+        formato (str): 'json' ou 'csv' (cabeçalho com a união das chaves)
+        arquivo: Arquivo texto aberto (stdout ou --saida)
+    """
+    if formato == 'json':
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2, default=str)
+        arquivo.write('\n')
+        return
+
+    linhas = [dados] if isinstance(dados, dict) else dados
+    colunas = []
+    for linha in linhas:
+        colunas.extend(chave for chave in linha if chave not in colunas)
+    escritor = csv.DictWriter(arquivo, fieldnames=colunas, extrasaction='ignore', lineterminator='\n')
+    escritor.writeheader()
+    for linha in linhas:
+        escritor.writerow({chave: json.dumps(valor, ensure_ascii=False) if isinstance(valor, (list, dict)) else valor
+                           for chave, valor in linha.items()})
+
+
+def criar_parser():
+    """
+    Parser dos subcomandos (nomes em inglês com apelidos em português)
+    """
+    parser = argparse.ArgumentParser(prog='cli.py', description="Consultas e cargas sem o menu interativo")
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument('--formato', choices=('json', 'csv'), default='json', help="Formato da saída")
+
+    fonte = argparse.ArgumentParser(add_help=False)
+    fonte.add_argument('--fonte', choices=('json', 'oracle'), default='json',
+                       help="JSON local (padrão) ou Oracle")
+
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    subcomandos.add_parser('stats', aliases=['estatisticas'], parents=[comum, fonte],
+                           help="Estatísticas gerais")
+    subcomandos.add_parser('comparativo', parents=[comum, fonte], help="Manual vs mecânica")
+
+    relatorio = subcomandos.add_parser('report', aliases=['relatorio'], parents=[comum],
+                                       help="Gera o relatório TXT")
+    relatorio.add_argument('--saida', default=ARQUIVO_RELATORIO, help="Arquivo do relatório")
+
+    busca = subcomandos.add_parser('search', aliases=['buscar'], parents=[comum, fonte],
+                                   help="Busca por nome de fazenda")
+    busca.add_argument('nome', help="Nome (ou parte do nome) da fazenda")
+    busca.add_argument('--inicio', help="Data inicial DD/MM/AAAA")
+    busca.add_argument('--fim', help="Data final DD/MM/AAAA")
+
+    ranking = subcomandos.add_parser('ranking', parents=[comum, fonte],
+                                     help="Fazendas que mais perdem (top-K)")
+    ranking.add_argument('--k', type=int, default=5, help="Quantidade de fazendas")
+    ranking.add_argument('--criterio', choices=CRITERIOS_RANKING, default='prejuizo_reais',
+                         help="Critério do ranking")
+    ranking.add_argument('--fluxo', action='store_true',
+                         help="JSON lido em fluxo, memória O(K) (estimativas com erro máximo)")
+
+    importacao = subcomandos.add_parser('import', aliases=['importar'], parents=[comum],
+                                        help="Importa colheitas de JSON ou CSV")
+    importacao.add_argument('arquivo', help="Lista JSON ou CSV com fazenda, data, tipo_colheita e toneladas")
+    importacao.add_argument('--entrada', dest='formato_entrada', choices=('json', 'csv'),
+                            help="Formato do arquivo (padrão: pela extensão)")
+    importacao.add_argument('--oracle', action='store_true', help="Grava também no Oracle")
+
+    exportacao = subcomandos.add_parser('export', aliases=['exportar'], parents=[fonte],
+                                        help="Exporta as colheitas (em fluxo fora do JSON)")
+    exportacao.add_argument('--formato', choices=FORMATOS_EXPORTACAO, default='json',
+                            help="Formato da saída (csv.zst requer o pacote zstandard)")
+    exportacao.add_argument('--saida', default='-',
+                            help="Arquivo de saída (padrão: stdout) ou diretório com --particao")
+    exportacao.add_argument('--particao', choices=('mes', 'safra'),
+                            help="Um arquivo por mês ou safra")
+    exportacao.add_argument('--paralelo', type=int, default=4, help="Partições exportadas ao mesmo tempo")
+    exportacao.add_argument('--inicio', help="Data inicial DD/MM/AAAA")
+    exportacao.add_argument('--fim', help="Data final DD/MM/AAAA")
+    return parser
+
+
+APELIDOS = {'estatisticas': 'stats', 'relatorio': 'report', 'buscar': 'search',
+            'importar': 'import', 'exportar': 'export'}
+
+
+def main(argv=None):
+    """
+    Executa um subcomando
+
+    Retorno:
+        int: Código de saída (0 = sucesso, 1 = erro)
+    """
+    argumentos = criar_parser().parse_args(argv)
+    comando = COMANDOS[APELIDOS.get(argumentos.comando, argumentos.comando)]
+    argumentos.stdout = sys.stdout
+    try:
+        # Mensagens das funções do sistema (✅/⚠️) não se misturam aos dados
+        with contextlib.redirect_stdout(sys.stderr):
+            dados = comando(argumentos)
+    except (ErroComando, OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if comando is comando_export and (argumentos.formato != 'json' or argumentos.particao):
+        # Exportação em fluxo: as linhas já estão no destino, só o resumo vai para o stderr
+        for resumo in dados if isinstance(dados, list) else [dados]:
+            print(f"✅ {resumo['linhas']} colheitas exportadas para {resumo['arquivo']}", file=sys.stderr)
+        return 0
+
+    destino = getattr(argumentos, 'saida', '-') if comando is comando_export else '-'
+    if destino == '-':
+        escrever_saida(dados, argumentos.formato, sys.stdout)
+    else:
+        with open(destino, 'w', encoding='utf-8', newline='') as arquivo:
+            escrever_saida(dados, argumentos.formato, arquivo)
+        print(f"✅ {len(dados)} colheitas exportadas para {destino}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
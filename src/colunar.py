@@ -0,0 +1,308 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: colunar.py
+Descrição: Formato binário colunar com carregamento por mmap
+           (colunas numéricas de largura fixa, fazenda codificada em dicionário)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from analises import agrupar_colunas
+
+# ========================================
+# LAYOUT DO ARQUIVO (LITTLE-ENDIAN)
+# ========================================
+#
+# Cabeçalho (32 bytes):
+#   magic (8s) | versao (H) | reservado (H) | linhas (Q) | fazendas (I) | bytes_dicionario (Q)
+# Dicionário: objeto JSON UTF-8 {'fazendas': [...], 'assinatura': ...}, completado
+#   com zeros até múltiplo de 8 (assinatura dos dados de origem ou null)
+# Colunas, na ordem de COLUNAS, cada uma com `linhas` valores de largura fixa
+# Ids: lista JSON UTF-8 até o fim do arquivo (lida só quando os registros são montados)
+
+MAGIC = b'AGROCOL\x00'
+VERSAO_COLUNAR = 2
+CABECALHO = struct.Struct('<8sHHQIQ')
+
+# Nome da coluna -> código de tipo do módulo array (floats primeiro para manter alinhamento)
+COLUNAS = (
+    ('toneladas', 'd'),
+    ('perda_percentual', 'd'),
+    ('perda_toneladas', 'd'),
+    ('prejuizo_reais', 'd'),
+    ('data', 'i'),              # AAAAMMDD
+    ('fazenda', 'I'),           # código no dicionário de fazendas
+    ('tipo_colheita', 'B'),     # índice em TIPOS
+)
+
+TIPOS = ('manual', 'mecanica')
+
+
+def alinhar(tamanho):
+    """
+    Arredonda um tamanho para o próximo múltiplo de 8 bytes
+    """
+    return (tamanho + 7) & ~7
+
+
+def data_para_inteiro(data):
+    """
+    Converte DD/MM/AAAA em inteiro AAAAMMDD
+    """
+    return int(data[6:10] + data[3:5] + data[0:2])
+
+
+def inteiro_para_data(valor):
+    """
+    Converte inteiro AAAAMMDD em DD/MM/AAAA
+    """
+    return f"{valor % 100:02d}/{valor // 100 % 100:02d}/{valor // 10000:04d}"
+
+
+# ========================================
+# EXPORTAÇÃO (JSON -> COLUNAR)
+# ========================================
+
+def codificar_dicionario(fazendas, assinatura=None):
+    """
+    Dicionário do cabeçalho: nomes das fazendas na ordem dos códigos e a
+    assinatura dos dados de origem
+
+    Retorno:
+        bytes: JSON UTF-8 (sem o preenchimento até múltiplo de 8)
+    """
+    return json.dumps({'fazendas': list(fazendas), 'assinatura': assinatura},
+                      ensure_ascii=False).encode('utf-8')
+
+
+def exportar_colunar(colheitas, caminho='dados_colheitas.col', assinatura=None):
+    """
+    Grava as colheitas no formato binário colunar
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        caminho (str): Arquivo de destino
+        assinatura (dict): Assinatura dos dados de origem (permite saber se o
+                           arquivo colunar ainda corresponde a eles)
+
+    Retorno:
+        int: Quantidade de linhas gravadas
+    """
+    fazendas = {}
+    colunas = {nome: array(codigo) for nome, codigo in COLUNAS}
+    for colheita in colheitas:
+        colunas['toneladas'].append(colheita['toneladas'])
+        colunas['perda_percentual'].append(colheita['perda_percentual'])
+        colunas['perda_toneladas'].append(colheita['perda_toneladas'])
+        colunas['prejuizo_reais'].append(colheita['prejuizo_reais'])
+        colunas['data'].append(data_para_inteiro(colheita['data']))
+        colunas['fazenda'].append(fazendas.setdefault(colheita['fazenda'], len(fazendas)))
+        colunas['tipo_colheita'].append(TIPOS.index(colheita['tipo_colheita']))
+
+    if sys.byteorder != 'little':
+        for coluna in colunas.values():
+            coluna.byteswap()
+
+    dicionario = codificar_dicionario(fazendas, assinatura)
+    linhas = len(colheitas)
+
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(CABECALHO.pack(MAGIC, VERSAO_COLUNAR, 0, linhas, len(fazendas), len(dicionario)))
+        arquivo.write(dicionario.ljust(alinhar(len(dicionario)), b'\x00'))
+        for nome, _ in COLUNAS:
+            colunas[nome].tofile(arquivo)
+        arquivo.write(json.dumps([c.get('id') for c in colheitas], ensure_ascii=False).encode('utf-8'))
+    os.replace(temporario, caminho)
+    return linhas
+
+
+# ========================================
+# CARREGAMENTO POR MMAP (SEM CÓPIA)
+# ========================================
+
+def abrir_colunar(caminho='dados_colheitas.col'):
+    """
+    Abre o arquivo colunar mapeado em memória
+
+    Parâmetros:
+        caminho (str): Arquivo colunar
+
+    Retorno:
+        dict: {'linhas', 'fazendas' (list), 'tipos', 'assinatura',
+               'colunas': {nome: memoryview}}
+              As colunas apontam direto para o arquivo mapeado (zero-copy);
+              os ids ficam no arquivo até ids_colunar. Chame fechar_colunar ao terminar.
+
+    Erros:
+        ValueError: arquivo não é colunar ou tem versão não suportada
+    """
+    with open(caminho, 'rb') as arquivo:
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, versao, _, linhas, _, bytes_dicionario = CABECALHO.unpack_from(mapa, 0)
+    if magic != MAGIC:
+        mapa.close()
+        raise ValueError(f"{caminho} não é um arquivo colunar do sistema")
+    if versao != VERSAO_COLUNAR:
+        mapa.close()
+        raise ValueError(f"Versão do arquivo colunar não suportada: {versao}")
+
+    inicio = CABECALHO.size
+    dicionario = json.loads(bytes(mapa[inicio:inicio + bytes_dicionario]).decode('utf-8'))
+    posicao = inicio + alinhar(bytes_dicionario)
+
+    visao = memoryview(mapa)
+    colunas = {}
+    for nome, codigo in COLUNAS:
+        tamanho = linhas * array(codigo).itemsize
+        bruto = visao[posicao:posicao + tamanho]
+        if sys.byteorder == 'little':
+            colunas[nome] = bruto.cast(codigo)
+        else:
+            # Máquinas big-endian precisam de cópia com troca de bytes
+            copia = array(codigo, bytes(bruto))
+            copia.byteswap()
+            colunas[nome] = memoryview(copia)
+            bruto.release()
+        posicao += tamanho
+
+    return {'linhas': linhas, 'fazendas': dicionario['fazendas'], 'tipos': TIPOS,
+            'assinatura': dicionario['assinatura'], 'colunas': colunas,
+            '_inicio_ids': posicao, '_visao': visao, '_mapa': mapa}
+
+
+def ids_colunar(tabela):
+    """
+    Lê os ids das linhas (lista JSON no fim do arquivo)
+
+    Retorno:
+        list: Id de cada linha, na ordem das colunas
+    """
+    return json.loads(bytes(tabela['_mapa'][tabela['_inicio_ids']:]).decode('utf-8'))
+
+
+def fechar_colunar(tabela):
+    """
+    Libera as colunas e fecha o mapeamento do arquivo
+    """
+    for coluna in tabela['colunas'].values():
+        coluna.release()
+    tabela['colunas'] = {}
+    tabela['_visao'].release()
+    tabela['_mapa'].close()
+
+
+# ========================================
+# CONSULTAS SOBRE AS COLUNAS
+# ========================================
+
+def _safra_de_inteiro(valor):
+    """
+    Safra (AAAA/AAAA) de uma data AAAAMMDD
+    """
+    ano = valor // 10000
+    if valor // 100 % 100 < 4:
+        ano -= 1
+    return f"{ano}/{ano + 1}"
+
+
+def agrupar_colunar(tabela, dimensoes=('tipo_colheita',)):
+    """
+    Agrupa o arquivo colunar direto das colunas mapeadas
+
+    Parâmetros:
+        tabela (dict): Resultado de abrir_colunar
+        dimensoes (tuple): Dimensões ('fazenda', 'mes', 'safra', 'tipo_colheita')
+
+    Retorno:
+        dict: Mesmo formato de agrupar_colheitas
+    """
+    colunas = tabela['colunas']
+    fazendas, tipos = tabela['fazendas'], tabela['tipos']
+    geradores = {
+        'fazenda': lambda: (fazendas[c] for c in colunas['fazenda']),
+        'mes': lambda: (f"{d // 10000:04d}-{d // 100 % 100:02d}" for d in colunas['data']),
+        'safra': lambda: (_safra_de_inteiro(d) for d in colunas['data']),
+        'tipo_colheita': lambda: (tipos[t] for t in colunas['tipo_colheita']),
+    }
+    for dimensao in dimensoes:
+        if dimensao not in geradores:
+            raise ValueError(f"Dimensão inválida: {dimensao}. Use: {', '.join(geradores)}")
+
+    if dimensoes:
+        chaves = zip(*(geradores[d]() for d in dimensoes))
+    else:
+        chaves = (() for _ in range(tabela['linhas']))
+    return agrupar_colunas(chaves, colunas)
+
+
+# ========================================
+# IMPORTAÇÃO (COLUNAR -> JSON)
+# ========================================
+
+def colheitas_da_tabela(tabela):
+    """
+    Monta a lista de dicionários do JSON a partir de uma tabela aberta
+
+    Retorno:
+        list: Lista de dicionários com dados das colheitas (com id)
+    """
+    c = tabela['colunas']
+    fazendas, tipos = tabela['fazendas'], tabela['tipos']
+    return [
+        {
+            'fazenda': fazendas[c['fazenda'][i]],
+            'data': inteiro_para_data(c['data'][i]),
+            'tipo_colheita': tipos[c['tipo_colheita'][i]],
+            'toneladas': c['toneladas'][i],
+            'perda_percentual': c['perda_percentual'][i],
+            'perda_toneladas': c['perda_toneladas'][i],
+            'prejuizo_reais': c['prejuizo_reais'][i],
+            'id': id_colheita,
+        }
+        for i, id_colheita in enumerate(ids_colunar(tabela))
+    ]
+
+
+def importar_colunar(caminho='dados_colheitas.col'):
+    """
+    Converte o arquivo colunar de volta para a lista de dicionários do JSON
+
+    Retorno:
+        list: Lista de dicionários com dados das colheitas
+    """
+    tabela = abrir_colunar(caminho)
+    try:
+        return colheitas_da_tabela(tabela)
+    finally:
+        fechar_colunar(tabela)
+
+
+# ========================================
+# EXECUÇÃO DIRETA: PONTE JSON <-> COLUNAR
+# ========================================
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ('exportar', 'importar'):
+        print("Uso: python colunar.py exportar dados_colheitas.json dados_colheitas.col")
+        print("     python colunar.py importar dados_colheitas.col dados_colheitas.json")
+        sys.exit(1)
+
+    # Arquivo base + diário dos dois lados: nada do diário fica de fora nem é
+    # reaplicado por cima do arquivo importado
+    from armazenamento import ler_colheitas, substituir_colheitas
+
+    comando, origem, destino = sys.argv[1:]
+    if comando == 'exportar':
+        total = exportar_colunar(ler_colheitas(origem), destino)
+    else:
+        dados = importar_colunar(origem)
+        substituir_colheitas(dados, destino)
+        total = len(dados)
+    print(f"✅ {total} colheitas convertidas: {origem} -> {destino}")
@@ -0,0 +1,198 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: cubo.py
+Descrição: Cubo de agregados pré-calculados (dia -> mês -> safra, por fazenda e tipo)
+"""
+
+import json
+import os
+
+from analises import obter_mes, obter_safra
+from armazenamento import identidade_apos_gravacao, identidade_dados
+
+# Arquivo do cubo: fica ao lado de dados_colheitas.json
+ARQUIVO_CUBO = 'cubo_colheitas.json'
+VERSAO_CUBO = 2
+
+# Níveis de tempo do cubo e a função que gera o período de cada data
+NIVEIS = {
+    'dia': lambda data: f"{data[6:10]}-{data[3:5]}-{data[0:2]}",
+    'mes': obter_mes,
+    'safra': obter_safra,
+}
+
+# Rótulos para exibição de cada nível
+ROTULOS_NIVEIS = {'dia': 'DIA', 'mes': 'MÊS', 'safra': 'SAFRA'}
+
+
+# ========================================
+# CRIAÇÃO E ATUALIZAÇÃO INCREMENTAL
+# ========================================
+
+def criar_cubo():
+    """
+    Cria um cubo vazio
+
+    Retorno:
+        dict: {'versao', 'registros', 'niveis': {nivel: {periodo: {fazenda: {tipo: [...]}}}}}
+
+    Cada célula é uma LISTA [quantidade, toneladas, perda_toneladas, prejuizo_reais]
+    """
+    return {
+        'versao': VERSAO_CUBO,
+        'registros': 0,
+        'niveis': {nivel: {} for nivel in NIVEIS},
+    }
+
+
+def atualizar_cubo(cubo, colheitas, sinal=1):
+    """
+    Atualiza somente as células afetadas pelas colheitas informadas
+
+    Parâmetros:
+        cubo (dict): Cubo a atualizar (modificado no lugar)
+        colheitas (list): Colheitas novas (cadastro ou importação em lote)
+        sinal (int): 1 para somar, -1 para retirar registros do cubo
+
+    Retorno:
+        dict: O próprio cubo atualizado
+    """
+    niveis = cubo['niveis']
+    for colheita in colheitas:
+        data = colheita['data']
+        for nivel, periodo_de in NIVEIS.items():
+            por_fazenda = niveis[nivel].setdefault(periodo_de(data), {})
+            por_tipo = por_fazenda.setdefault(colheita['fazenda'], {})
+            celula = por_tipo.setdefault(colheita['tipo_colheita'], [0, 0.0, 0.0, 0.0])
+            celula[0] += sinal
+            celula[1] += sinal * colheita['toneladas']
+            celula[2] += sinal * colheita['perda_toneladas']
+            celula[3] += sinal * colheita['prejuizo_reais']
+    cubo['registros'] += sinal * len(colheitas)
+    return cubo
+
+
+def reconstruir_cubo(colheitas):
+    """
+    Reconstrói o cubo inteiro a partir dos registros (passada única)
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+
+    Retorno:
+        dict: Cubo completo
+    """
+    return atualizar_cubo(criar_cubo(), colheitas)
+
+
+# ========================================
+# PERSISTÊNCIA DO CUBO
+# ========================================
+
+def caminho_cubo(caminho_dados='dados_colheitas.json'):
+    """
+    Retorna o caminho do cubo ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), ARQUIVO_CUBO)
+
+
+def salvar_cubo(cubo, caminho_dados='dados_colheitas.json', identidade=None):
+    """
+    Salva o cubo em JSON compacto ao lado do arquivo de dados
+
+    Parâmetros:
+        cubo (dict): Cubo de agregados
+        caminho_dados (str): Caminho de dados_colheitas.json
+        identidade (list): Identidade dos dados de onde o cubo saiu (None = o cubo
+                           acabou de receber a última gravação deste processo)
+
+    Retorno:
+        bool: True se salvou, False em caso de erro
+
+    Aplicação: depois de um cadastro, atualização ou remoção, o cubo só fica
+    válido se a gravação partiu da versão em que ele estava em dia; se outro
+    operador gravou no meio, fica sem identidade e é reconstruído na próxima
+    carga (nenhum hash do conteúdo é calculado)
+    """
+    if identidade is None:
+        identidade = identidade_apos_gravacao(cubo.get('identidade'), caminho_dados)
+    cubo['identidade'] = identidade
+    try:
+        with open(caminho_cubo(caminho_dados), 'w', encoding='utf-8') as arquivo:
+            json.dump(cubo, arquivo, ensure_ascii=False, separators=(',', ':'))
+        return True
+    except Exception as e:
+        print(f"❌ Erro ao salvar cubo: {e}")
+        return False
+
+
+def carregar_cubo(colheitas, caminho_dados='dados_colheitas.json', identidade=None):
+    """
+    Carrega o cubo salvo, reconstruindo-o se estiver ausente ou desatualizado
+
+    Parâmetros:
+        colheitas (list): Registros atuais (usados só se for preciso reconstruir)
+        caminho_dados (str): Caminho de dados_colheitas.json
+        identidade (list): Identidade tirada ANTES de ler os registros (None = atual)
+
+    Retorno:
+        dict: Cubo válido para os registros atuais
+
+    Validação: a identidade do arquivo base e do diário (inode, mtime e
+    tamanho, como nos segmentos) precisa bater; só a contagem não basta,
+    porque uma atualização mantém o número de registros e muda os agregados
+    """
+    try:
+        with open(caminho_cubo(caminho_dados), 'r', encoding='utf-8') as arquivo:
+            cubo = json.load(arquivo)
+        if (cubo.get('versao') == VERSAO_CUBO and cubo.get('registros') == len(colheitas) and
+                cubo.get('identidade') == identidade_dados(caminho_dados)):
+            return cubo
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    cubo = reconstruir_cubo(colheitas)
+    salvar_cubo(cubo, caminho_dados, identidade if identidade is not None else identidade_dados(caminho_dados))
+    return cubo
+
+
+# ========================================
+# CONSULTAS DE TENDÊNCIA
+# ========================================
+
+def consultar_tendencia(cubo, nivel='mes', fazenda=None, tipo=None):
+    """
+    Consulta a série temporal de perdas lendo apenas o cubo
+
+    Parâmetros:
+        cubo (dict): Cubo de agregados
+        nivel (str): 'dia', 'mes' ou 'safra'
+        fazenda (str): Filtra uma fazenda (None = todas)
+        tipo (str): Filtra um tipo de colheita (None = todos)
+
+    Retorno:
+        list: Lista de TUPLAS (periodo, totais) em ordem cronológica,
+              onde totais tem quantidade, toneladas, perda_toneladas e prejuizo_reais
+    """
+    if nivel not in NIVEIS:
+        raise ValueError(f"Nível inválido: {nivel}. Use: {', '.join(NIVEIS)}")
+
+    serie = []
+    for periodo, por_fazenda in sorted(cubo['niveis'][nivel].items()):
+        soma = [0, 0.0, 0.0, 0.0]
+        for nome_fazenda, por_tipo in por_fazenda.items():
+            if fazenda is not None and nome_fazenda != fazenda:
+                continue
+            for nome_tipo, celula in por_tipo.items():
+                if tipo is not None and nome_tipo != tipo:
+                    continue
+                for i in range(4):
+                    soma[i] += celula[i]
+        if soma[0] > 0:
+            serie.append((periodo, {
+                'quantidade': soma[0],
+                'toneladas': soma[1],
+                'perda_toneladas': soma[2],
+                'prejuizo_reais': soma[3],
+            }))
+    return serie
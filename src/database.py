@@ -4,12 +4,132 @@ Arquivo: database.py
 Descrição: Conexão e operações com Oracle Database
 """
 
-import oracledb
+import contextlib
+import os
+import re
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+from analises import top_k, CRITERIOS_RANKING, DIMENSOES, METRICAS, mesclar_agrupamentos
+from colunar import agrupar_colunar, TIPOS
+from funcoes import calcular_perda_percentual, validar_alteracao
+from instrumentacao import instrumentar_conexao, instrumentar_modulo
+from rastreamento import rastrear_conexao
+
+# Driver Oracle: importado só no primeiro uso (ver carregar_driver)
+_oracledb = None
+
+# Preço por tonelada usado no recálculo do prejuízo (mesmo padrão de calcular_prejuizo)
+PRECO_TONELADA = 150.0
+
+# INSERT de uma colheita (inserir_colheita e inserir_colheitas_lote)
+SQL_INSERCAO = """
+    INSERT INTO colheitas_cana
+    (fazenda, data_colheita, tipo_colheita, toneladas,
+     perda_percentual, perda_toneladas, prejuizo_reais)
+    VALUES (:fazenda, TO_DATE(:data, 'DD/MM/YYYY'), :tipo,
+            :toneladas, :perda_perc, :perda_ton, :prejuizo)
+"""
+
+# Carga em massa: cada linha só entra se o id do JSON (id_origem) ainda não
+# estiver na tabela; recarregar o mesmo arquivo não duplica nada. Linhas sem
+# id_origem (gravadas pelo menu) são comparadas pela chave natural, com as
+# toneladas já arredondadas como na coluna NUMBER(10,2). A dica faz o índice
+# único descartar a linha, em vez de falhar o lote, quando duas conexões
+# inserem o mesmo id ao mesmo tempo
+SQL_INSERCAO_SEM_DUPLICADAS = """
+    INSERT /*+ IGNORE_ROW_ON_DUPKEY_INDEX(colheitas_cana, colheitas_cana_origem_idx) */
+      INTO colheitas_cana
+    (id_origem, fazenda, data_colheita, tipo_colheita, toneladas,
+     perda_percentual, perda_toneladas, prejuizo_reais)
+    SELECT :id_origem, :fazenda, :data, :tipo, :toneladas, :perda_perc, :perda_ton, :prejuizo
+      FROM dual
+     WHERE NOT EXISTS (
+           SELECT 1 FROM colheitas_cana WHERE id_origem = :id_origem)
+       AND NOT EXISTS (
+           SELECT 1 FROM colheitas_cana
+            WHERE id_origem IS NULL
+              AND fazenda = :fazenda AND data_colheita = :data
+              AND tipo_colheita = :tipo AND toneladas = :toneladas)
+"""
+
+# UPDATE por campo: as colunas derivadas são recalculadas no mesmo comando,
+# a partir dos valores da própria linha
+SQL_ATUALIZACAO = {
+    'fazenda': "UPDATE colheitas_cana SET fazenda = :valor WHERE id = :id",
+    'toneladas': """
+        UPDATE colheitas_cana
+           SET toneladas = :valor,
+               perda_toneladas = :valor * perda_percentual,
+               prejuizo_reais = :valor * perda_percentual * :preco
+         WHERE id = :id
+    """,
+    'tipo_colheita': """
+        UPDATE colheitas_cana
+           SET tipo_colheita = :valor,
+               perda_percentual = :perda,
+               perda_toneladas = toneladas * :perda,
+               prejuizo_reais = toneladas * :perda * :preco
+         WHERE id = :id
+    """,
+}
 
 # ========================================
 # CONFIGURAÇÃO DO BANCO DE DADOS
 # ========================================
 
+CREDENCIAIS = {
+    'user': 'rm568506',
+    'password': '190294',
+    'dsn': 'oracle.fiap.com.br:1521/ORCL',
+}
+
+def carregar_driver():
+    """
+    Importa o driver oracledb no primeiro uso
+
+    Retorno:
+        module: Módulo oracledb (ou banco_local com AGROTECH_BACKEND=sqlite)
+
+    Aplicação: quem usa só o JSON não paga o import do driver na inicialização;
+    o substituto local roda as mesmas funções sem o servidor (CI, testes de carga)
+    """
+    global _oracledb
+    if _oracledb is None:
+        if os.getenv('AGROTECH_BACKEND', 'oracle') == 'sqlite':
+            import banco_local as driver
+        else:
+            import oracledb as driver
+        _oracledb = driver
+    return _oracledb
+
+
+def _abrir_conexao():
+    """
+    Abre a conexão com o Oracle (sem mensagens; exceções sobem ao chamador)
+
+    Métricas (AGROTECH_METRICAS=1) e rastreio de SQL (AGROTECH_RASTREIO=1)
+    embrulham a conexão só quando ligados
+    """
+    return instrumentar_conexao(rastrear_conexao(carregar_driver().connect(**CREDENCIAIS)))
+
+
+def _exibir_erro_conexao(e):
+    """
+    Exibe o erro de uma tentativa de conexão
+    """
+    if isinstance(e, ImportError):
+        print("❌ Driver Oracle não instalado (pip install oracledb)")
+    elif _oracledb is not None and isinstance(e, _oracledb.DatabaseError):
+        error, = e.args
+        print(f"❌ Erro na conexão com Oracle:")
+        print(f"   Código: {error.code}")
+        print(f"   Mensagem: {error.message}")
+    else:
+        print(f"❌ Erro inesperado na conexão: {e}")
+
+
 def conectar_oracle():
     """
     Estabelece conexão com Oracle Database
@@ -20,24 +140,95 @@ def conectar_oracle():
     Aplicação: Conexão com banco de dados Oracle (Capítulo 6)
     """
     try:
-        conn = oracledb.connect(
-            user='rm568506',
-            password='190294',
-            dsn='oracle.fiap.com.br:1521/ORCL'
-        )
+        conn = _abrir_conexao()
         print("✅ Conectado ao Oracle Database!")
         return conn
-    except oracledb.DatabaseError as e:
-        error, = e.args
-        print(f"❌ Erro na conexão com Oracle:")
-        print(f"   Código: {error.code}")
-        print(f"   Mensagem: {error.message}")
-        return None
     except Exception as e:
-        print(f"❌ Erro inesperado na conexão: {e}")
+        _exibir_erro_conexao(e)
         return None
 
 
+# ========================================
+# CONEXÃO SOB DEMANDA
+# ========================================
+
+def criar_conexao_sob_demanda(aquecer=False):
+    """
+    Prepara a conexão Oracle sem abri-la (o menu aparece sem esperar o banco)
+
+    Parâmetros:
+        aquecer (bool): Importa o driver e conecta em segundo plano enquanto
+                        o menu já está na tela
+
+    Retorno:
+        dict: Estado da conexão {'conn', 'pronta', 'erro', 'aquecimento'}
+
+    Estrutura aplicada: DICIONÁRIO de estado, usado só pela thread do menu
+    (a thread de aquecimento apenas preenche 'conn' ou 'erro')
+    """
+    estado = {'conn': None, 'pronta': False, 'erro': None, 'aquecimento': None}
+    if aquecer:
+        estado['aquecimento'] = threading.Thread(target=_aquecer_conexao, args=(estado,), daemon=True)
+        estado['aquecimento'].start()
+    return estado
+
+
+def _aquecer_conexao(estado):
+    """
+    Thread de aquecimento: guarda a conexão ou o erro, sem imprimir nada
+    (as mensagens saem no primeiro uso, para não embaralhar o menu)
+    """
+    try:
+        estado['conn'] = _abrir_conexao()
+    except Exception as e:
+        estado['erro'] = e
+
+
+def obter_conexao(estado):
+    """
+    Retorna a conexão, abrindo-a (e criando a tabela) no primeiro uso
+
+    Parâmetros:
+        estado (dict): Resultado de criar_conexao_sob_demanda
+
+    Retorno:
+        connection: Objeto de conexão ou None se o Oracle estiver indisponível
+
+    Uma falha não fica registrada: a próxima opção que usa o banco tenta de novo
+    """
+    if estado['pronta']:
+        return estado['conn']
+
+    print("\n🔌 Conectando ao Oracle Database...")
+    if estado['aquecimento']:
+        estado['aquecimento'].join()
+        estado['aquecimento'] = None
+        if estado['erro']:
+            _exibir_erro_conexao(estado['erro'])
+            estado['erro'] = None
+        else:
+            print("✅ Conectado ao Oracle Database!")
+    else:
+        estado['conn'] = conectar_oracle()
+
+    if estado['conn']:
+        criar_tabela(estado['conn'])
+        estado['pronta'] = True
+    return estado['conn']
+
+
+def encerrar_conexao_sob_demanda(estado):
+    """
+    Fecha a conexão se ela chegou a ser aberta (inclusive pelo aquecimento)
+    """
+    if estado['aquecimento']:
+        estado['aquecimento'].join()
+        estado['aquecimento'] = None
+    if estado['conn']:
+        fechar_conexao(estado['conn'])
+        estado['conn'] = None
+
+
 # ========================================
 # OPERAÇÕES DDL (DATA DEFINITION LANGUAGE)
 # ========================================
@@ -61,6 +252,7 @@ def criar_tabela(conn):
         - perda_percentual: Percentual de perda
         - perda_toneladas: Toneladas perdidas
         - prejuizo_reais: Prejuízo em reais
+        - id_origem: Id da colheita no JSON (só nas linhas da carga em massa)
     """
     if not conn:
         return False
@@ -78,13 +270,14 @@ def criar_tabela(conn):
                 perda_percentual NUMBER(5,2) NOT NULL,
                 perda_toneladas NUMBER(10,2) NOT NULL,
                 prejuizo_reais NUMBER(12,2) NOT NULL,
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                id_origem VARCHAR2(40)
             )
         """)
         conn.commit()
         print("✅ Tabela 'colheitas_cana' criada com sucesso!")
         return True
-    except oracledb.DatabaseError as e:
+    except carregar_driver().DatabaseError as e:
         error, = e.args
         # ORA-00955: name is already used by an existing object
         if error.code == 955:
@@ -145,21 +338,7 @@ def inserir_colheita(conn, colheita):
 
     cursor = conn.cursor()
     try:
-        cursor.execute("""
-            INSERT INTO colheitas_cana
-            (fazenda, data_colheita, tipo_colheita, toneladas,
-             perda_percentual, perda_toneladas, prejuizo_reais)
-            VALUES (:fazenda, TO_DATE(:data, 'DD/MM/YYYY'), :tipo,
-                    :toneladas, :perda_perc, :perda_ton, :prejuizo)
-        """, {
-            'fazenda': colheita['fazenda'],
-            'data': colheita['data'],
-            'tipo': colheita['tipo_colheita'],
-            'toneladas': colheita['toneladas'],
-            'perda_perc': colheita['perda_percentual'],
-            'perda_ton': colheita['perda_toneladas'],
-            'prejuizo': colheita['prejuizo_reais']
-        })
+        cursor.execute(SQL_INSERCAO, _binds_insercao(colheita))
         conn.commit()
         print("✅ Colheita salva no Oracle Database!")
         return True
@@ -171,6 +350,167 @@ def inserir_colheita(conn, colheita):
         cursor.close()
 
 
+def _binds_insercao(colheita):
+    """
+    Binds do INSERT a partir do dicionário da colheita
+    """
+    return {
+        'fazenda': colheita['fazenda'],
+        'data': colheita['data'],
+        'tipo': colheita['tipo_colheita'],
+        'toneladas': colheita['toneladas'],
+        'perda_perc': colheita['perda_percentual'],
+        'perda_ton': colheita['perda_toneladas'],
+        'prejuizo': colheita['prejuizo_reais']
+    }
+
+
+def inserir_colheitas_lote(conn, colheitas, tamanho_lote=1000, progresso=None):
+    """
+    Insere muitas colheitas com DML em array, um commit por lote
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        colheitas (iterable): Colheitas (lista ou gerador)
+        tamanho_lote (int): Linhas por executemany/commit
+        progresso (function): Chamada como progresso(inseridas)
+
+    Retorno:
+        int: Quantidade inserida ou None em caso de erro (lotes já
+             confirmados continuam gravados)
+    """
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        inseridas = 0
+        lote = []
+        for colheita in colheitas:
+            lote.append(_binds_insercao(colheita))
+            if len(lote) == tamanho_lote:
+                cursor.executemany(SQL_INSERCAO, lote)
+                conn.commit()
+                inseridas += len(lote)
+                lote = []
+                if progresso:
+                    progresso(inseridas)
+        if lote:
+            cursor.executemany(SQL_INSERCAO, lote)
+            conn.commit()
+            inseridas += len(lote)
+            if progresso:
+                progresso(inseridas)
+        return inseridas
+    except Exception as e:
+        print(f"❌ Erro ao inserir em lote: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
+# ========================================
+# CARGA EM MASSA (POOL E INSERT SEM DUPLICADAS)
+# ========================================
+
+# Preparação da tabela para a carga em massa (cada passo tolera já ter sido feito)
+DDL_CARGA = (
+    # Tabelas criadas antes da coluna id_origem
+    ("ALTER TABLE colheitas_cana ADD id_origem VARCHAR2(40)", (1430,)),
+    ("CREATE UNIQUE INDEX colheitas_cana_origem_idx ON colheitas_cana (id_origem)", (955, 1408)),
+    ("""CREATE INDEX colheitas_cana_chave_idx
+            ON colheitas_cana (fazenda, data_colheita, tipo_colheita, toneladas)""", (955, 1408)),
+)
+
+
+def criar_indices_carga(conn):
+    """
+    Prepara a tabela para o NOT EXISTS da carga em massa: coluna id_origem,
+    índice único do id_origem e índice da chave natural
+
+    Retorno:
+        bool: True se criou/existe, False em caso de erro
+
+    Aplicação: sem os índices, cada linha do lote varreria a tabela inteira
+    """
+    if not conn:
+        return False
+
+    cursor = conn.cursor()
+    try:
+        for comando, ja_feito in DDL_CARGA:
+            try:
+                cursor.execute(comando)
+            except carregar_driver().DatabaseError as e:
+                error, = e.args
+                # ORA-01430: coluna já existe; ORA-00955: nome já usado;
+                # ORA-01408: colunas já indexadas por outro índice
+                if error.code not in ja_feito:
+                    print(f"❌ Erro ao preparar a tabela para a carga: {error.message}")
+                    return False
+        return True
+    finally:
+        cursor.close()
+
+
+def inserir_colheitas_sem_duplicadas(conn, binds):
+    """
+    Insere um lote com DML em array, pulando as colheitas já cadastradas
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        binds (list): Dicionários com id_origem, fazenda, data (datetime), tipo,
+                      toneladas, perda_perc, perda_ton e prejuizo
+
+    Retorno:
+        int: Linhas inseridas (o restante eram duplicadas) ou None em caso
+             de erro (lote desfeito)
+    """
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(SQL_INSERCAO_SEM_DUPLICADAS, binds)
+        inseridas = cursor.rowcount
+        conn.commit()
+        return inseridas
+    except Exception as e:
+        print(f"❌ Erro ao inserir lote sem duplicadas: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
+def criar_pool(conexoes):
+    """
+    Cria um pool com um número fixo de conexões (carga em paralelo)
+
+    Retorno:
+        pool: Pool do driver ou None se o Oracle estiver indisponível
+    """
+    try:
+        return carregar_driver().create_pool(min=conexoes, max=conexoes, increment=0, **CREDENCIAIS)
+    except Exception as e:
+        _exibir_erro_conexao(e)
+        return None
+
+
+@contextlib.contextmanager
+def conexao_do_pool(pool):
+    """
+    Empresta uma conexão do pool (com métricas e rastreio, como _abrir_conexao)
+    e a devolve ao final
+    """
+    conn = pool.acquire()
+    try:
+        yield instrumentar_conexao(rastrear_conexao(conn))
+    finally:
+        pool.release(conn)
+
+
 def atualizar_colheita(conn, id_colheita, campo, novo_valor):
     """
     Atualiza um campo específico de uma colheita
@@ -183,31 +523,79 @@ def atualizar_colheita(conn, id_colheita, campo, novo_valor):
 
     Retorno:
         bool: True se atualizou, False em caso de erro
+
+    Perda e prejuízo são recalculados quando o campo é toneladas ou tipo
+    (ver atualizar_colheitas_lote)
     """
-    if not conn:
+    resultado = atualizar_colheitas_lote(conn, [(id_colheita, campo, novo_valor)], exibir=False)
+    if resultado is None:
         return False
+    if resultado['atualizadas'] > 0:
+        print(f"✅ Colheita #{id_colheita} atualizada!")
+        return True
+    print(f"⚠️  Colheita #{id_colheita} não encontrada.")
+    return False
 
-    campos_validos = ['fazenda', 'tipo_colheita', 'toneladas']
-    if campo not in campos_validos:
-        print(f"❌ Campo inválido! Use: {', '.join(campos_validos)}")
-        return False
+
+def atualizar_colheitas_lote(conn, alteracoes, tamanho_lote=1000, exibir=True):
+    """
+    Aplica muitas alterações em uma única transação, com DML em array
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        alteracoes (list): Lista de tuplas (id, campo, valor); campos:
+                           'fazenda', 'tipo_colheita', 'toneladas'
+        tamanho_lote (int): Linhas por executemany (uma ida ao banco por lote)
+        exibir (bool): Exibe o resumo ao final
+
+    Retorno:
+        dict: {'atualizadas': int, 'nao_encontradas': [ids]} ou None em caso
+              de erro (nada é gravado: rollback da transação inteira)
+
+    Estrutura aplicada: DICIONÁRIO de LISTAS (binds agrupados por campo).
+    Alterações de toneladas e tipo da mesma colheita podem vir no mesmo lote:
+    cada UPDATE recalcula as derivadas a partir dos valores já atualizados
+    """
+    if not conn:
+        return None
+
+    binds_por_campo = {}
+    for id_colheita, campo, valor in alteracoes:
+        erro = validar_alteracao(campo, valor)
+        if erro:
+            print(f"❌ {erro} (colheita #{id_colheita})")
+            return None
+        bind = {'id': id_colheita, 'valor': valor}
+        if campo == 'toneladas':
+            bind['preco'] = PRECO_TONELADA
+        elif campo == 'tipo_colheita':
+            bind['perda'] = calcular_perda_percentual(valor)
+            bind['preco'] = PRECO_TONELADA
+        binds_por_campo.setdefault(campo, []).append(bind)
 
     cursor = conn.cursor()
     try:
-        sql = f"UPDATE colheitas_cana SET {campo} = :valor WHERE id = :id"
-        cursor.execute(sql, {'valor': novo_valor, 'id': id_colheita})
+        atualizadas = 0
+        nao_encontradas = []
+        for campo, binds in binds_por_campo.items():
+            for inicio in range(0, len(binds), tamanho_lote):
+                lote = binds[inicio:inicio + tamanho_lote]
+                cursor.executemany(SQL_ATUALIZACAO[campo], lote, arraydmlrowcounts=True)
+                for bind, linhas in zip(lote, cursor.getarraydmlrowcounts()):
+                    atualizadas += linhas
+                    if not linhas:
+                        nao_encontradas.append(bind['id'])
         conn.commit()
 
-        if cursor.rowcount > 0:
-            print(f"✅ Colheita #{id_colheita} atualizada!")
-            return True
-        else:
-            print(f"⚠️  Colheita #{id_colheita} não encontrada.")
-            return False
+        if exibir:
+            print(f"✅ {atualizadas} alterações aplicadas em {len(alteracoes)} solicitadas!")
+            if nao_encontradas:
+                print(f"⚠️  Colheitas não encontradas: {', '.join(map(str, nao_encontradas))}")
+        return {'atualizadas': atualizadas, 'nao_encontradas': nao_encontradas}
     except Exception as e:
         print(f"❌ Erro ao atualizar: {e}")
         conn.rollback()
-        return False
+        return None
     finally:
         cursor.close()
 
@@ -245,6 +633,177 @@ def deletar_colheita(conn, id_colheita):
         cursor.close()
 
 
+def deletar_colheitas_lote(conn, ids, tamanho_lote=1000, progresso=None):
+    """
+    Remove muitas colheitas por id com DML em array
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        ids (list): IDs das colheitas a remover
+        tamanho_lote (int): IDs por executemany; cada lote é uma transação,
+                            o que limita o undo/redo gerado
+        progresso (function): Chamada como progresso(removidas, total) após cada lote
+
+    Retorno:
+        int: Quantidade removida ou None em caso de erro (lotes já
+             confirmados permanecem removidos)
+    """
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    removidas = 0
+    try:
+        for inicio in range(0, len(ids), tamanho_lote):
+            lote = [{'id': id_colheita} for id_colheita in ids[inicio:inicio + tamanho_lote]]
+            cursor.executemany("DELETE FROM colheitas_cana WHERE id = :id", lote, arraydmlrowcounts=True)
+            removidas += sum(cursor.getarraydmlrowcounts())
+            conn.commit()
+            if progresso:
+                progresso(removidas, len(ids))
+        return removidas
+    except Exception as e:
+        print(f"❌ Erro ao deletar em lote: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
+def _filtro_remocao(fazenda, data_inicio, data_fim):
+    """
+    Monta o WHERE da remoção por fazenda e/ou período (datas DD/MM/AAAA, inclusivas)
+
+    Retorno:
+        tuple: (sql_where, binds)
+    """
+    condicoes, binds = [], {}
+    if fazenda:
+        condicoes.append("fazenda = :fazenda")
+        binds['fazenda'] = fazenda
+    if data_inicio:
+        condicoes.append("data_colheita >= TO_DATE(:inicio, 'DD/MM/YYYY')")
+        binds['inicio'] = data_inicio
+    if data_fim:
+        condicoes.append("data_colheita < TO_DATE(:fim, 'DD/MM/YYYY') + 1")
+        binds['fim'] = data_fim
+    return " AND ".join(condicoes), binds
+
+
+def _data_limite_particao(high_value):
+    """
+    Extrai a data do HIGH_VALUE de uma partição por faixa
+    (ex: "TO_DATE(' 2025-05-01 00:00:00', 'SYYYY-MM-DD HH24:MI:SS', ...)")
+
+    Retorno:
+        datetime: Limite superior (exclusivo) ou None se não for uma data (MAXVALUE)
+    """
+    encontrado = re.search(r"(\d{4}-\d{2}-\d{2})", high_value or '')
+    return datetime.strptime(encontrado.group(1), '%Y-%m-%d') if encontrado else None
+
+
+def _particoes_no_periodo(cursor, data_inicio, data_fim):
+    """
+    Lista as partições por data inteiramente dentro do período
+
+    Retorno:
+        list: Nomes das partições que podem ser descartadas inteiras
+              (vazia se a tabela não for particionada por data_colheita)
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM user_part_key_columns
+         WHERE name = 'COLHEITAS_CANA' AND column_name = 'DATA_COLHEITA'
+    """)
+    if cursor.fetchone()[0] == 0:
+        return []
+
+    inicio = datetime.strptime(data_inicio, '%d/%m/%Y') if data_inicio else None
+    fim = datetime.strptime(data_fim, '%d/%m/%Y') + timedelta(days=1) if data_fim else None
+
+    cursor.execute("""
+        SELECT partition_name, high_value FROM user_tab_partitions
+         WHERE table_name = 'COLHEITAS_CANA'
+         ORDER BY partition_position
+    """)
+    particoes, limite_anterior = [], None
+    for nome, high_value in cursor.fetchall():
+        limite = _data_limite_particao(high_value)
+        # A partição cobre [limite_anterior, limite): a primeira não tem limite inferior
+        cobre_inicio = inicio is None or (limite_anterior is not None and limite_anterior >= inicio)
+        cobre_fim = fim is None or (limite is not None and limite <= fim)
+        if cobre_inicio and cobre_fim:
+            particoes.append(nome)
+        limite_anterior = limite
+    return particoes
+
+
+def deletar_colheitas_filtro(conn, fazenda=None, data_inicio=None, data_fim=None,
+                             tamanho_lote=10000, progresso=None, descartar_particoes=True):
+    """
+    Remove colheitas por fazenda e/ou período, em blocos
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        fazenda (str): Nome exato da fazenda (None = todas)
+        data_inicio (str): Data inicial DD/MM/AAAA, inclusiva (None = sem limite)
+        data_fim (str): Data final DD/MM/AAAA, inclusiva (None = sem limite)
+        tamanho_lote (int): Linhas por DELETE/commit (limita undo/redo)
+        progresso (function): Chamada como progresso(removidas, total)
+        descartar_particoes (bool): Com tabela particionada por data e sem filtro
+                                    de fazenda, partições inteiras do período são
+                                    descartadas (DROP PARTITION) em vez de apagadas
+                                    linha a linha
+
+    Retorno:
+        int: Quantidade removida ou None em caso de erro
+    """
+    if not conn:
+        return None
+    if not (fazenda or data_inicio or data_fim):
+        print("❌ Informe fazenda e/ou período para a remoção em lote.")
+        return None
+
+    where, binds = _filtro_remocao(fazenda, data_inicio, data_fim)
+    cursor = conn.cursor()
+    removidas = 0
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM colheitas_cana WHERE {where}", binds)
+        total = cursor.fetchone()[0]
+
+        if descartar_particoes and not fazenda:
+            for particao in _particoes_no_periodo(cursor, data_inicio, data_fim):
+                cursor.execute(f'SELECT COUNT(*) FROM colheitas_cana PARTITION ("{particao}")')
+                linhas = cursor.fetchone()[0]
+                try:
+                    cursor.execute(f'ALTER TABLE colheitas_cana DROP PARTITION "{particao}" UPDATE GLOBAL INDEXES')
+                except carregar_driver().DatabaseError as e:
+                    # ORA-14758: última partição de faixa em tabela com intervalo;
+                    # as linhas dela são apagadas pelos blocos abaixo
+                    print(f"⚠️  Partição {particao} não descartada: {e}")
+                    continue
+                removidas += linhas
+                if progresso:
+                    progresso(removidas, total)
+
+        # Restante (bordas do período ou filtro por fazenda): blocos de ROWNUM
+        binds['limite'] = tamanho_lote
+        while True:
+            cursor.execute(f"DELETE FROM colheitas_cana WHERE {where} AND ROWNUM <= :limite", binds)
+            removidas += cursor.rowcount
+            conn.commit()
+            if progresso and cursor.rowcount:
+                progresso(removidas, total)
+            if cursor.rowcount < tamanho_lote:
+                break
+        return removidas
+    except Exception as e:
+        print(f"❌ Erro ao deletar em lote: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
 # ========================================
 # OPERAÇÕES DE CONSULTA (SELECT)
 # ========================================
@@ -282,6 +841,110 @@ def listar_todas_colheitas(conn):
         cursor.close()
 
 
+def listar_colheitas_pagina(conn, limite=100, deslocamento=0):
+    """
+    Lista uma página das colheitas (ordem de cadastro, como o JSON) e o total
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        limite (int): Colheitas por página
+        deslocamento (int): Colheitas a pular
+
+    Retorno:
+        tuple: (total, lista de tuplas da página) ou None em caso de erro
+
+    Aplicação: só a página atravessa a rede (painéis e API), não a tabela inteira
+    """
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM colheitas_cana")
+        total = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT id, fazenda, TO_CHAR(data_colheita, 'DD/MM/YYYY'),
+                   tipo_colheita, toneladas, perda_percentual,
+                   perda_toneladas, prejuizo_reais
+            FROM colheitas_cana
+            ORDER BY id
+            OFFSET :deslocamento ROWS FETCH NEXT :limite ROWS ONLY
+        """, {'deslocamento': deslocamento, 'limite': limite})
+        return (total, cursor.fetchall())
+    except Exception as e:
+        print(f"❌ Erro ao listar colheitas: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def buscar_lotes_colheitas(conn, tamanho_lote=50000, data_inicio=None, data_fim=None):
+    """
+    Lê as colheitas do Oracle em lotes de tuplas (gerador), para exportação
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        tamanho_lote (int): Linhas por lote (arraysize e prefetch do cursor)
+        data_inicio (str): Data inicial DD/MM/AAAA, inclusiva (None = sem limite)
+        data_fim (str): Data final DD/MM/AAAA, inclusiva (None = sem limite)
+
+    Retorno:
+        generator: Listas de tuplas (id, fazenda, data DD/MM/AAAA, tipo,
+                   toneladas, perda_percentual, perda_toneladas, prejuizo_reais)
+
+    Aplicação: uma ida e volta por lote e memória limitada a um lote; a data
+    já chega formatada (TO_CHAR no servidor), pronta para o CSV
+    """
+    if not conn:
+        return
+
+    where, binds = _filtro_remocao(None, data_inicio, data_fim)
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = tamanho_lote
+        cursor.prefetchrows = tamanho_lote + 1
+        cursor.execute(f"""
+            SELECT id, fazenda, TO_CHAR(data_colheita, 'DD/MM/YYYY'),
+                   tipo_colheita, toneladas, perda_percentual,
+                   perda_toneladas, prejuizo_reais
+            FROM colheitas_cana
+            {'WHERE ' + where if where else ''}
+        """, binds)
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield linhas
+    finally:
+        cursor.close()
+
+
+def listar_meses_colheitas(conn, data_inicio=None, data_fim=None):
+    """
+    Meses (AAAA-MM) que têm colheitas no Oracle, em ordem
+
+    Retorno:
+        list: Meses no período
+
+    Aplicação: erros do banco são propagados (como em buscar_lotes_colheitas);
+    uma lista vazia faria a exportação terminar "com sucesso" sem partições
+    """
+    if not conn:
+        return []
+
+    where, binds = _filtro_remocao(None, data_inicio, data_fim)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT DISTINCT TO_CHAR(data_colheita, 'YYYY-MM') FROM colheitas_cana
+            {'WHERE ' + where if where else ''}
+            ORDER BY 1
+        """, binds)
+        return [linha[0] for linha in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
 def buscar_colheita_por_id(conn, id_colheita):
     """
     Busca uma colheita específica por ID
@@ -360,12 +1023,13 @@ def buscar_colheitas_por_fazenda(conn, nome_fazenda):
         nome_fazenda (str): Nome da fazenda (busca parcial)
 
     Retorno:
-        list: Lista de tuplas com colheitas da fazenda
+        list: Lista de tuplas com colheitas da fazenda, ou None em caso de
+              erro (lista vazia = nenhuma encontrada)
 
     Estrutura aplicada: LISTA de TUPLAS
     """
     if not conn:
-        return []
+        return None
 
     cursor = conn.cursor()
     try:
@@ -381,7 +1045,7 @@ def buscar_colheitas_por_fazenda(conn, nome_fazenda):
         return resultados
     except Exception as e:
         print(f"❌ Erro ao buscar colheitas por fazenda: {e}")
-        return []
+        return None
     finally:
         cursor.close()
 
@@ -450,52 +1114,314 @@ def obter_comparativo_tipos_oracle(conn):
 
     cursor = conn.cursor()
     try:
-        # Dados colheita manual
+        # Uma única consulta agrupada para todos os tipos
         cursor.execute("""
             SELECT
+                tipo_colheita,
                 COUNT(*) as quantidade,
                 SUM(toneladas) as total_toneladas,
                 SUM(perda_toneladas) as total_perda,
                 SUM(prejuizo_reais) as total_prejuizo
             FROM colheitas_cana
-            WHERE tipo_colheita = 'manual'
+            GROUP BY tipo_colheita
         """)
-        resultado_manual = cursor.fetchone()
 
-        manual = {
-            'quantidade': resultado_manual[0] or 0,
-            'total_toneladas': resultado_manual[1] or 0,
-            'total_perda': resultado_manual[2] or 0,
-            'total_prejuizo': resultado_manual[3] or 0
-        }
+        por_tipo = {}
+        for tipo, quantidade, total_ton, total_perda, total_prejuizo in cursor:
+            por_tipo[tipo] = {
+                'quantidade': quantidade or 0,
+                'total_toneladas': total_ton or 0,
+                'total_perda': total_perda or 0,
+                'total_prejuizo': total_prejuizo or 0
+            }
+
+        vazio = {'quantidade': 0, 'total_toneladas': 0, 'total_perda': 0, 'total_prejuizo': 0}
+        manual = por_tipo.get('manual', dict(vazio))
+        mecanica = por_tipo.get('mecanica', dict(vazio))
+
+        return (manual, mecanica)  # Retorna TUPLA de DICIONÁRIOS
+    except Exception as e:
+        print(f"❌ Erro ao obter comparativo: {e}")
+        return ({}, {})
+    finally:
+        cursor.close()
+
+
+def obter_agrupamento_tipos_oracle(conn):
+    """
+    Agrupamento por tipo calculado no Oracle (um GROUP BY, uma linha por tipo)
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+
+    Retorno:
+        dict: Mesmo formato de agrupar_colheitas(colheitas, ('tipo_colheita',)),
+              ou None em caso de erro (tabela vazia = {})
+
+    Aplicação: estatísticas e comparativo do Oracle usam os mesmos
+    procedimentos de exibição do JSON sem trazer as linhas para o cliente
+    """
+    if not conn:
+        return None
 
-        # Dados colheita mecânica
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT tipo_colheita, COUNT(*),
+                   {', '.join(f'SUM({m}), MIN({m}), MAX({m})' for m in METRICAS)}
+            FROM colheitas_cana
+            GROUP BY tipo_colheita
+        """)
+        por_tipo = {}
+        for tipo, quantidade, *valores in cursor:
+            grupo = {'quantidade': quantidade}
+            for posicao, metrica in enumerate(METRICAS):
+                soma, minimo, maximo = valores[3 * posicao:3 * posicao + 3]
+                grupo[metrica] = {'soma': soma, 'media': soma / quantidade,
+                                  'minimo': minimo, 'maximo': maximo}
+            por_tipo[(tipo,)] = grupo
+        return por_tipo
+    except Exception as e:
+        print(f"❌ Erro ao agrupar por tipo no Oracle: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def obter_top_fazendas_oracle(conn, k=5, criterio='prejuizo_reais', tamanho_lote=1000):
+    """
+    Ranking das K fazendas que mais perdem, lido do Oracle em lotes
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        k (int): Tamanho do ranking
+        criterio (str): 'prejuizo_reais', 'perda_toneladas' ou 'razao_perda'
+        tamanho_lote (int): Linhas buscadas por ida ao servidor (fetchmany)
+
+    Retorno:
+        list: K dicionários de totais por fazenda, do pior para o melhor
+
+    Memória: O(K) no cliente; os totais por fazenda chegam do GROUP BY
+    e passam por um heap de tamanho K, um lote por vez
+    """
+    if not conn:
+        return []
+
+    if criterio not in CRITERIOS_RANKING:
+        print(f"❌ Critério inválido! Use: {', '.join(CRITERIOS_RANKING)}")
+        return []
+
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = tamanho_lote
         cursor.execute("""
             SELECT
+                fazenda,
                 COUNT(*) as quantidade,
                 SUM(toneladas) as total_toneladas,
                 SUM(perda_toneladas) as total_perda,
                 SUM(prejuizo_reais) as total_prejuizo
             FROM colheitas_cana
-            WHERE tipo_colheita = 'mecanica'
+            GROUP BY fazenda
         """)
-        resultado_mecanica = cursor.fetchone()
 
-        mecanica = {
-            'quantidade': resultado_mecanica[0] or 0,
-            'total_toneladas': resultado_mecanica[1] or 0,
-            'total_perda': resultado_mecanica[2] or 0,
-            'total_prejuizo': resultado_mecanica[3] or 0
-        }
-
-        return (manual, mecanica)  # Retorna TUPLA de DICIONÁRIOS
+        def fluxo_fazendas():
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                for fazenda, quantidade, toneladas, perda, prejuizo in linhas:
+                    toneladas = toneladas or 0
+                    perda = perda or 0
+                    yield {
+                        'fazenda': fazenda,
+                        'quantidade': quantidade,
+                        'toneladas': toneladas,
+                        'perda_toneladas': perda,
+                        'prejuizo_reais': prejuizo or 0,
+                        'razao_perda': perda / toneladas if toneladas else 0.0
+                    }
+
+        return top_k(fluxo_fazendas(), k, lambda t: t[criterio])
     except Exception as e:
-        print(f"❌ Erro ao obter comparativo: {e}")
-        return ({}, {})
+        print(f"❌ Erro ao obter ranking de fazendas: {e}")
+        return []
     finally:
         cursor.close()
 
 
+# ========================================
+# LEITURA COLUNAR EM LOTES (ANÁLISE)
+# ========================================
+
+# Colunas lidas para análise: data nativa (DATE), sem TO_CHAR no servidor
+SQL_COLUNAS_ANALISE = """
+    SELECT fazenda, data_colheita, tipo_colheita,
+           toneladas, perda_percentual, perda_toneladas, prejuizo_reais
+    FROM colheitas_cana
+"""
+
+METRICAS_ANALISE = ('toneladas', 'perda_percentual', 'perda_toneladas', 'prejuizo_reais')
+
+
+def _carregar_pyarrow():
+    """
+    Importa pyarrow se estiver instalado (dependência opcional)
+
+    Retorno:
+        module: pyarrow.compute ou None
+    """
+    try:
+        import pyarrow.compute
+        return pyarrow.compute
+    except ImportError:
+        return None
+
+
+def _buffer_arrow(coluna, codigo):
+    """
+    Visão tipada (sem cópia) do buffer de valores de uma coluna Arrow sem nulos
+
+    Parâmetros:
+        coluna: pyarrow.Array de largura fixa
+        codigo (str): Código do módulo array ('d', 'i', 'I', 'B')
+
+    Retorno:
+        memoryview: Valores da coluna
+    """
+    tamanho = array(codigo).itemsize
+    dados = memoryview(coluna.buffers()[1]).cast('B')
+    return dados[coluna.offset * tamanho:(coluna.offset + len(coluna)) * tamanho].cast(codigo)
+
+
+def _lote_arrow(pc, tabela):
+    """
+    Converte um lote Arrow no formato colunar de colunar.py, sem objetos por linha
+
+    Retorno:
+        dict: {'linhas', 'fazendas', 'tipos', 'colunas': {nome: memoryview}}
+    """
+    import pyarrow as pa
+
+    coluna = lambda nome: tabela.column(nome.upper()).combine_chunks()
+    datas = coluna('data_colheita')
+    aaaammdd = pc.add(pc.add(pc.multiply(pc.year(datas), 10000), pc.multiply(pc.month(datas), 100)),
+                      pc.day(datas))
+    fazendas = pc.dictionary_encode(coluna('fazenda'))
+
+    colunas = {
+        'data': _buffer_arrow(pc.cast(aaaammdd, pa.int32()), 'i'),
+        'fazenda': _buffer_arrow(pc.cast(fazendas.indices, pa.uint32()), 'I'),
+        'tipo_colheita': _buffer_arrow(pc.cast(pc.equal(coluna('tipo_colheita'), TIPOS[1]), pa.uint8()), 'B'),
+    }
+    for metrica in METRICAS_ANALISE:
+        colunas[metrica] = _buffer_arrow(pc.cast(coluna(metrica), pa.float64()), 'd')
+    return {'linhas': tabela.num_rows, 'fazendas': fazendas.dictionary.to_pylist(),
+            'tipos': TIPOS, 'colunas': colunas}
+
+
+def _tratar_saida_numerica(cursor, metadados):
+    """
+    Output type handler: NUMBER chega como float (BINARY_DOUBLE), sem Decimal/int
+    """
+    driver = carregar_driver()
+    if metadados.type_code is driver.DB_TYPE_NUMBER:
+        return cursor.var(driver.DB_TYPE_BINARY_DOUBLE, arraysize=cursor.arraysize)
+
+
+def _lote_transposto(linhas):
+    """
+    Transpõe um lote de fetchmany para arrays tipados (caminho sem pyarrow)
+
+    Retorno:
+        dict: {'linhas', 'fazendas', 'tipos', 'colunas': {nome: array}}
+    """
+    codigos = {}
+    colunas = {
+        'fazenda': array('I', (codigos.setdefault(linha[0], len(codigos)) for linha in linhas)),
+        'data': array('i', (d.year * 10000 + d.month * 100 + d.day for d in (linha[1] for linha in linhas))),
+        'tipo_colheita': array('B', (linha[2] == TIPOS[1] for linha in linhas)),
+    }
+    for posicao, metrica in enumerate(METRICAS_ANALISE, start=3):
+        colunas[metrica] = array('d', (linha[posicao] for linha in linhas))
+    return {'linhas': len(linhas), 'fazendas': list(codigos), 'tipos': TIPOS, 'colunas': colunas}
+
+
+def buscar_lotes_colunares(conn, tamanho_lote=100000):
+    """
+    Lê as colheitas do Oracle em lotes colunares (gerador)
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        tamanho_lote (int): Linhas por lote
+
+    Retorno:
+        generator: Lotes no formato de colunar.abrir_colunar
+                   ({'linhas', 'fazendas', 'tipos', 'colunas'})
+
+    Aplicação: com pyarrow instalado usa conn.fetch_df_batches (Arrow) e as
+    colunas são visões dos buffers Arrow; sem pyarrow, um output type handler
+    traz números como float e cada lote é transposto para array('d')
+    """
+    if not conn:
+        return
+
+    pc = _carregar_pyarrow()
+    if pc is not None and hasattr(conn, 'fetch_df_batches'):
+        import pyarrow as pa
+        for df in conn.fetch_df_batches(statement=SQL_COLUNAS_ANALISE, size=tamanho_lote):
+            tabela = pa.Table.from_arrays(df.column_arrays(), names=df.column_names())
+            if tabela.num_rows:
+                yield _lote_arrow(pc, tabela)
+        return
+
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = min(tamanho_lote, 10000)
+        cursor.outputtypehandler = _tratar_saida_numerica
+        cursor.execute(SQL_COLUNAS_ANALISE)
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield _lote_transposto(linhas)
+    finally:
+        cursor.close()
+
+
+def agrupar_colheitas_oracle(conn, dimensoes=('tipo_colheita',), tamanho_lote=100000):
+    """
+    Agrupa as colheitas do Oracle no motor local, lote a lote
+
+    Parâmetros:
+        conn: Objeto de conexão Oracle
+        dimensoes (tuple): Dimensões ('fazenda', 'mes', 'safra', 'tipo_colheita')
+        tamanho_lote (int): Linhas por lote
+
+    Retorno:
+        dict: Mesmo formato de agrupar_colheitas, ou None em caso de erro
+              (tabela vazia = {})
+
+    Aplicação: cada lote colunar vai direto para agrupar_colunar; só os
+    agrupamentos parciais (pequenos) são mesclados. Para totais que o banco
+    calcula com um GROUP BY (ex: por tipo) use obter_agrupamento_tipos_oracle:
+    esta leitura traz todas as linhas e fica para as análises por fazenda,
+    mês e safra combinadas
+    """
+    for dimensao in dimensoes:
+        if dimensao not in DIMENSOES:
+            raise ValueError(f"Dimensão inválida: {dimensao}. Use: {', '.join(DIMENSOES)}")
+
+    agrupamento = {}
+    try:
+        for lote in buscar_lotes_colunares(conn, tamanho_lote):
+            agrupamento = mesclar_agrupamentos(agrupamento, agrupar_colunar(lote, dimensoes))
+        return agrupamento
+    except Exception as e:
+        print(f"❌ Erro ao agrupar colheitas do Oracle: {e}")
+        return None
+
+
 # ========================================
 # FUNÇÃO DE FECHAMENTO
 # ========================================
@@ -516,3 +1442,12 @@ def fechar_conexao(conn):
             print("✅ Conexão com Oracle encerrada.")
         except Exception as e:
             print(f"❌ Erro ao fechar conexão: {e}")
+
+
+# ========================================
+# INSTRUMENTAÇÃO (AGROTECH_METRICAS=1)
+# ========================================
+
+# Mede latência, idas e voltas e linhas de cada operação pública (e da abertura
+# da conexão, inclusive a do aquecimento). Desligada, nada é embrulhado
+instrumentar_modulo(globals(), __name__, extras=('_abrir_conexao',))
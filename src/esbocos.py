@@ -0,0 +1,357 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: esbocos.py
+Descrição: Estatísticas aproximadas com esboços mescláveis
+           (KLL para quantis e HyperLogLog para contagem de fazendas distintas)
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+
+from armazenamento import identidade_apos_gravacao, identidade_dados
+
+# Arquivo dos esboços: fica ao lado de dados_colheitas.json
+ARQUIVO_ESBOCOS = 'esbocos_colheitas.json'
+VERSAO_ESBOCOS = 2
+
+# Parâmetros padrão (precisão x memória)
+K_PADRAO = 200          # KLL: erro de rank ~1,3%
+PRECISAO_HLL = 12       # HLL: 4096 registradores, erro padrão ~1,6%
+
+# Métricas com quantis aproximados
+METRICAS_QUANTIS = ('toneladas', 'prejuizo_reais')
+
+
+# ========================================
+# ESBOÇO KLL (QUANTIS)
+# ========================================
+
+def criar_kll(k=K_PADRAO):
+    """
+    Cria um esboço KLL vazio
+
+    Parâmetros:
+        k (int): Parâmetro de precisão (maior = mais preciso e mais memória)
+
+    Retorno:
+        dict: {'k', 'n', 'niveis': [[...], ...]}
+
+    Estrutura aplicada: DICIONÁRIO com LISTA de LISTAS (um nível por peso 2^h)
+    """
+    return {'k': k, 'n': 0, 'niveis': [[]]}
+
+
+def _capacidade_kll(k, altura, nivel):
+    """
+    Capacidade de um nível: decai 2/3 a cada nível abaixo do topo
+    """
+    return max(2, int(k * (2 / 3) ** (altura - 1 - nivel)))
+
+
+def _compactar_kll(esboco):
+    """
+    Compacta níveis cheios, promovendo metade dos itens ao nível seguinte
+    """
+    k = esboco['k']
+    niveis = esboco['niveis']
+    while True:
+        altura = len(niveis)
+        capacidade_total = sum(_capacidade_kll(k, altura, h) for h in range(altura))
+        if sum(len(nivel) for nivel in niveis) <= capacidade_total:
+            return
+
+        for h in range(altura):
+            if len(niveis[h]) > _capacidade_kll(k, altura, h):
+                itens = sorted(niveis[h])
+                sobra = [itens.pop()] if len(itens) % 2 else []
+                deslocamento = random.getrandbits(1)
+                if h + 1 == len(niveis):
+                    niveis.append([])
+                niveis[h + 1].extend(itens[deslocamento::2])
+                niveis[h] = sobra
+                break
+
+
+def inserir_kll(esboco, valor):
+    """
+    Insere um valor no esboço KLL (atualização incremental)
+    """
+    esboco['n'] += 1
+    esboco['niveis'][0].append(valor)
+    if len(esboco['niveis'][0]) > _capacidade_kll(esboco['k'], len(esboco['niveis']), 0):
+        _compactar_kll(esboco)
+
+
+def mesclar_kll(a, b):
+    """
+    Mescla dois esboços KLL (ex: de fragmentos diferentes)
+
+    Retorno:
+        dict: Novo esboço equivalente a ter inserido os dois fluxos
+    """
+    k = min(a['k'], b['k'])
+    altura = max(len(a['niveis']), len(b['niveis']))
+    niveis = [[] for _ in range(altura)]
+    for esboco in (a, b):
+        for h, nivel in enumerate(esboco['niveis']):
+            niveis[h].extend(nivel)
+    mesclado = {'k': k, 'n': a['n'] + b['n'], 'niveis': niveis}
+    _compactar_kll(mesclado)
+    return mesclado
+
+
+def quantil_kll(esboco, q):
+    """
+    Estima o quantil q (0.0 a 1.0) a partir do esboço
+
+    Retorno:
+        float: Valor aproximado do quantil ou None se o esboço estiver vazio
+    """
+    pesados = []
+    for h, nivel in enumerate(esboco['niveis']):
+        peso = 1 << h
+        pesados.extend((valor, peso) for valor in nivel)
+    if not pesados:
+        return None
+
+    pesados.sort()
+    total = sum(peso for _, peso in pesados)
+    alvo = q * total
+    acumulado = 0
+    for valor, peso in pesados:
+        acumulado += peso
+        if acumulado >= alvo:
+            return valor
+    return pesados[-1][0]
+
+
+def erro_rank_kll(k=K_PADRAO):
+    """
+    Erro de rank normalizado do KLL (confiança de 99%, fórmula empírica do Apache DataSketches)
+
+    Retorno:
+        float: Erro como fração (ex: 0.013 = ±1,3% de rank)
+    """
+    return 2.296 / k ** 0.9723
+
+
+# ========================================
+# ESBOÇO HYPERLOGLOG (VALORES DISTINTOS)
+# ========================================
+
+def criar_hll(precisao=PRECISAO_HLL):
+    """
+    Cria um esboço HyperLogLog vazio
+
+    Parâmetros:
+        precisao (int): p, com 2^p registradores
+
+    Retorno:
+        dict: {'p', 'registradores': [0, 0, ...]}
+    """
+    return {'p': precisao, 'registradores': [0] * (1 << precisao)}
+
+
+def inserir_hll(esboco, valor):
+    """
+    Insere um valor (ex: nome da fazenda) no esboço HLL
+
+    Hash estável entre processos (blake2b), necessário para mesclar fragmentos
+    """
+    p = esboco['p']
+    h = int.from_bytes(hashlib.blake2b(valor.encode('utf-8'), digest_size=8).digest(), 'big')
+    indice = h >> (64 - p)
+    resto = h & ((1 << (64 - p)) - 1)
+    rho = (64 - p) - resto.bit_length() + 1
+    if rho > esboco['registradores'][indice]:
+        esboco['registradores'][indice] = rho
+
+
+def mesclar_hll(a, b):
+    """
+    Mescla dois esboços HLL de mesma precisão (máximo registrador a registrador)
+    """
+    if a['p'] != b['p']:
+        raise ValueError("Esboços HLL com precisões diferentes não podem ser mesclados")
+    return {'p': a['p'], 'registradores': [max(x, y) for x, y in zip(a['registradores'], b['registradores'])]}
+
+
+def estimar_hll(esboco):
+    """
+    Estima a quantidade de valores distintos
+
+    Retorno:
+        float: Cardinalidade estimada
+    """
+    registradores = esboco['registradores']
+    m = len(registradores)
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / sum(2.0 ** -r for r in registradores)
+
+    # Correção para cardinalidades pequenas (contagem linear)
+    zeros = registradores.count(0)
+    if estimativa <= 2.5 * m and zeros:
+        estimativa = m * math.log(m / zeros)
+    return estimativa
+
+
+def erro_padrao_hll(precisao=PRECISAO_HLL):
+    """
+    Erro padrão relativo do HLL: 1,04 / sqrt(2^p)
+    """
+    return 1.04 / math.sqrt(1 << precisao)
+
+
+# ========================================
+# CONJUNTO DE ESBOÇOS DAS COLHEITAS
+# ========================================
+
+def criar_esbocos():
+    """
+    Cria o conjunto de esboços mantido pelo sistema
+
+    Retorno:
+        dict: KLL por métrica + HLL de fazendas + contagem de registros
+    """
+    esbocos = {'versao': VERSAO_ESBOCOS, 'registros': 0, 'fazendas': criar_hll()}
+    for metrica in METRICAS_QUANTIS:
+        esbocos[metrica] = criar_kll()
+    return esbocos
+
+
+def atualizar_esbocos(esbocos, colheitas):
+    """
+    Insere colheitas novas nos esboços (cadastro ou importação em lote)
+
+    Parâmetros:
+        esbocos (dict): Conjunto de esboços (modificado no lugar)
+        colheitas (list): Colheitas novas
+
+    Retorno:
+        dict: O próprio conjunto atualizado
+    """
+    for colheita in colheitas:
+        inserir_hll(esbocos['fazendas'], colheita['fazenda'])
+        for metrica in METRICAS_QUANTIS:
+            inserir_kll(esbocos[metrica], colheita[metrica])
+    esbocos['registros'] += len(colheitas)
+    return esbocos
+
+
+def mesclar_esbocos(a, b):
+    """
+    Mescla dois conjuntos de esboços (ex: fragmentos ou usinas diferentes)
+    """
+    mesclado = {
+        'versao': VERSAO_ESBOCOS,
+        'registros': a['registros'] + b['registros'],
+        'fazendas': mesclar_hll(a['fazendas'], b['fazendas']),
+    }
+    for metrica in METRICAS_QUANTIS:
+        mesclado[metrica] = mesclar_kll(a[metrica], b[metrica])
+    return mesclado
+
+
+def resumir_esbocos(esbocos, quantis=(0.5, 0.9, 0.99)):
+    """
+    Gera o resumo aproximado com os limites de erro declarados
+
+    Retorno:
+        dict: {'registros', 'fazendas_distintas', 'erro_fazendas',
+               'quantis': {metrica: {q: valor}}, 'erro_rank'}
+    """
+    return {
+        'registros': esbocos['registros'],
+        'fazendas_distintas': estimar_hll(esbocos['fazendas']),
+        'erro_fazendas': erro_padrao_hll(esbocos['fazendas']['p']),
+        'quantis': {
+            metrica: {q: quantil_kll(esbocos[metrica], q) for q in quantis}
+            for metrica in METRICAS_QUANTIS
+        },
+        'erro_rank': erro_rank_kll(min(esbocos[m]['k'] for m in METRICAS_QUANTIS)),
+    }
+
+
+# ========================================
+# PERSISTÊNCIA DOS ESBOÇOS
+# ========================================
+
+def caminho_esbocos(caminho_dados='dados_colheitas.json'):
+    """
+    Retorna o caminho dos esboços ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), ARQUIVO_ESBOCOS)
+
+
+def salvar_esbocos(esbocos, caminho_dados='dados_colheitas.json', identidade=None):
+    """
+    Salva os esboços em JSON compacto
+
+    Parâmetros:
+        esbocos (dict): Conjunto de esboços
+        caminho_dados (str): Caminho de dados_colheitas.json
+        identidade (list): Identidade dos dados de onde os esboços saíram (None =
+                           acabaram de receber a última gravação deste processo)
+
+    Retorno:
+        bool: True se salvou, False em caso de erro
+
+    Aplicação: mesma regra do cubo (salvar_cubo)
+    """
+    if identidade is None:
+        identidade = identidade_apos_gravacao(esbocos.get('identidade'), caminho_dados)
+    esbocos['identidade'] = identidade
+    try:
+        with open(caminho_esbocos(caminho_dados), 'w', encoding='utf-8') as arquivo:
+            json.dump(esbocos, arquivo, separators=(',', ':'))
+        return True
+    except Exception as e:
+        print(f"❌ Erro ao salvar esboços: {e}")
+        return False
+
+
+def carregar_esbocos(colheitas, caminho_dados='dados_colheitas.json', identidade=None):
+    """
+    Carrega os esboços salvos, reconstruindo-os se ausentes ou desatualizados
+
+    Parâmetros:
+        colheitas (list): Registros atuais (usados só se for preciso reconstruir)
+        caminho_dados (str): Caminho de dados_colheitas.json
+        identidade (list): Identidade tirada ANTES de ler os registros (None = atual)
+
+    Retorno:
+        dict: Conjunto de esboços válido para os registros atuais
+
+    Validação: a mesma do cubo (identidade do arquivo base e do diário); só a
+    contagem não basta, porque uma atualização mantém o número de registros
+    """
+    try:
+        with open(caminho_esbocos(caminho_dados), 'r', encoding='utf-8') as arquivo:
+            esbocos = json.load(arquivo)
+        if (esbocos.get('versao') == VERSAO_ESBOCOS and esbocos.get('registros') == len(colheitas) and
+                esbocos.get('identidade') == identidade_dados(caminho_dados)):
+            return esbocos
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    esbocos = atualizar_esbocos(criar_esbocos(), colheitas)
+    if identidade is None:
+        identidade = identidade_dados(caminho_dados)
+    salvar_esbocos(esbocos, caminho_dados, identidade)
+    return esbocos
+
+
+def descartar_esbocos(caminho_dados='dados_colheitas.json'):
+    """
+    Apaga os esboços salvos após atualização ou remoção de colheitas
+
+    KLL e HLL não aceitam retirar valores: o próximo carregar_esbocos
+    reconstrói o conjunto a partir dos registros atuais
+    """
+    try:
+        os.remove(caminho_esbocos(caminho_dados))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,128 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: estresse_armazenamento.py
+Descrição: Teste de estresse do armazenamento JSON com vários escritores
+           simultâneos e um leitor sem trava
+
+Uso: python estresse_armazenamento.py [escritores] [gravacoes_por_escritor]
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from armazenamento import acrescentar_colheitas, ler_colheitas
+from funcoes import calcular_perda_percentual, calcular_prejuizo
+
+
+def _colheita_operador(operador, numero):
+    """
+    Colheita identificável pelo operador e número da gravação
+    """
+    tipo = 'manual' if numero % 2 else 'mecanica'
+    toneladas = 100.0 + numero
+    perda_ton, prejuizo = calcular_prejuizo(toneladas, calcular_perda_percentual(tipo))
+    return {
+        'fazenda': f"Operador {operador:02d}",
+        'data': f"{numero % 28 + 1:02d}/05/2025",
+        'tipo_colheita': tipo,
+        'toneladas': toneladas,
+        'perda_percentual': calcular_perda_percentual(tipo),
+        'perda_toneladas': perda_ton,
+        'prejuizo_reais': prejuizo,
+    }
+
+
+def _escritor(caminho, operador, gravacoes, largada):
+    """
+    Processo escritor: grava uma colheita por vez, como um operador no menu
+    """
+    largada.wait()
+    for numero in range(gravacoes):
+        acrescentar_colheitas([_colheita_operador(operador, numero)], caminho)
+
+
+def _leitor(caminho, parar, resultado):
+    """
+    Processo leitor: lê sem trava em laço e confere que cada leitura é íntegra
+    """
+    leituras = falhas = 0
+    while not parar.is_set():
+        try:
+            ler_colheitas(caminho)
+            leituras += 1
+        except json.JSONDecodeError:
+            falhas += 1
+    resultado.put((leituras, falhas))
+
+
+def executar_estresse(escritores=8, gravacoes=200):
+    """
+    Dispara os escritores em paralelo e verifica que nenhuma colheita se perdeu
+
+    Retorno:
+        dict: {'gravacoes', 'segundos', 'gravacoes_por_segundo', 'perdidas',
+               'leituras', 'leituras_corrompidas'}
+    """
+    diretorio = tempfile.mkdtemp(prefix='agrotech_estresse_')
+    caminho = os.path.join(diretorio, 'dados_colheitas.json')
+    try:
+        largada = multiprocessing.Event()
+        parar = multiprocessing.Event()
+        resultado_leitor = multiprocessing.Queue()
+
+        processos = [multiprocessing.Process(target=_escritor, args=(caminho, operador, gravacoes, largada))
+                     for operador in range(escritores)]
+        leitor = multiprocessing.Process(target=_leitor, args=(caminho, parar, resultado_leitor))
+        for processo in processos:
+            processo.start()
+        leitor.start()
+
+        inicio = time.perf_counter()
+        largada.set()
+        for processo in processos:
+            processo.join()
+        segundos = time.perf_counter() - inicio
+
+        parar.set()
+        leituras, falhas = resultado_leitor.get()
+        leitor.join()
+
+        gravadas = ler_colheitas(caminho)
+        esperadas = {(f"Operador {o:02d}", 100.0 + n) for o in range(escritores) for n in range(gravacoes)}
+        encontradas = {(c['fazenda'], c['toneladas']) for c in gravadas}
+        total = escritores * gravacoes
+        return {
+            'gravacoes': total,
+            'segundos': segundos,
+            'gravacoes_por_segundo': total / segundos,
+            'perdidas': len(esperadas - encontradas),
+            'duplicadas': len(gravadas) - len(encontradas),
+            'leituras': leituras,
+            'leituras_corrompidas': falhas,
+        }
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    escritores = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    gravacoes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print("="*60)
+    print(f"🔒 ESTRESSE DO ARMAZENAMENTO ({escritores} escritores x {gravacoes} gravações)")
+    print("="*60)
+    r = executar_estresse(escritores, gravacoes)
+    print(f"Gravações:              {r['gravacoes']}")
+    print(f"Tempo total:            {r['segundos']:.2f} s")
+    print(f"Vazão:                  {r['gravacoes_por_segundo']:.1f} gravações/s")
+    print(f"Colheitas perdidas:     {r['perdidas']}")
+    print(f"Colheitas duplicadas:   {r['duplicadas']}")
+    print(f"Leituras sem trava:     {r['leituras']} ({r['leituras_corrompidas']} corrompidas)")
+    print("="*60)
+    print("✅ Nenhuma colheita perdida!" if r['perdidas'] == 0 and r['leituras_corrompidas'] == 0
+          else "❌ Inconsistência detectada!")
@@ -0,0 +1,367 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: exportacao.py
+Descrição: Exportação em fluxo das colheitas (Oracle ou JSON) para CSV, CSV
+           comprimido (gzip ou zstd) e formato colunar, lote a lote, com
+           partições por mês ou safra exportadas em paralelo
+"""
+
+import calendar
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from operator import itemgetter
+
+from analises import obter_mes, obter_safra
+from colunar import (CABECALHO, COLUNAS, MAGIC, TIPOS, VERSAO_COLUNAR, alinhar, codificar_dicionario,
+                     data_para_inteiro)
+from funcoes import COLUNAS_COLHEITA
+
+# Formato -> extensão do arquivo
+FORMATOS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'csv.zst': '.csv.zst',
+    'col': '.col',
+}
+
+TAMANHO_LOTE = 50000
+NIVEL_GZIP = 6        # 9 comprime pouco mais e custa ~3x o tempo
+NIVEL_ZSTD = 3
+BUFFER_ESCRITA = 1 << 20
+
+PARTICOES = ('mes', 'safra')
+
+# Colunas de COLUNAS_COLHEITA na ordem das tuplas exportadas
+_LINHA = itemgetter(*COLUNAS_COLHEITA)
+
+
+def formato_pelo_nome(caminho):
+    """
+    Deduz o formato pela extensão do arquivo (padrão: csv)
+    """
+    for formato, extensao in sorted(FORMATOS.items(), key=lambda item: -len(item[1])):
+        if caminho.endswith(extensao):
+            return formato
+    return 'csv'
+
+
+def _carregar_zstd():
+    """
+    Importa zstandard se estiver instalado (dependência opcional)
+
+    Retorno:
+        module: zstandard ou None
+    """
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+# ========================================
+# ORIGEM DOS LOTES (ORACLE OU JSON)
+# ========================================
+
+def _no_periodo(data_inicio, data_fim):
+    """
+    Filtro por período (datas DD/MM/AAAA inclusivas) sobre a data da colheita
+    """
+    inicio = data_para_inteiro(data_inicio) if data_inicio else 0
+    fim = data_para_inteiro(data_fim) if data_fim else 99999999
+    return lambda colheita: inicio <= data_para_inteiro(colheita['data']) <= fim
+
+
+def lotes_json(colheitas, data_inicio=None, data_fim=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Colheitas locais em lotes de tuplas (gerador)
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        data_inicio, data_fim (str): Período DD/MM/AAAA, inclusivo (None = sem limite)
+        tamanho_lote (int): Linhas por lote
+
+    Retorno:
+        generator: Listas de tuplas na ordem de COLUNAS_COLHEITA
+    """
+    if data_inicio or data_fim:
+        colheitas = filter(_no_periodo(data_inicio, data_fim), colheitas)
+    linhas = map(_LINHA, colheitas)
+    while True:
+        lote = list(islice(linhas, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def lotes_colheitas(fonte, colheitas=None, conn=None, data_inicio=None, data_fim=None,
+                    tamanho_lote=TAMANHO_LOTE):
+    """
+    Lotes de tuplas da fonte escolhida (mesma ordem de colunas nas duas)
+
+    Parâmetros:
+        fonte (str): 'oracle' (usa conn) ou 'json' (usa colheitas)
+
+    Retorno:
+        generator: Listas de tuplas na ordem de COLUNAS_COLHEITA
+    """
+    if fonte == 'oracle':
+        import database
+        return database.buscar_lotes_colheitas(conn, tamanho_lote, data_inicio, data_fim)
+    return lotes_json(colheitas, data_inicio, data_fim, tamanho_lote)
+
+
+# ========================================
+# ESCRITA (CSV E COLUNAR)
+# ========================================
+
+def escrever_csv(lotes, arquivo):
+    """
+    Escreve os lotes como CSV (cabeçalho com COLUNAS_COLHEITA)
+
+    Parâmetros:
+        lotes (iterable): Listas de tuplas
+        arquivo: Arquivo texto aberto com newline=''
+
+    Retorno:
+        int: Linhas escritas
+
+    Aplicação: um writerows por lote (laço em C), sem dicionário por linha
+    """
+    escritor = csv.writer(arquivo)
+    escritor.writerow(COLUNAS_COLHEITA)
+    linhas = 0
+    for lote in lotes:
+        escritor.writerows(lote)
+        linhas += len(lote)
+    return linhas
+
+
+def _abrir_csv(pilha, caminho, formato, nivel):
+    """
+    Abre o destino CSV, comprimido ou não (fechado pela pilha de contextos)
+    """
+    bruto = pilha.enter_context(open(caminho, 'wb', buffering=BUFFER_ESCRITA))
+    if formato == 'csv.gz':
+        bruto = pilha.enter_context(gzip.GzipFile(fileobj=bruto, mode='wb', mtime=0,
+                                                  compresslevel=NIVEL_GZIP if nivel is None else nivel))
+    elif formato == 'csv.zst':
+        zstandard = _carregar_zstd()
+        if zstandard is None:
+            raise ValueError("Formato csv.zst requer o pacote zstandard (pip install zstandard)")
+        compressor = zstandard.ZstdCompressor(level=NIVEL_ZSTD if nivel is None else nivel, threads=-1)
+        bruto = pilha.enter_context(compressor.stream_writer(bruto, closefd=False))
+    return pilha.enter_context(io.TextIOWrapper(bruto, encoding='utf-8', newline=''))
+
+
+def _colunas_do_lote(lote, fazendas):
+    """
+    Transpõe um lote de tuplas para as colunas tipadas de colunar.py
+
+    Parâmetros:
+        lote (list): Tuplas na ordem de COLUNAS_COLHEITA
+        fazendas (dict): Dicionário global fazenda -> código (ampliado aqui)
+
+    Retorno:
+        dict: {nome: array} na ordem de colunar.COLUNAS
+    """
+    _, fazenda, data, tipo, toneladas, perda_percentual, perda_toneladas, prejuizo = zip(*lote)
+    return {
+        'toneladas': array('d', toneladas),
+        'perda_percentual': array('d', perda_percentual),
+        'perda_toneladas': array('d', perda_toneladas),
+        'prejuizo_reais': array('d', prejuizo),
+        'data': array('i', map(data_para_inteiro, data)),
+        'fazenda': array('I', (fazendas.setdefault(nome, len(fazendas)) for nome in fazenda)),
+        'tipo_colheita': array('B', map(TIPOS.index, tipo)),
+    }
+
+
+def escrever_colunar(lotes, caminho):
+    """
+    Grava os lotes no formato de colunar.py sem juntá-los na memória
+
+    Retorno:
+        int: Linhas gravadas
+
+    Aplicação: cada coluna (e a lista de ids) vai para um arquivo temporário
+    à medida que os lotes chegam; o cabeçalho (linhas e dicionário de
+    fazendas, só conhecidos no fim) é escrito depois, seguido da cópia das colunas
+    """
+    fazendas = {}
+    linhas = 0
+    with contextlib.ExitStack() as pilha:
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        colunas = {nome: pilha.enter_context(tempfile.TemporaryFile(dir=diretorio)) for nome, _ in COLUNAS}
+        ids = pilha.enter_context(tempfile.TemporaryFile(dir=diretorio))
+        for lote in lotes:
+            for nome, valores in _colunas_do_lote(lote, fazendas).items():
+                if sys.byteorder != 'little':
+                    valores.byteswap()
+                valores.tofile(colunas[nome])
+            ids.write((',' if linhas else '').encode('utf-8') +
+                      ','.join(json.dumps(linha[0], ensure_ascii=False) for linha in lote).encode('utf-8'))
+            linhas += len(lote)
+
+        dicionario = codificar_dicionario(fazendas)
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(CABECALHO.pack(MAGIC, VERSAO_COLUNAR, 0, linhas, len(fazendas), len(dicionario)))
+            arquivo.write(dicionario.ljust(alinhar(len(dicionario)), b'\x00'))
+            for nome, _ in COLUNAS:
+                colunas[nome].seek(0)
+                shutil.copyfileobj(colunas[nome], arquivo, BUFFER_ESCRITA)
+            arquivo.write(b'[')
+            ids.seek(0)
+            shutil.copyfileobj(ids, arquivo, BUFFER_ESCRITA)
+            arquivo.write(b']')
+    return linhas
+
+
+def exportar(lotes, caminho, formato=None, nivel=None):
+    """
+    Exporta lotes de tuplas para um arquivo (gravação atômica)
+
+    Parâmetros:
+        lotes (iterable): Listas de tuplas (lotes_colheitas)
+        caminho (str): Arquivo de destino
+        formato (str): 'csv', 'csv.gz', 'csv.zst' ou 'col' (padrão: pela extensão)
+        nivel (int): Nível de compressão (padrão: NIVEL_GZIP / NIVEL_ZSTD)
+
+    Retorno:
+        dict: {'arquivo', 'formato', 'linhas', 'bytes', 'segundos'}
+
+    Aplicação: memória limitada a um lote, qualquer que seja o total
+    """
+    formato = formato or formato_pelo_nome(caminho)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+
+    inicio = time.perf_counter()
+    temporario = caminho + '.tmp'
+    try:
+        if formato == 'col':
+            linhas = escrever_colunar(lotes, temporario)
+        else:
+            with contextlib.ExitStack() as pilha:
+                linhas = escrever_csv(lotes, _abrir_csv(pilha, temporario, formato, nivel))
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return {'arquivo': caminho, 'formato': formato, 'linhas': linhas,
+            'bytes': os.path.getsize(caminho), 'segundos': round(time.perf_counter() - inicio, 3)}
+
+
+# ========================================
+# PARTIÇÕES POR DATA (EM PARALELO)
+# ========================================
+
+def periodo_da_particao(particao, rotulo):
+    """
+    Primeiro e último dia de um mês (AAAA-MM) ou safra (AAAA/AAAA)
+
+    Retorno:
+        tuple: (data_inicio, data_fim) em DD/MM/AAAA
+    """
+    if particao == 'mes':
+        ano, mes = int(rotulo[:4]), int(rotulo[5:7])
+        return f"01/{mes:02d}/{ano}", f"{calendar.monthrange(ano, mes)[1]:02d}/{mes:02d}/{ano}"
+    return f"01/04/{rotulo[:4]}", f"31/03/{rotulo[5:9]}"
+
+
+def _recortar(periodo, data_inicio, data_fim):
+    """
+    Interseção do período da partição com o período pedido
+    """
+    inicio, fim = periodo
+    if data_inicio and data_para_inteiro(data_inicio) > data_para_inteiro(inicio):
+        inicio = data_inicio
+    if data_fim and data_para_inteiro(data_fim) < data_para_inteiro(fim):
+        fim = data_fim
+    return inicio, fim
+
+
+def _conectar_trabalhador():
+    import database
+    conn = database.conectar_oracle()
+    if not conn:
+        raise ConnectionError("Sem conexão com o Oracle")
+    return conn
+
+
+def exportar_particoes(fonte, diretorio, formato='csv.gz', particao='mes', paralelismo=4,
+                       colheitas=None, data_inicio=None, data_fim=None,
+                       tamanho_lote=TAMANHO_LOTE, nivel=None, prefixo='colheitas'):
+    """
+    Exporta cada mês ou safra para um arquivo próprio, várias partições ao mesmo tempo
+
+    Parâmetros:
+        fonte (str): 'oracle' ou 'json' (usa colheitas)
+        diretorio (str): Diretório de destino (criado se não existir)
+        formato (str): 'csv', 'csv.gz', 'csv.zst' ou 'col'
+        particao (str): 'mes' (colheitas_2025-05.csv.gz) ou 'safra'
+                        (colheitas_2025-2026.csv.gz)
+        paralelismo (int): Partições exportadas simultaneamente
+        data_inicio, data_fim (str): Período DD/MM/AAAA, inclusivo
+
+    Retorno:
+        list: Resumo de exportar() por partição, com a chave 'particao'
+
+    Aplicação: threads bastam, pois o driver Oracle e a compressão (zlib/zstd)
+    liberam o GIL; no Oracle cada thread usa sua própria conexão e lê só o
+    período da partição (poda de partições quando a tabela é particionada)
+    """
+    if particao not in PARTICOES:
+        raise ValueError(f"Partição inválida: {particao} (use {' ou '.join(PARTICOES)})")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+    os.makedirs(diretorio, exist_ok=True)
+    chave = obter_mes if particao == 'mes' else obter_safra
+
+    if fonte == 'oracle':
+        import database
+        conn = _conectar_trabalhador()
+        try:
+            meses = database.listar_meses_colheitas(conn, data_inicio, data_fim)
+        finally:
+            database.fechar_conexao(conn)
+        rotulos = sorted({chave(f"01/{mes[5:7]}/{mes[:4]}") for mes in meses})
+        grupos = None
+    else:
+        # Uma passada distribui as colheitas; cada partição percorre só as suas
+        grupos = {}
+        selecionadas = filter(_no_periodo(data_inicio, data_fim), colheitas) \
+            if data_inicio or data_fim else colheitas
+        for colheita in selecionadas:
+            grupos.setdefault(chave(colheita['data']), []).append(colheita)
+        rotulos = sorted(grupos)
+
+    def exportar_uma(rotulo):
+        caminho = os.path.join(diretorio, f"{prefixo}_{rotulo.replace('/', '-')}{FORMATOS[formato]}")
+        if grupos is not None:
+            resumo = exportar(lotes_json(grupos[rotulo], tamanho_lote=tamanho_lote), caminho, formato, nivel)
+        else:
+            import database
+            inicio, fim = _recortar(periodo_da_particao(particao, rotulo), data_inicio, data_fim)
+            conn = _conectar_trabalhador()
+            try:
+                resumo = exportar(database.buscar_lotes_colheitas(conn, tamanho_lote, inicio, fim),
+                                  caminho, formato, nivel)
+            finally:
+                database.fechar_conexao(conn)
+        return dict(resumo, particao=rotulo)
+
+    with ThreadPoolExecutor(max_workers=max(1, paralelismo), thread_name_prefix='exportacao') as executor:
+        return list(executor.map(exportar_uma, rotulos))
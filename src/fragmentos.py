@@ -0,0 +1,326 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: fragmentos.py
+Descrição: Armazenamento local fragmentado (safra x hash da fazenda) com
+           agregação paralela por processos
+"""
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from analises import agrupar_colheitas, mesclar_agrupamentos, obter_safra
+from armazenamento import travar_escrita
+from esbocos import atualizar_esbocos, criar_esbocos, mesclar_esbocos
+
+# Diretório e manifesto dos fragmentos (ao lado de dados_colheitas.json)
+DIRETORIO_FRAGMENTOS = 'dados_fragmentos'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+VERSAO_MANIFESTO = 1
+BALDES_PADRAO = 8
+
+# Agrupamentos calculados em cada fragmento: servem estatísticas,
+# comparativo e relatório (ranking de fazendas)
+AGRUPAMENTOS_PADRAO = (('tipo_colheita',), ('fazenda',))
+
+
+# ========================================
+# DISTRIBUIÇÃO DAS COLHEITAS
+# ========================================
+
+def balde_fazenda(fazenda, baldes=BALDES_PADRAO):
+    """
+    Calcula o balde de uma fazenda (hash estável entre processos e execuções)
+
+    Parâmetros:
+        fazenda (str): Nome da fazenda
+        baldes (int): Quantidade de baldes por safra
+
+    Retorno:
+        int: Número do balde (0 a baldes-1)
+    """
+    digest = hashlib.blake2b(fazenda.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') % baldes
+
+
+def nome_fragmento(safra, balde):
+    """
+    Nome do arquivo de um fragmento (ex: safra_2025-2026_balde_03.json)
+    """
+    return f"safra_{safra.replace('/', '-')}_balde_{balde:02d}.json"
+
+
+def distribuir_colheitas(colheitas, baldes=BALDES_PADRAO):
+    """
+    Separa colheitas por fragmento (safra, balde da fazenda)
+
+    Retorno:
+        dict: {nome_do_arquivo: (safra, balde, [colheitas])}
+    """
+    distribuicao = {}
+    for colheita in colheitas:
+        safra = obter_safra(colheita['data'])
+        balde = balde_fazenda(colheita['fazenda'], baldes)
+        nome = nome_fragmento(safra, balde)
+        if nome not in distribuicao:
+            distribuicao[nome] = (safra, balde, [])
+        distribuicao[nome][2].append(colheita)
+    return distribuicao
+
+
+# ========================================
+# MANIFESTO E ESCRITA DOS FRAGMENTOS
+# ========================================
+
+def carregar_manifesto(diretorio=DIRETORIO_FRAGMENTOS):
+    """
+    Lê o manifesto dos fragmentos
+
+    Retorno:
+        dict: Manifesto ou None se não existir
+    """
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_MANIFESTO), 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _salvar_manifesto(manifesto, diretorio):
+    """
+    Grava o manifesto de forma atômica (arquivo temporário + os.replace)
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=4, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def _gravar_fragmento(diretorio, nome, colheitas):
+    """
+    Grava um fragmento em JSON compacto, de forma atômica (temporário + os.replace):
+    um leitor nunca vê o fragmento pela metade
+    """
+    caminho = os.path.join(diretorio, nome)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(colheitas, arquivo, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporario, caminho)
+
+
+def _travar_fragmentos(diretorio):
+    """
+    Trava de escrita dos fragmentos (a mesma de armazenamento.py, sobre o manifesto)
+    """
+    return travar_escrita(os.path.join(diretorio, ARQUIVO_MANIFESTO))
+
+
+def fragmentar_colheitas(colheitas, diretorio=DIRETORIO_FRAGMENTOS, baldes=BALDES_PADRAO):
+    """
+    Divide as colheitas em fragmentos por safra e hash da fazenda
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        diretorio (str): Diretório dos fragmentos (recriado do zero)
+        baldes (int): Quantidade de baldes por safra
+
+    Retorno:
+        dict: Manifesto gravado
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    with _travar_fragmentos(diretorio):
+        return _fragmentar(colheitas, diretorio, baldes)
+
+
+def _fragmentar(colheitas, diretorio, baldes):
+    """
+    Regrava todos os fragmentos e o manifesto (chamada com a trava dos fragmentos)
+    """
+    anterior = carregar_manifesto(diretorio)
+
+    manifesto = {'versao': VERSAO_MANIFESTO, 'baldes': baldes, 'registros': 0, 'fragmentos': {}}
+    for nome, (safra, balde, registros) in distribuir_colheitas(colheitas, baldes).items():
+        _gravar_fragmento(diretorio, nome, registros)
+        manifesto['fragmentos'][nome] = {'safra': safra, 'balde': balde, 'registros': len(registros)}
+        manifesto['registros'] += len(registros)
+    _salvar_manifesto(manifesto, diretorio)
+
+    # Remove fragmentos antigos que não fazem mais parte do manifesto
+    if anterior:
+        for nome in anterior['fragmentos']:
+            if nome not in manifesto['fragmentos']:
+                os.remove(os.path.join(diretorio, nome))
+    return manifesto
+
+
+def acrescentar_fragmentos(colheitas_novas, diretorio=DIRETORIO_FRAGMENTOS):
+    """
+    Acrescenta colheitas novas reescrevendo apenas os fragmentos afetados
+
+    Parâmetros:
+        colheitas_novas (list): Colheitas a acrescentar
+        diretorio (str): Diretório dos fragmentos
+
+    Retorno:
+        dict: Manifesto atualizado
+
+    Aplicação: manifesto relido e fragmentos regravados dentro da trava, então
+    dois cadastros ao mesmo tempo não perdem colheitas; cada fragmento é
+    trocado por os.replace antes do manifesto
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    with _travar_fragmentos(diretorio):
+        manifesto = carregar_manifesto(diretorio)
+        if manifesto is None:
+            return _fragmentar(colheitas_novas, diretorio, BALDES_PADRAO)
+
+        for nome, (safra, balde, registros) in distribuir_colheitas(colheitas_novas, manifesto['baldes']).items():
+            existentes = _ler_fragmento(os.path.join(diretorio, nome)) if nome in manifesto['fragmentos'] else []
+            existentes.extend(registros)
+            _gravar_fragmento(diretorio, nome, existentes)
+            manifesto['fragmentos'][nome] = {'safra': safra, 'balde': balde, 'registros': len(existentes)}
+            manifesto['registros'] += len(registros)
+        _salvar_manifesto(manifesto, diretorio)
+        return manifesto
+
+
+# ========================================
+# LEITURA E AGREGAÇÃO PARALELA
+# ========================================
+
+def _ler_fragmento(caminho):
+    """
+    Lê um fragmento (executado também dentro dos processos trabalhadores)
+    """
+    with open(caminho, 'r', encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _agregar_fragmento(caminho, agrupamentos):
+    """
+    Carrega e agrega um fragmento dentro de um processo trabalhador
+
+    Retorno:
+        dict: {dimensoes: agrupamento parcial}
+    """
+    colheitas = _ler_fragmento(caminho)
+    return {dimensoes: agrupar_colheitas(colheitas, dimensoes) for dimensoes in agrupamentos}
+
+
+def _caminhos_fragmentos(diretorio, safras=None):
+    """
+    Lista os caminhos dos fragmentos do manifesto (opcionalmente só algumas safras)
+    """
+    manifesto = carregar_manifesto(diretorio)
+    if manifesto is None:
+        return []
+    return [os.path.join(diretorio, nome)
+            for nome, info in sorted(manifesto['fragmentos'].items())
+            if safras is None or info['safra'] in safras]
+
+
+def carregar_fragmentos(diretorio=DIRETORIO_FRAGMENTOS, max_processos=None):
+    """
+    Carrega todas as colheitas dos fragmentos, lendo-os em paralelo
+
+    Retorno:
+        list: Lista de dicionários com todas as colheitas
+    """
+    caminhos = _caminhos_fragmentos(diretorio)
+    colheitas = []
+    if len(caminhos) <= 1:
+        for caminho in caminhos:
+            colheitas.extend(_ler_fragmento(caminho))
+    else:
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            for parte in executor.map(_ler_fragmento, caminhos):
+                colheitas.extend(parte)
+    print(f"✅ {len(colheitas)} colheitas carregadas de {len(caminhos)} fragmentos")
+    return colheitas
+
+
+def agregar_fragmentos(diretorio=DIRETORIO_FRAGMENTOS, agrupamentos=AGRUPAMENTOS_PADRAO,
+                       safras=None, max_processos=None):
+    """
+    Agrega cada fragmento em um processo e mescla os resultados parciais
+
+    Parâmetros:
+        diretorio (str): Diretório dos fragmentos
+        agrupamentos (tuple): Lista de dimensões a agrupar (ex: (('tipo_colheita',),))
+        safras (list): Restringe a algumas safras (None = todas)
+        max_processos (int): Processos trabalhadores (None = núcleos da máquina)
+
+    Retorno:
+        dict: {dimensoes: agrupamento mesclado}
+
+    Aplicação: cada processo lê e agrega só o seu fragmento; apenas os
+    agrupamentos parciais (pequenos) voltam ao processo principal
+    """
+    caminhos = _caminhos_fragmentos(diretorio, safras)
+    if len(caminhos) <= 1:
+        parciais = [_agregar_fragmento(caminho, agrupamentos) for caminho in caminhos]
+    else:
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            parciais = list(executor.map(_agregar_fragmento, caminhos,
+                                         [agrupamentos] * len(caminhos)))
+
+    resultado = {dimensoes: {} for dimensoes in agrupamentos}
+    for parcial in parciais:
+        for dimensoes in agrupamentos:
+            resultado[dimensoes] = mesclar_agrupamentos(resultado[dimensoes], parcial[dimensoes])
+    return resultado
+
+
+def _esbocar_fragmento(caminho):
+    """
+    Carrega um fragmento e monta os seus esboços dentro de um processo trabalhador
+    """
+    return atualizar_esbocos(criar_esbocos(), _ler_fragmento(caminho))
+
+
+def esbocos_fragmentos(diretorio=DIRETORIO_FRAGMENTOS, max_processos=None):
+    """
+    Monta os esboços de cada fragmento em um processo e mescla os resultados
+
+    Parâmetros:
+        diretorio (str): Diretório dos fragmentos
+        max_processos (int): Processos trabalhadores (None = núcleos da máquina)
+
+    Retorno:
+        dict: Conjunto de esboços de todas as colheitas dos fragmentos
+
+    Aplicação: KLL e HLL são mescláveis, então o resultado tem os mesmos
+    limites de erro que esboços montados sobre todas as colheitas juntas
+    """
+    caminhos = _caminhos_fragmentos(diretorio)
+    if len(caminhos) <= 1:
+        parciais = [_esbocar_fragmento(caminho) for caminho in caminhos]
+    else:
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            parciais = list(executor.map(_esbocar_fragmento, caminhos))
+
+    esbocos = criar_esbocos()
+    for parcial in parciais:
+        esbocos = mesclar_esbocos(esbocos, parcial)
+    return esbocos
+
+
+# ========================================
+# EXECUÇÃO DIRETA: DIVIDIR O JSON EM FRAGMENTOS
+# ========================================
+
+if __name__ == "__main__":
+    origem = sys.argv[1] if len(sys.argv) > 1 else 'dados_colheitas.json'
+    baldes = int(sys.argv[2]) if len(sys.argv) > 2 else BALDES_PADRAO
+
+    # Arquivo base + diário: alterações ainda não compactadas entram nos fragmentos
+    from armazenamento import ler_colheitas
+    dados = ler_colheitas(origem)
+
+    destino = os.path.join(os.path.dirname(origem), DIRETORIO_FRAGMENTOS)
+    manifesto = fragmentar_colheitas(dados, destino, baldes)
+    print(f"✅ {manifesto['registros']} colheitas divididas em "
+          f"{len(manifesto['fragmentos'])} fragmentos ({destino})")
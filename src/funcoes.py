@@ -4,6 +4,16 @@ Arquivo: funcoes.py
 Descrição: Subalgoritmos (funções e procedimentos) com passagem de parâmetros
 """
 
+from analises import agrupar_colheitas, obter_grupo, totalizar
+
+# Campos alteráveis de uma colheita (JSON e Oracle)
+CAMPOS_ATUALIZAVEIS = ('fazenda', 'tipo_colheita', 'toneladas')
+
+# Colunas das consultas de database.py (listar/buscar), na ordem do SELECT;
+# também a ordem das tuplas da exportação e das saídas da CLI e da API
+COLUNAS_COLHEITA = ('id', 'fazenda', 'data', 'tipo_colheita', 'toneladas',
+                    'perda_percentual', 'perda_toneladas', 'prejuizo_reais')
+
 # ========================================
 # FUNÇÕES DE VALIDAÇÃO DE DADOS
 # ========================================
@@ -18,12 +28,12 @@ def validar_numero_positivo(mensagem):
     Retorno:
         float: Número validado e positivo
 
-    Aplicação: Impede entrada de valores negativos ou tipos incorretos
+    Aplicação: Impede entrada de valores negativos, zero ou tipos incorretos
     """
     while True:
         try:
             valor = float(input(mensagem))
-            if valor < 0:
+            if valor <= 0:
                 print("❌ Erro: Digite um valor positivo!")
                 continue
             return valor
@@ -31,6 +41,30 @@ def validar_numero_positivo(mensagem):
             print("❌ Erro: Digite apenas números!")
 
 
+def validar_alteracao(campo, valor):
+    """
+    Valida a alteração de um campo de uma colheita
+
+    Parâmetros:
+        campo (str): 'fazenda', 'tipo_colheita' ou 'toneladas'
+        valor: Novo valor do campo
+
+    Retorno:
+        str: Mensagem de erro ou None se válida
+
+    Aplicação: mesma regra para o JSON e para o Oracle (toneladas maiores que zero)
+    """
+    if campo not in CAMPOS_ATUALIZAVEIS:
+        return f"Campo inválido! Use: {', '.join(CAMPOS_ATUALIZAVEIS)}"
+    if campo == 'tipo_colheita' and valor not in ('manual', 'mecanica'):
+        return f"Tipo inválido: {valor}"
+    if campo == 'toneladas' and (isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor <= 0):
+        return f"Toneladas inválidas: {valor}"
+    if campo == 'fazenda' and not str(valor).strip():
+        return "Nome da fazenda não pode ser vazio"
+    return None
+
+
 def validar_tipo_colheita(mensagem):
     """
     Valida tipo de colheita (manual ou mecânica)
@@ -163,30 +197,53 @@ def exibir_estatisticas(colheitas):
         print("\n⚠️  Nenhuma colheita cadastrada ainda.")
         return
 
-    # Contadores e acumuladores
-    total_ton = sum(c['toneladas'] for c in colheitas)
-    total_perda_ton = sum(c['perda_toneladas'] for c in colheitas)
-    total_prejuizo = sum(c['prejuizo_reais'] for c in colheitas)
+    # Agregação por tipo em passada única
+    exibir_estatisticas_agrupadas(agrupar_colheitas(colheitas, ('tipo_colheita',)))
+
 
-    # Separação por tipo
-    manuais = [c for c in colheitas if c['tipo_colheita'] == 'manual']
-    mecanicas = [c for c in colheitas if c['tipo_colheita'] == 'mecanica']
+def exibir_estatisticas_agrupadas(por_tipo, origem=None):
+    """
+    Exibe estatísticas gerais a partir de um agrupamento por tipo
+
+    Parâmetros:
+        por_tipo (dict): Agrupamento por ('tipo_colheita',), calculado localmente,
+                         mesclado a partir de fragmentos ou lido do Oracle
+        origem (str): Origem dos dados exibida no título (None = local)
+
+    Retorno:
+        None (procedimento)
+
+    Estruturas aplicadas: DICIONÁRIO, TUPLA
+    """
+    total = totalizar(por_tipo)
+    if not total['quantidade']:
+        print("\n⚠️  Nenhuma colheita cadastrada ainda.")
+        return
+
+    total_ton = total['toneladas']['soma']
+    total_perda_ton = total['perda_toneladas']['soma']
+    total_prejuizo = total['prejuizo_reais']['soma']
+
+    qtd_manuais = obter_grupo(por_tipo, 'manual')['quantidade']
+    mecanica = obter_grupo(por_tipo, 'mecanica')
+    qtd_mecanicas = mecanica['quantidade']
 
     print("\n" + "="*60)
-    print("📊 ESTATÍSTICAS GERAIS DO SISTEMA")
+    print(f"📊 ESTATÍSTICAS GERAIS DO SISTEMA{f' ({origem})' if origem else ''}")
     print("="*60)
-    print(f"Total de colheitas cadastradas: {len(colheitas)}")
-    print(f"  • Colheitas manuais: {len(manuais)}")
-    print(f"  • Colheitas mecânicas: {len(mecanicas)}")
+    print(f"Total de colheitas cadastradas: {total['quantidade']}")
+    print(f"  • Colheitas manuais: {qtd_manuais}")
+    print(f"  • Colheitas mecânicas: {qtd_mecanicas}")
     print("-"*60)
     print(f"Total produzido: {total_ton:,.2f} toneladas")
     print(f"Total perdido: {total_perda_ton:,.2f} toneladas ({(total_perda_ton/total_ton*100):.1f}%)")
     print(f"Prejuízo total acumulado: R$ {total_prejuizo:,.2f}")
     print("="*60)
 
-    # Cálculo de economia potencial
-    if mecanicas:
-        economia_ton, economia_reais = calcular_economia_potencial(colheitas)
+    # Cálculo de economia potencial (mesma regra de calcular_economia_potencial)
+    if qtd_mecanicas:
+        economia_ton = mecanica['toneladas']['soma'] * (0.15 - 0.05)
+        economia_reais = economia_ton * 150.0
         print(f"\n💡 ANÁLISE DE OPORTUNIDADE:")
         print(f"Se as colheitas mecânicas fossem manuais, você economizaria:")
         print(f"  • {economia_ton:,.2f} toneladas")
@@ -236,32 +293,52 @@ def exibir_comparativo_tipos(colheitas):
         print("\n⚠️  Nenhuma colheita cadastrada ainda.")
         return
 
-    # Separação e cálculos por tipo
-    manuais = [c for c in colheitas if c['tipo_colheita'] == 'manual']
-    mecanicas = [c for c in colheitas if c['tipo_colheita'] == 'mecanica']
+    # Agregação por tipo em passada única
+    exibir_comparativo_agrupado(agrupar_colheitas(colheitas, ('tipo_colheita',)))
+
+
+def exibir_comparativo_agrupado(por_tipo, origem=None):
+    """
+    Exibe comparativo manual vs mecânica a partir de um agrupamento por tipo
+
+    Parâmetros:
+        por_tipo (dict): Agrupamento por ('tipo_colheita',), calculado localmente,
+                         mesclado a partir de fragmentos ou lido do Oracle
+        origem (str): Origem dos dados exibida no título (None = local)
+
+    Retorno:
+        None (procedimento)
+
+    Estruturas aplicadas: DICIONÁRIO, TUPLA
+    """
+    manual = obter_grupo(por_tipo, 'manual')
+    mecanica = obter_grupo(por_tipo, 'mecanica')
+    if not manual['quantidade'] and not mecanica['quantidade']:
+        print("\n⚠️  Nenhuma colheita cadastrada ainda.")
+        return
 
     print("\n" + "="*60)
-    print("📊 COMPARATIVO: MANUAL vs MECÂNICA")
+    print(f"📊 COMPARATIVO: MANUAL vs MECÂNICA{f' ({origem})' if origem else ''}")
     print("="*60)
 
-    if manuais:
-        total_manual = sum(c['toneladas'] for c in manuais)
-        perda_manual = sum(c['perda_toneladas'] for c in manuais)
-        prejuizo_manual = sum(c['prejuizo_reais'] for c in manuais)
+    if manual['quantidade']:
+        total_manual = manual['toneladas']['soma']
+        perda_manual = manual['perda_toneladas']['soma']
+        prejuizo_manual = manual['prejuizo_reais']['soma']
 
         print(f"\n🌾 COLHEITA MANUAL:")
-        print(f"  Quantidade: {len(manuais)} colheitas")
+        print(f"  Quantidade: {manual['quantidade']} colheitas")
         print(f"  Total produzido: {total_manual:,.2f} t")
         print(f"  Total perdido: {perda_manual:,.2f} t ({(perda_manual/total_manual*100):.1f}%)")
         print(f"  Prejuízo: R$ {prejuizo_manual:,.2f}")
 
-    if mecanicas:
-        total_mecanica = sum(c['toneladas'] for c in mecanicas)
-        perda_mecanica = sum(c['perda_toneladas'] for c in mecanicas)
-        prejuizo_mecanica = sum(c['prejuizo_reais'] for c in mecanicas)
+    if mecanica['quantidade']:
+        total_mecanica = mecanica['toneladas']['soma']
+        perda_mecanica = mecanica['perda_toneladas']['soma']
+        prejuizo_mecanica = mecanica['prejuizo_reais']['soma']
 
         print(f"\n🚜 COLHEITA MECÂNICA:")
-        print(f"  Quantidade: {len(mecanicas)} colheitas")
+        print(f"  Quantidade: {mecanica['quantidade']} colheitas")
         print(f"  Total produzido: {total_mecanica:,.2f} t")
         print(f"  Total perdido: {perda_mecanica:,.2f} t ({(perda_mecanica/total_mecanica*100):.1f}%)")
         print(f"  Prejuízo: R$ {prejuizo_mecanica:,.2f}")
@@ -269,6 +346,99 @@ def exibir_comparativo_tipos(colheitas):
     print("="*60)
 
 
+def exibir_tendencia(serie, nivel):
+    """
+    Exibe a série temporal de perdas (lida do cubo de agregados)
+
+    Parâmetros:
+        serie (list): Lista de tuplas (periodo, totais) de consultar_tendencia
+        nivel (str): Rótulo do nível ('dia', 'mês' ou 'safra')
+
+    Retorno:
+        None (procedimento)
+
+    Estruturas aplicadas: LISTA de TUPLAS, DICIONÁRIO
+    """
+    if not serie:
+        print("\n⚠️  Nenhuma colheita cadastrada ainda.")
+        return
+
+    print("\n" + "="*60)
+    print(f"📈 TENDÊNCIA DE PERDAS POR {nivel.upper()}")
+    print("="*60)
+    print(f"{'Período':<12}{'Colheitas':>10}{'Produzido (t)':>16}{'Perda (t)':>12}{'Perda %':>9}")
+    print("-"*60)
+    for periodo, totais in serie:
+        perc = totais['perda_toneladas'] / totais['toneladas'] * 100 if totais['toneladas'] else 0.0
+        print(f"{periodo:<12}{totais['quantidade']:>10}{totais['toneladas']:>16,.2f}"
+              f"{totais['perda_toneladas']:>12,.2f}{perc:>8.1f}%")
+    print("="*60)
+
+
+def exibir_ranking_fazendas(ranking, criterio, origem='JSON'):
+    """
+    Exibe o ranking das fazendas que mais perdem
+
+    Parâmetros:
+        ranking (list): Lista de totais por fazenda (top_k_fazendas)
+        criterio (str): Critério usado na ordenação
+        origem (str): Origem dos dados exibida no título
+
+    Retorno:
+        None (procedimento)
+
+    Estruturas aplicadas: LISTA, DICIONÁRIO
+    """
+    if not ranking:
+        print(f"\n⚠️  Nenhuma colheita para o ranking ({origem}).")
+        return
+
+    print("\n" + "="*60)
+    print(f"🏆 TOP {len(ranking)} FAZENDAS COM MAIOR PERDA ({origem}) - {criterio}")
+    print("="*60)
+    for posicao, fazenda in enumerate(ranking, 1):
+        print(f"{posicao}. {fazenda['fazenda']}")
+        print(f"   Colheitas: {fazenda['quantidade']} | Produzido: {fazenda['toneladas']:,.2f} t")
+        print(f"   Perda: {fazenda['perda_toneladas']:,.2f} t ({fazenda['razao_perda']*100:.1f}%)")
+        print(f"   Prejuízo: R$ {fazenda['prejuizo_reais']:,.2f}")
+    print("="*60)
+
+
+def exibir_estatisticas_aproximadas(resumo):
+    """
+    Exibe estatísticas aproximadas (esboços) com os limites de erro
+
+    Parâmetros:
+        resumo (dict): Resultado de resumir_esbocos
+
+    Retorno:
+        None (procedimento)
+
+    Estruturas aplicadas: DICIONÁRIO
+    """
+    if not resumo['registros']:
+        print("\n⚠️  Nenhuma colheita cadastrada ainda.")
+        return
+
+    print("\n" + "="*60)
+    print("📊 ESTATÍSTICAS APROXIMADAS (ESBOÇOS)")
+    print("="*60)
+    print(f"Colheitas resumidas: {resumo['registros']}")
+    print(f"Fazendas distintas: ~{resumo['fazendas_distintas']:,.0f} "
+          f"(erro padrão ±{resumo['erro_fazendas']*100:.1f}%)")
+
+    rotulos = {'toneladas': 'Toneladas por colheita', 'prejuizo_reais': 'Prejuízo por colheita (R$)'}
+    for metrica, quantis in resumo['quantis'].items():
+        print("-"*60)
+        print(f"{rotulos.get(metrica, metrica)}:")
+        for q, valor in quantis.items():
+            nome = 'Mediana' if q == 0.5 else f"P{q*100:g}"
+            print(f"  {nome}: {valor:,.2f}")
+    print("-"*60)
+    print(f"Erro de rank dos quantis: ±{resumo['erro_rank']*100:.1f}% (confiança de 99%)")
+    print("="*60)
+
+
 # ========================================
 # FUNÇÃO DE FORMATAÇÃO
 # ========================================
@@ -305,3 +475,44 @@ def buscar_colheitas_por_fazenda(colheitas, nome_fazenda):
     """
     resultado = [c for c in colheitas if nome_fazenda.lower() in c['fazenda'].lower()]
     return resultado
+
+
+def indexar_fazendas(colheitas, indice=None, inicio=0):
+    """
+    Cria (ou estende) o índice de posições das colheitas por fazenda
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        indice (dict): Índice existente a estender (None = cria um novo)
+        inicio (int): Primeira posição a indexar (para acrescentar só as novas)
+
+    Retorno:
+        dict: {nome_da_fazenda_em_minúsculas: [posições na lista]}
+
+    Estruturas aplicadas: DICIONÁRIO de LISTAS
+    """
+    if indice is None:
+        indice = {}
+    for posicao in range(inicio, len(colheitas)):
+        indice.setdefault(colheitas[posicao]['fazenda'].lower(), []).append(posicao)
+    return indice
+
+
+def buscar_colheitas_indexadas(colheitas, indice, nome_fazenda):
+    """
+    Busca parcial por fazenda percorrendo só os nomes distintos do índice
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        indice (dict): Resultado de indexar_fazendas
+        nome_fazenda (str): Nome (ou parte do nome) da fazenda
+
+    Retorno:
+        list: Colheitas encontradas, na ordem de cadastro (igual a buscar_colheitas_por_fazenda)
+    """
+    termo = nome_fazenda.lower()
+    posicoes = []
+    for nome, lista in indice.items():
+        if termo in nome:
+            posicoes.extend(lista)
+    return [colheitas[p] for p in sorted(posicoes)]
@@ -0,0 +1,159 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: gravacao.py
+Descrição: Gravação simultânea nos destinos (JSON e Oracle), com nova
+           tentativa e fila de pendências para o destino que falhar
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from armazenamento import travar_escrita
+
+# Fila de pendências: uma linha JSON por gravação que falhou (ao lado dos dados).
+# Acréscimos e a regravação do reprocessamento usam a mesma trava de escrita
+ARQUIVO_PENDENCIAS = 'pendencias_colheitas.jsonl'
+TENTATIVAS_PADRAO = 2
+ESPERA_ENTRE_TENTATIVAS = 0.5
+
+
+# ========================================
+# GRAVAÇÃO EM PARALELO
+# ========================================
+
+def _executar_com_tentativas(tarefa, tentativas, espera):
+    """
+    Executa uma tarefa de gravação, repetindo em caso de falha
+
+    A tarefa falha se levantar exceção ou retornar False/None
+
+    Retorno:
+        dict: {'ok', 'resultado', 'erro', 'tentativas'}
+    """
+    erro = None
+    for tentativa in range(1, tentativas + 1):
+        try:
+            resultado = tarefa()
+            if resultado is not None and resultado is not False:
+                return {'ok': True, 'resultado': resultado, 'erro': None, 'tentativas': tentativa}
+            erro = 'gravação não confirmada'
+        except Exception as e:
+            erro = str(e)
+        if tentativa < tentativas:
+            time.sleep(espera * tentativa)
+    return {'ok': False, 'resultado': None, 'erro': erro, 'tentativas': tentativas}
+
+
+def gravar_em_paralelo(tarefas, tentativas=TENTATIVAS_PADRAO, espera=ESPERA_ENTRE_TENTATIVAS):
+    """
+    Grava nos destinos ao mesmo tempo, um por thread
+
+    Parâmetros:
+        tarefas (dict): {destino: função sem argumentos que grava}
+        tentativas (int): Tentativas por destino (a repetição acontece dentro
+                          da própria thread, sem atrasar o outro destino)
+        espera (float): Espera base entre tentativas, em segundos
+
+    Retorno:
+        dict: {destino: {'ok', 'resultado', 'erro', 'tentativas'}}
+
+    Aplicação: disco e Oracle esperam por E/S, então as threads rodam de fato
+    em paralelo; o cadastro demora o do destino mais lento, e não a soma
+    """
+    if not tarefas:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(tarefas)) as executor:
+        futuros = {destino: executor.submit(_executar_com_tentativas, tarefa, tentativas, espera)
+                   for destino, tarefa in tarefas.items()}
+        return {destino: futuro.result() for destino, futuro in futuros.items()}
+
+
+# ========================================
+# FILA DE PENDÊNCIAS
+# ========================================
+
+def caminho_pendencias(caminho_dados='dados_colheitas.json'):
+    """
+    Retorna o caminho da fila de pendências ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), ARQUIVO_PENDENCIAS)
+
+
+def registrar_pendencia(destino, colheita, erro, caminho_dados='dados_colheitas.json'):
+    """
+    Guarda uma gravação que falhou para reprocessar depois
+
+    Parâmetros:
+        destino (str): 'json' ou 'oracle'
+        colheita (dict): Colheita que não foi gravada no destino
+        erro (str): Motivo da falha
+        caminho_dados (str): Caminho de dados_colheitas.json
+    """
+    pendencia = {
+        'destino': destino,
+        'colheita': colheita,
+        'erro': erro,
+        'registrada_em': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+    }
+    caminho = caminho_pendencias(caminho_dados)
+    with travar_escrita(caminho), open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(pendencia, ensure_ascii=False) + '\n')
+
+
+def carregar_pendencias(caminho_dados='dados_colheitas.json'):
+    """
+    Lê a fila de pendências
+
+    Retorno:
+        list: Pendências na ordem em que foram registradas
+    """
+    try:
+        with open(caminho_pendencias(caminho_dados), 'r', encoding='utf-8') as arquivo:
+            return [json.loads(linha) for linha in arquivo if linha.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def reprocessar_pendencias(gravadores, caminho_dados='dados_colheitas.json'):
+    """
+    Tenta de novo as gravações pendentes (compensação do destino que falhou)
+
+    Parâmetros:
+        gravadores (dict): {destino: função(colheita) que grava}; pendências de
+                           destinos sem gravador continuam na fila
+        caminho_dados (str): Caminho de dados_colheitas.json
+
+    Retorno:
+        tuple: (quantidade reprocessada, quantidade que continua pendente)
+
+    Aplicação: a fila fica travada da leitura à regravação; uma pendência
+    registrada nesse meio tempo espera a trava e entra na fila nova, em vez
+    de se perder na troca do arquivo (e dois reprocessamentos não repetem
+    a mesma gravação)
+    """
+    caminho = caminho_pendencias(caminho_dados)
+    with travar_escrita(caminho):
+        pendencias = carregar_pendencias(caminho_dados)
+        restantes = []
+        for pendencia in pendencias:
+            gravador = gravadores.get(pendencia['destino'])
+            if gravador is None:
+                restantes.append(pendencia)
+                continue
+            resultado = _executar_com_tentativas(lambda: gravador(pendencia['colheita']), 1, 0)
+            if not resultado['ok']:
+                pendencia['erro'] = resultado['erro']
+                restantes.append(pendencia)
+
+        if restantes:
+            temporario = caminho + '.tmp'
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                for pendencia in restantes:
+                    arquivo.write(json.dumps(pendencia, ensure_ascii=False) + '\n')
+            os.replace(temporario, caminho)
+        elif os.path.exists(caminho):
+            os.remove(caminho)
+    return len(pendencias) - len(restantes), len(restantes)
@@ -0,0 +1,253 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: instantaneo.py
+Descrição: Cache de inicialização (instantâneo binário dos registros,
+           índices e agregados já calculados, e cópia colunar dos dados)
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+
+from armazenamento import caminho_diario
+from colunar import abrir_colunar, colheitas_da_tabela, exportar_colunar, fechar_colunar
+
+# Arquivo do instantâneo: fica ao lado de dados_colheitas.json
+ARQUIVO_INSTANTANEO = 'dados_colheitas.snapshot'
+MAGIC = b'AGROSNAP'
+VERSAO_INSTANTANEO = 2
+
+# Cópia colunar dos dados (ao lado de dados_colheitas.json)
+ARQUIVO_COLUNAR = 'dados_colheitas.col'
+
+
+# ========================================
+# ASSINATURA DO ARQUIVO DE DADOS
+# ========================================
+
+def caminho_instantaneo(caminho_dados='dados_colheitas.json'):
+    """
+    Retorna o caminho do instantâneo ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), ARQUIVO_INSTANTANEO)
+
+
+def hash_arquivo(caminho):
+    """
+    Hash do conteúdo do arquivo (blake2b, lido em blocos de 1 MB)
+
+    Retorno:
+        str: Hash hexadecimal
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _assinatura_arquivo(caminho):
+    """
+    Assinatura de um arquivo: tamanho, mtime e hash do conteúdo
+
+    Retorno:
+        dict: {'tamanho', 'mtime_ns', 'hash'} ou None se o arquivo não existir
+    """
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns, 'hash': hash_arquivo(caminho)}
+
+
+def assinatura_dados(caminho_dados='dados_colheitas.json'):
+    """
+    Assinatura dos dados locais: arquivo base e diário de alterações
+
+    Retorno:
+        dict: {'dados': assinatura, 'diario': assinatura ou None},
+              ou None se o arquivo de dados não existir
+    """
+    dados = _assinatura_arquivo(caminho_dados)
+    if dados is None:
+        return None
+    return {'dados': dados, 'diario': _assinatura_arquivo(caminho_diario(caminho_dados))}
+
+
+def _confere_arquivo(caminho, salva, verificar_conteudo):
+    """
+    Confere um arquivo contra a assinatura salva (None = não existia)
+
+    Tamanho e mtime iguais bastam (caminho rápido). Se só o mtime mudou
+    (arquivo copiado ou "tocado"), o hash do conteúdo decide
+    """
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return salva is None
+    if salva is None or info.st_size != salva['tamanho']:
+        return False
+    if verificar_conteudo or info.st_mtime_ns != salva['mtime_ns']:
+        return hash_arquivo(caminho) == salva['hash']
+    return True
+
+
+def confere_assinatura(assinatura, caminho_dados='dados_colheitas.json', verificar_conteudo=False):
+    """
+    Confere se arquivo base e diário ainda correspondem a uma assinatura salva
+
+    Parâmetros:
+        assinatura (dict): Resultado de assinatura_dados (None = nunca conferida)
+        caminho_dados (str): Caminho de dados_colheitas.json
+        verificar_conteudo (bool): Sempre confere o hash do conteúdo
+
+    Retorno:
+        bool: True se nenhum dos dois arquivos mudou desde a assinatura
+    """
+    if not assinatura:
+        return False
+    return (_confere_arquivo(caminho_dados, assinatura['dados'], verificar_conteudo) and
+            _confere_arquivo(caminho_diario(caminho_dados), assinatura['diario'], verificar_conteudo))
+
+
+# ========================================
+# GRAVAÇÃO E VALIDAÇÃO DO INSTANTÂNEO
+# ========================================
+
+def salvar_instantaneo(conteudo, caminho_dados='dados_colheitas.json', assinatura=None):
+    """
+    Grava o instantâneo com a assinatura atual do arquivo de dados
+
+    Parâmetros:
+        conteudo (dict): Registros, índices e agregados (apenas tipos básicos:
+                         dict, list, tuple, str, int, float)
+        caminho_dados (str): Caminho de dados_colheitas.json
+        assinatura (dict): Assinatura tirada ANTES de ler os dados (None = atual);
+                           evita associar o conteúdo a uma versão mais nova do arquivo
+
+    Retorno:
+        bool: True se gravou, False em caso de erro
+
+    Formato: MAGIC + marshal({'versao', 'python', 'assinatura', 'conteudo'});
+    marshal é o serializador mais rápido da biblioteca padrão para tipos básicos
+    """
+    if assinatura is None:
+        assinatura = assinatura_dados(caminho_dados)
+    if assinatura is None:
+        return False
+
+    caminho = caminho_instantaneo(caminho_dados)
+    temporario = caminho + '.tmp'
+    try:
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(MAGIC)
+            marshal.dump({
+                'versao': VERSAO_INSTANTANEO,
+                'python': tuple(sys.version_info[:2]),
+                'assinatura': assinatura,
+                'conteudo': conteudo,
+            }, arquivo)
+        os.replace(temporario, caminho)
+        return True
+    except Exception as e:
+        print(f"⚠️  Não foi possível gravar o cache de inicialização: {e}")
+        return False
+
+
+def carregar_instantaneo(caminho_dados='dados_colheitas.json', verificar_conteudo=False):
+    """
+    Carrega o instantâneo se ele ainda corresponder ao arquivo de dados
+
+    Parâmetros:
+        caminho_dados (str): Caminho de dados_colheitas.json
+        verificar_conteudo (bool): Sempre confere o hash do conteúdo
+
+    Retorno:
+        dict: Conteúdo salvo, ou None se ausente, corrompido ou desatualizado
+
+    Validação: arquivo base e diário precisam bater com a assinatura salva
+    """
+    try:
+        with open(caminho_instantaneo(caminho_dados), 'rb') as arquivo:
+            if arquivo.read(len(MAGIC)) != MAGIC:
+                return None
+            dados = marshal.load(arquivo)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    if dados.get('versao') != VERSAO_INSTANTANEO or dados.get('python') != tuple(sys.version_info[:2]):
+        return None
+
+    if not confere_assinatura(dados['assinatura'], caminho_dados, verificar_conteudo):
+        return None
+    return dados['conteudo']
+
+
+# ========================================
+# CÓPIA COLUNAR DOS DADOS
+# ========================================
+
+def caminho_colunar(caminho_dados='dados_colheitas.json'):
+    """
+    Retorna o caminho da cópia colunar ao lado do arquivo de dados
+    """
+    return os.path.join(os.path.dirname(caminho_dados), ARQUIVO_COLUNAR)
+
+
+def salvar_colunar(colheitas, caminho_dados='dados_colheitas.json', assinatura=None):
+    """
+    Grava a cópia colunar das colheitas com a assinatura dos dados
+
+    Parâmetros:
+        colheitas (list): Registros lidos do arquivo de dados
+        caminho_dados (str): Caminho de dados_colheitas.json
+        assinatura (dict): Assinatura tirada ANTES de ler os dados (None = atual)
+
+    Retorno:
+        bool: True se gravou, False em caso de erro
+    """
+    if assinatura is None:
+        assinatura = assinatura_dados(caminho_dados)
+    if assinatura is None:
+        return False
+    try:
+        exportar_colunar(colheitas, caminho_colunar(caminho_dados), assinatura)
+        return True
+    except Exception as e:
+        print(f"⚠️  Não foi possível gravar a cópia colunar: {e}")
+        return False
+
+
+def abrir_colunar_atual(caminho_dados='dados_colheitas.json'):
+    """
+    Abre a cópia colunar se ela ainda corresponder ao arquivo de dados
+
+    Retorno:
+        dict: Tabela de abrir_colunar (chame fechar_colunar ao terminar),
+              ou None se ausente, de outra versão ou desatualizada
+    """
+    try:
+        tabela = abrir_colunar(caminho_colunar(caminho_dados))
+    except (OSError, ValueError):
+        return None
+    if not confere_assinatura(tabela['assinatura'], caminho_dados):
+        fechar_colunar(tabela)
+        return None
+    return tabela
+
+
+def carregar_colunar(caminho_dados='dados_colheitas.json'):
+    """
+    Registros da cópia colunar, se ela ainda corresponder ao arquivo de dados
+
+    Retorno:
+        list: Lista de dicionários com dados das colheitas, ou None
+    """
+    tabela = abrir_colunar_atual(caminho_dados)
+    if tabela is None:
+        return None
+    try:
+        return colheitas_da_tabela(tabela)
+    finally:
+        fechar_colunar(tabela)
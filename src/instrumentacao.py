@@ -0,0 +1,462 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: instrumentacao.py
+Descrição: Métricas de latência das operações de banco de dados (chamadas,
+           idas e voltas ao servidor, linhas lidas e histogramas p50/p95/p99)
+
+Ativação: AGROTECH_METRICAS=1 (e AGROTECH_METRICAS_PORTA=9464 para expor o
+formato texto do Prometheus em http://localhost:9464/metrics)
+"""
+
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lido uma única vez: desligada, nenhuma função é embrulhada (custo zero por chamada)
+ATIVA = os.getenv('AGROTECH_METRICAS') == '1'
+
+ARQUIVO_METRICAS = 'metricas_banco.json'
+
+# Histograma logarítmico: cada balde cobre um fator de 2^(1/4) (~19%) a partir de 1 µs,
+# então o percentil estimado erra no máximo ~19% para cima
+BASE_BALDES = 1e-6
+FATOR_BALDES = 2 ** 0.25
+
+# Escada fixa exposta ao Prometheus: a cada 4 baldes internos (potências de 2 de
+# ~32 µs a ~33 s). Os limites coincidem com baldes internos, então as contagens
+# cumulativas são exatas, e a série é a mesma em toda coleta
+INDICES_PROMETHEUS = tuple(range(20, 101, 4))
+
+# Métricas por operação: {operacao: {'chamadas', 'erros', 'idas_e_voltas', 'linhas',
+#                                    'soma_s', 'max_s', 'baldes': {indice: contagem}}}
+METRICAS = {}
+_trava = threading.Lock()
+_contexto = threading.local()
+
+
+# ========================================
+# REGISTRO DAS MEDIÇÕES
+# ========================================
+
+def _metricas_operacao(operacao):
+    """
+    Retorna (criando se preciso) o registro de uma operação; chamar com a trava
+    """
+    registro = METRICAS.get(operacao)
+    if registro is None:
+        registro = METRICAS[operacao] = {'chamadas': 0, 'erros': 0, 'idas_e_voltas': 0, 'linhas': 0,
+                                         'soma_s': 0.0, 'max_s': 0.0, 'baldes': {}}
+    return registro
+
+
+def indice_balde(segundos):
+    """
+    Índice do balde logarítmico de uma duração (limite superior = BASE * FATOR^indice)
+    """
+    if segundos <= BASE_BALDES:
+        return 0
+    return math.ceil(math.log(segundos / BASE_BALDES, FATOR_BALDES))
+
+
+def limite_balde(indice):
+    """
+    Limite superior, em segundos, de um balde
+    """
+    return BASE_BALDES * FATOR_BALDES ** indice
+
+
+def registrar_latencia(operacao, segundos, erro=False):
+    """
+    Registra uma chamada concluída de uma operação
+    """
+    indice = indice_balde(segundos)
+    with _trava:
+        registro = _metricas_operacao(operacao)
+        registro['chamadas'] += 1
+        registro['erros'] += erro
+        registro['soma_s'] += segundos
+        registro['max_s'] = max(registro['max_s'], segundos)
+        registro['baldes'][indice] = registro['baldes'].get(indice, 0) + 1
+
+
+def _operacoes_em_curso():
+    """
+    Pilha de operações em execução na thread atual (externa → interna)
+    """
+    pilha = getattr(_contexto, 'pilha', None)
+    if pilha is None:
+        pilha = _contexto.pilha = []
+    return pilha
+
+
+def registrar_trafego(idas_e_voltas=0, linhas=0):
+    """
+    Soma idas e voltas e linhas lidas a todas as operações em curso na thread
+
+    Uma operação que chama outra (ex: atualizar_colheita → atualizar_colheitas_lote)
+    acumula também o tráfego da interna
+    """
+    pilha = _operacoes_em_curso() or ['(fora de operação)']
+    with _trava:
+        for operacao in set(pilha):
+            registro = _metricas_operacao(operacao)
+            registro['idas_e_voltas'] += idas_e_voltas
+            registro['linhas'] += linhas
+
+
+def percentil(baldes, fracao, maximo=None):
+    """
+    Estima um percentil a partir dos baldes do histograma
+
+    Parâmetros:
+        baldes (dict): {indice: contagem}
+        fracao (float): 0.5 para p50, 0.99 para p99
+        maximo (float): Maior valor observado (limita a estimativa)
+
+    Retorno:
+        float: Segundos (limite superior do balde que contém o percentil) ou None
+    """
+    total = sum(baldes.values())
+    if not total:
+        return None
+    alvo = fracao * total
+    acumulado = 0
+    for indice in sorted(baldes):
+        acumulado += baldes[indice]
+        if acumulado >= alvo:
+            limite = limite_balde(indice)
+            return min(limite, maximo) if maximo is not None else limite
+    return maximo
+
+
+def limpar_metricas():
+    """
+    Zera todas as métricas
+    """
+    with _trava:
+        METRICAS.clear()
+
+
+# ========================================
+# INSTRUMENTAÇÃO DAS FUNÇÕES
+# ========================================
+
+def cronometrar(operacao, funcao):
+    """
+    Embrulha uma função para registrar latência, erros e tráfego da operação
+
+    Geradores são cronometrados do início ao fim da iteração; o tráfego
+    gerado durante a iteração fica com a operação que os consome
+    """
+    if inspect.isgeneratorfunction(funcao):
+        @functools.wraps(funcao)
+        def gerador_instrumentado(*args, **kwargs):
+            inicio = time.perf_counter()
+            erro = True
+            try:
+                yield from funcao(*args, **kwargs)
+                erro = False
+            except GeneratorExit:
+                erro = False
+                raise
+            finally:
+                registrar_latencia(operacao, time.perf_counter() - inicio, erro)
+        return gerador_instrumentado
+
+    @functools.wraps(funcao)
+    def instrumentada(*args, **kwargs):
+        pilha = _operacoes_em_curso()
+        pilha.append(operacao)
+        inicio = time.perf_counter()
+        erro = True
+        try:
+            resultado = funcao(*args, **kwargs)
+            erro = False
+            return resultado
+        finally:
+            pilha.pop()
+            registrar_latencia(operacao, time.perf_counter() - inicio, erro)
+    return instrumentada
+
+
+def instrumentar_modulo(espaco, modulo, extras=()):
+    """
+    Embrulha as funções públicas definidas em um módulo (se as métricas estiverem ativas)
+
+    Parâmetros:
+        espaco (dict): globals() do módulo
+        modulo (str): __name__ do módulo (funções importadas de outros ficam de fora)
+        extras (tuple): Funções privadas que também devem ser medidas
+
+    Retorno:
+        list: Nomes das operações instrumentadas
+
+    As chamadas internas do módulo passam pelos globais, então também são medidas
+    """
+    if not ATIVA:
+        return []
+    nomes = [nome for nome, valor in espaco.items()
+             if inspect.isfunction(valor) and valor.__module__ == modulo
+             and (not nome.startswith('_') or nome in extras)]
+    for nome in nomes:
+        espaco[nome] = cronometrar(nome.lstrip('_'), espaco[nome])
+    return nomes
+
+
+# ========================================
+# CONEXÃO E CURSOR INSTRUMENTADOS
+# ========================================
+
+class CursorInstrumentado:
+    """
+    Cursor que conta idas e voltas e linhas lidas, repassando tudo ao cursor real
+
+    As leituras são estimadas como o driver faz: uma ida ao servidor a cada
+    'arraysize' linhas consumidas
+    """
+
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_lidas', 0)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._cursor, nome, valor)
+
+    def _contar_leitura(self, quantidade):
+        antes = self._lidas
+        object.__setattr__(self, '_lidas', antes + quantidade)
+        lote = max(getattr(self._cursor, 'arraysize', 100) or 1, 1)
+        registrar_trafego(math.ceil((antes + quantidade) / lote) - math.ceil(antes / lote), quantidade)
+
+    def execute(self, *args, **kwargs):
+        object.__setattr__(self, '_lidas', 0)
+        registrar_trafego(1)
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        registrar_trafego(1)
+        return self._cursor.executemany(*args, **kwargs)
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        self._contar_leitura(linha is not None)
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        linhas = self._cursor.fetchmany(*args, **kwargs)
+        self._contar_leitura(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contar_leitura(len(linhas))
+        return linhas
+
+    def __iter__(self):
+        for linha in self._cursor:
+            self._contar_leitura(1)
+            yield linha
+
+
+class ConexaoInstrumentada:
+    """
+    Conexão que devolve cursores instrumentados e conta commits, rollbacks e
+    os lotes de fetch_df_batches (leitura Arrow direto da conexão)
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._conn, nome)
+        if nome == 'fetch_df_batches':
+            # Embrulhado aqui, e não como método, para hasattr seguir refletindo o driver
+            return functools.partial(_lotes_df_instrumentados, atributo)
+        return atributo
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        registrar_trafego(1)
+        return self._conn.commit()
+
+    def rollback(self):
+        registrar_trafego(1)
+        return self._conn.rollback()
+
+
+def _lotes_df_instrumentados(fetch_df_batches, *args, **kwargs):
+    """
+    Repassa os lotes de conn.fetch_df_batches contando uma ida ao servidor para
+    executar, uma por lote e as linhas de cada lote
+    """
+    registrar_trafego(1)
+    for df in fetch_df_batches(*args, **kwargs):
+        registrar_trafego(1, df.num_rows())
+        yield df
+
+
+def instrumentar_conexao(conn):
+    """
+    Embrulha a conexão se as métricas estiverem ativas (senão devolve a própria)
+    """
+    if not ATIVA or conn is None:
+        return conn
+    return ConexaoInstrumentada(conn)
+
+
+# ========================================
+# EXPOSIÇÃO (MENU, JSON E PROMETHEUS)
+# ========================================
+
+def exportar_metricas():
+    """
+    Fotografia das métricas em formato serializável
+
+    Retorno:
+        dict: {'gerado_em', 'operacoes': {operacao: {..., 'latencia_ms': {...}}}}
+    """
+    with _trava:
+        copia = {operacao: dict(registro, baldes=dict(registro['baldes'])) for operacao, registro in METRICAS.items()}
+
+    operacoes = {}
+    for operacao, registro in sorted(copia.items()):
+        chamadas = registro['chamadas']
+        operacoes[operacao] = {
+            'chamadas': chamadas,
+            'erros': registro['erros'],
+            'idas_e_voltas': registro['idas_e_voltas'],
+            'linhas': registro['linhas'],
+            'latencia_ms': {
+                'media': registro['soma_s'] / chamadas * 1000 if chamadas else None,
+                'p50': _em_ms(percentil(registro['baldes'], 0.50, registro['max_s'])),
+                'p95': _em_ms(percentil(registro['baldes'], 0.95, registro['max_s'])),
+                'p99': _em_ms(percentil(registro['baldes'], 0.99, registro['max_s'])),
+                'max': registro['max_s'] * 1000 if chamadas else None,
+            },
+            'baldes': {str(indice): contagem for indice, contagem in sorted(registro['baldes'].items())},
+        }
+    return {'gerado_em': datetime.now().isoformat(timespec='seconds'), 'operacoes': operacoes}
+
+
+def _em_ms(segundos):
+    return None if segundos is None else segundos * 1000
+
+
+def salvar_metricas(caminho=ARQUIVO_METRICAS):
+    """
+    Grava as métricas em JSON
+    """
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(exportar_metricas(), arquivo, indent=4, ensure_ascii=False)
+
+
+def exibir_metricas():
+    """
+    Exibe a tabela de métricas por operação (opção do menu)
+    """
+    if not ATIVA:
+        print("\n⚠️  Métricas desligadas. Inicie com AGROTECH_METRICAS=1 para medir o banco.")
+        return
+
+    operacoes = exportar_metricas()['operacoes']
+    print("\n" + "="*92)
+    print("⏱️  MÉTRICAS DO BANCO DE DADOS")
+    print("="*92)
+    if not operacoes:
+        print("Nenhuma operação no banco até agora.")
+        return
+    print(f"{'Operação':<30} {'chamadas':>8} {'erros':>5} {'idas/voltas':>11} {'linhas':>9} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    print("-"*92)
+    for operacao, m in operacoes.items():
+        latencia = m['latencia_ms']
+        print(f"{operacao:<30} {m['chamadas']:>8} {m['erros']:>5} {m['idas_e_voltas']:>11} {m['linhas']:>9} "
+              + " ".join(f"{latencia[p]:>7.1f}" if latencia[p] is not None else f"{'-':>7}"
+                         for p in ('p50', 'p95', 'p99')))
+    print("="*92)
+
+
+def formatar_prometheus():
+    """
+    Métricas no formato texto do Prometheus (histograma com baldes cumulativos
+    na escada fixa INDICES_PROMETHEUS, inclusive os vazios)
+
+    Retorno:
+        str: Corpo da resposta de /metrics
+    """
+    with _trava:
+        copia = {operacao: dict(registro, baldes=dict(registro['baldes'])) for operacao, registro in METRICAS.items()}
+
+    linhas = []
+    for metrica, campo, ajuda in (
+            ('agrotech_db_chamadas_total', 'chamadas', 'Chamadas por operação'),
+            ('agrotech_db_erros_total', 'erros', 'Chamadas que terminaram em exceção'),
+            ('agrotech_db_idas_e_voltas_total', 'idas_e_voltas', 'Idas e voltas ao servidor'),
+            ('agrotech_db_linhas_lidas_total', 'linhas', 'Linhas lidas do servidor')):
+        linhas.append(f"# HELP {metrica} {ajuda}")
+        linhas.append(f"# TYPE {metrica} counter")
+        for operacao, registro in sorted(copia.items()):
+            linhas.append(f'{metrica}{{operacao="{operacao}"}} {registro[campo]}')
+
+    metrica = 'agrotech_db_latencia_segundos'
+    linhas.append(f"# HELP {metrica} Latência das operações")
+    linhas.append(f"# TYPE {metrica} histogram")
+    for operacao, registro in sorted(copia.items()):
+        baldes = sorted(registro['baldes'].items())
+        acumulado, posicao = 0, 0
+        for limite in INDICES_PROMETHEUS:
+            while posicao < len(baldes) and baldes[posicao][0] <= limite:
+                acumulado += baldes[posicao][1]
+                posicao += 1
+            linhas.append(f'{metrica}_bucket{{operacao="{operacao}",le="{limite_balde(limite):.6g}"}} {acumulado}')
+        linhas.append(f'{metrica}_bucket{{operacao="{operacao}",le="+Inf"}} {registro["chamadas"]}')
+        linhas.append(f'{metrica}_sum{{operacao="{operacao}"}} {registro["soma_s"]:.9f}')
+        linhas.append(f'{metrica}_count{{operacao="{operacao}"}} {registro["chamadas"]}')
+    return "\n".join(linhas) + "\n"
+
+
+class _RespostaPrometheus(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = formatar_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        # Sem log no terminal: o menu continua legível
+        pass
+
+
+def iniciar_servidor_metricas(porta=None, endereco='127.0.0.1'):
+    """
+    Expõe /metrics em segundo plano (se as métricas estiverem ativas)
+
+    Parâmetros:
+        porta (int): Porta HTTP (padrão: AGROTECH_METRICAS_PORTA; sem ela, não inicia)
+        endereco (str): Interface de escuta (padrão: só a máquina local)
+
+    Retorno:
+        ThreadingHTTPServer: Servidor iniciado ou None
+    """
+    porta = porta if porta is not None else os.getenv('AGROTECH_METRICAS_PORTA')
+    if not ATIVA or porta is None:
+        return None
+    servidor = ThreadingHTTPServer((endereco, int(porta)), _RespostaPrometheus)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
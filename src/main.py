@@ -17,37 +17,71 @@ Data: 2025
 
 import json
 import os
+import sys
 from datetime import datetime
 from funcoes import *
 from database import *
+from analises import *
+from cubo import *
+from esbocos import *
+from fragmentos import carregar_fragmentos, acrescentar_fragmentos, agregar_fragmentos, esbocos_fragmentos
+from instantaneo import (carregar_instantaneo, salvar_instantaneo, assinatura_dados, carregar_colunar,
+                         salvar_colunar, abrir_colunar_atual)
+from colunar import agrupar_colunar, fechar_colunar
+from armazenamento import (ler_colheitas, acrescentar_colheitas, substituir_colheitas,
+                           atualizar_colheita_json, deletar_colheita_json, gerar_id,
+                           filtrar_colheitas, deletar_colheitas_json_lote, identidade_dados,
+                           agrupar_colheitas_gravadas)
+from gravacao import gravar_em_paralelo, registrar_pendencia, carregar_pendencias, reprocessar_pendencias
+import instrumentacao
+from instrumentacao import exibir_metricas, salvar_metricas, iniciar_servidor_metricas
+import rastreamento
+from rastreamento import exibir_planos
+import perfil
+from perfil import perfilar, perfilado
+from relatorio import gerar_relatorio_txt
 
 # ========================================
 # MANIPULAÇÃO DE ARQUIVO JSON
 # ========================================
 
-def carregar_json():
+@perfilado()
+def carregar_json(assinatura=None):
     """
     Carrega dados do arquivo JSON
 
+    Parâmetros:
+        assinatura (dict): Assinatura tirada antes da leitura; se informada, a
+                           cópia colunar é regravada quando o JSON precisar ser lido
+
     Retorno:
         list: Lista de dicionários com colheitas
 
     Aplicação: Manipulação de arquivo JSON (Capítulo 5)
     Estrutura: LISTA de DICIONÁRIOS
     """
-    try:
-        with open('dados_colheitas.json', 'r', encoding='utf-8') as arquivo:
-            dados = json.load(arquivo)
-            print(f"✅ {len(dados)} colheitas carregadas do JSON")
-            return dados
-    except FileNotFoundError:
+    if not os.path.exists('dados_colheitas.json'):
         print("⚠️  Arquivo JSON não encontrado. Criando novo...")
         return []
+
+    # Cópia colunar ainda válida: colunas de largura fixa, sem analisar o JSON
+    dados = carregar_colunar('dados_colheitas.json')
+    if dados is not None:
+        print(f"✅ {len(dados)} colheitas carregadas da cópia colunar")
+        return dados
+    try:
+        # Leitura sem trava: as gravações são atômicas (ver armazenamento.py)
+        dados = ler_colheitas('dados_colheitas.json')
+        print(f"✅ {len(dados)} colheitas carregadas do JSON")
+        if assinatura:
+            salvar_colunar(dados, 'dados_colheitas.json', assinatura)
+        return dados
     except json.JSONDecodeError:
         print("⚠️  Arquivo JSON corrompido. Iniciando lista vazia...")
         return []
 
 
+@perfilado()
 def salvar_json(colheitas):
     """
     Salva dados no arquivo JSON
@@ -58,119 +92,30 @@ def salvar_json(colheitas):
     Retorno:
         None
 
-    Aplicação: Manipulação de arquivo JSON (Capítulo 5)
+    Aplicação: Manipulação de arquivo JSON (Capítulo 5); só as colheitas
+    novas, alteradas ou removidas são gravadas (diário de alterações)
     """
     try:
-        with open('dados_colheitas.json', 'w', encoding='utf-8') as arquivo:
-            json.dump(colheitas, arquivo, indent=4, ensure_ascii=False)
+        substituir_colheitas(colheitas, 'dados_colheitas.json')
         print("✅ Dados salvos em JSON!")
     except Exception as e:
         print(f"❌ Erro ao salvar JSON: {e}")
 
 
-# ========================================
-# MANIPULAÇÃO DE ARQUIVO TEXTO
-# ========================================
-
-def gerar_relatorio_txt(colheitas):
-    """
-    Gera relatório detalhado em arquivo texto
-
-    Parâmetros:
-        colheitas (list): Lista de dicionários com colheitas
-
-    Retorno:
-        None
-
-    Aplicação: Manipulação de arquivo TXT (Capítulo 5)
-    """
-    if not colheitas:
-        print("⚠️  Nenhuma colheita para gerar relatório.")
-        return
-
-    try:
-        with open('relatorio.txt', 'w', encoding='utf-8') as arquivo:
-            # Cabeçalho
-            arquivo.write("="*70 + "\n")
-            arquivo.write("RELATÓRIO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR\n")
-            arquivo.write("Sistema de Monitoramento - FIAP\n")
-            arquivo.write(f"Data de geração: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-            arquivo.write("="*70 + "\n\n")
-
-            # Estatísticas gerais
-            total_ton = sum(c['toneladas'] for c in colheitas)
-            total_perda = sum(c['perda_toneladas'] for c in colheitas)
-            total_prejuizo = sum(c['prejuizo_reais'] for c in colheitas)
-
-            arquivo.write("RESUMO GERAL\n")
-            arquivo.write("-"*70 + "\n")
-            arquivo.write(f"Total de colheitas: {len(colheitas)}\n")
-            arquivo.write(f"Total produzido: {total_ton:,.2f} toneladas\n")
-            arquivo.write(f"Total perdido: {total_perda:,.2f} toneladas\n")
-            arquivo.write(f"Prejuízo total: R$ {total_prejuizo:,.2f}\n")
-            arquivo.write(f"Perda média: {(total_perda/total_ton*100):.2f}%\n")
-            arquivo.write("="*70 + "\n\n")
-
-            # Detalhamento de cada colheita
-            arquivo.write("DETALHAMENTO DAS COLHEITAS\n")
-            arquivo.write("="*70 + "\n\n")
-
-            for i, col in enumerate(colheitas, 1):
-                arquivo.write(f"COLHEITA #{i:03d}\n")
-                arquivo.write("-"*70 + "\n")
-                arquivo.write(f"Fazenda: {col['fazenda']}\n")
-                arquivo.write(f"Data: {col['data']}\n")
-                arquivo.write(f"Tipo de colheita: {col['tipo_colheita'].upper()}\n")
-                arquivo.write(f"Toneladas colhidas: {col['toneladas']:,.2f} t\n")
-                arquivo.write(f"Perda percentual: {col['perda_percentual']*100:.1f}%\n")
-                arquivo.write(f"Perda em toneladas: {col['perda_toneladas']:,.2f} t\n")
-                arquivo.write(f"Prejuízo estimado: R$ {col['prejuizo_reais']:,.2f}\n")
-                arquivo.write("-"*70 + "\n\n")
-
-            # Comparativo por tipo
-            manuais = [c for c in colheitas if c['tipo_colheita'] == 'manual']
-            mecanicas = [c for c in colheitas if c['tipo_colheita'] == 'mecanica']
-
-            arquivo.write("COMPARATIVO: MANUAL vs MECÂNICA\n")
-            arquivo.write("="*70 + "\n\n")
-
-            if manuais:
-                arquivo.write("COLHEITA MANUAL:\n")
-                arquivo.write(f"  Quantidade: {len(manuais)} colheitas\n")
-                arquivo.write(f"  Total produzido: {sum(c['toneladas'] for c in manuais):,.2f} t\n")
-                arquivo.write(f"  Total perdido: {sum(c['perda_toneladas'] for c in manuais):,.2f} t\n")
-                arquivo.write(f"  Prejuízo: R$ {sum(c['prejuizo_reais'] for c in manuais):,.2f}\n\n")
-
-            if mecanicas:
-                arquivo.write("COLHEITA MECÂNICA:\n")
-                arquivo.write(f"  Quantidade: {len(mecanicas)} colheitas\n")
-                arquivo.write(f"  Total produzido: {sum(c['toneladas'] for c in mecanicas):,.2f} t\n")
-                arquivo.write(f"  Total perdido: {sum(c['perda_toneladas'] for c in mecanicas):,.2f} t\n")
-                arquivo.write(f"  Prejuízo: R$ {sum(c['prejuizo_reais'] for c in mecanicas):,.2f}\n\n")
-
-            # Rodapé
-            arquivo.write("="*70 + "\n")
-            arquivo.write("Fim do relatório\n")
-            arquivo.write("Sistema desenvolvido para FIAP - 2025\n")
-
-        print("✅ Relatório gerado: relatorio.txt")
-        print(f"📄 Total de colheitas incluídas: {len(colheitas)}")
-
-    except Exception as e:
-        print(f"❌ Erro ao gerar relatório: {e}")
-
-
 # ========================================
 # FUNÇÃO DE CADASTRO (INTEGRANDO TUDO)
 # ========================================
 
-def cadastrar_colheita(colheitas, conn):
+def cadastrar_colheita(colheitas, conn, cubo=None, esbocos=None, diretorio_fragmentos=None):
     """
     Cadastra nova colheita integrando JSON e Oracle
 
     Parâmetros:
         colheitas (list): Lista de dicionários (memória)
         conn: Conexão Oracle
+        cubo (dict): Cubo de agregados (atualizado só nas células afetadas)
+        esbocos (dict): Esboços de estatísticas aproximadas (atualização incremental)
+        diretorio_fragmentos (str): Se informado, grava nos fragmentos em vez do JSON único
 
     Retorno:
         None
@@ -220,19 +165,233 @@ def cadastrar_colheita(colheitas, conn):
     confirmacao = input("\nConfirmar cadastro? (S/N): ").strip().upper()
 
     if confirmacao == 'S':
-        # Salvando em lista (Capítulo 4 - Lista)
-        colheitas.append(colheita)
+        with perfilar('opcao_1'):
+            # Id estável antes de gravar: novas tentativas não duplicam a colheita no JSON
+            colheita['id'] = gerar_id()
+
+            # Salvando em JSON (Capítulo 5) e no Oracle (Capítulo 6) ao mesmo tempo
+            tarefas = {'json': lambda: gravar_colheita_local(colheita, diretorio_fragmentos)}
+            if conn:
+                tarefas['oracle'] = lambda: inserir_colheita(conn, colheita)
+            resultados = gravar_em_paralelo(tarefas)
+
+            # Salvando em lista (Capítulo 4 - Lista)
+            novas = [colheita]
+            if resultados['json']['ok']:
+                print("✅ Dados salvos nos fragmentos JSON!" if diretorio_fragmentos else "✅ Dados salvos em JSON!")
+            colheitas.extend(novas)
+
+            # Destino que falhou mesmo após as tentativas vai para a fila de pendências
+            for destino, resultado in resultados.items():
+                if not resultado['ok']:
+                    print(f"❌ Falha ao gravar em {destino.upper()}: {resultado['erro']}")
+                    registrar_pendencia(destino, colheita, resultado['erro'])
+                    print("⚠️  Gravação pendente registrada (reprocessar pela opção 15)")
+
+            # Atualizando o cubo de agregados (apenas as células das colheitas novas);
+            # com fragmentos o cubo fica só em memória (o salvo descreve o JSON único)
+            if cubo is not None:
+                atualizar_cubo(cubo, novas)
+                if not diretorio_fragmentos:
+                    salvar_cubo(cubo)
+
+            # Atualizando os esboços de quantis e fazendas distintas
+            if esbocos is not None:
+                atualizar_esbocos(esbocos, novas)
+                if not diretorio_fragmentos:
+                    salvar_esbocos(esbocos)
+
+            print("\n✅ Colheita cadastrada com sucesso!")
+    else:
+        print("\n❌ Cadastro cancelado.")
 
-        # Salvando em JSON (Capítulo 5 - Arquivo JSON)
-        salvar_json(colheitas)
 
-        # Salvando no Oracle (Capítulo 6 - Banco de dados)
-        if conn:
-            inserir_colheita(conn, colheita)
+def gravar_colheita_local(colheita, diretorio_fragmentos=None):
+    """
+    Grava uma colheita no armazenamento local (JSON único ou fragmentos)
+
+    Retorno:
+        list/dict: Colheitas gravadas (JSON único) ou manifesto (fragmentos)
+    """
+    if diretorio_fragmentos:
+        return acrescentar_fragmentos([colheita], diretorio_fragmentos)
+    return acrescentar_colheitas([colheita], 'dados_colheitas.json')
+
+
+def reprocessar_pendencias_menu(conn, diretorio_fragmentos=None):
+    """
+    Reprocessa as gravações pendentes (JSON e, se conectado, Oracle)
+    """
+    pendencias = carregar_pendencias()
+    if not pendencias:
+        print("\n✅ Nenhuma gravação pendente.")
+        return
 
-        print("\n✅ Colheita cadastrada com sucesso!")
+    gravadores = {'json': lambda colheita: gravar_colheita_local(colheita, diretorio_fragmentos)}
+    if conn:
+        gravadores['oracle'] = lambda colheita: inserir_colheita(conn, colheita)
     else:
-        print("\n❌ Cadastro cancelado.")
+        print("⚠️  Oracle indisponível: pendências do Oracle continuam na fila.")
+
+    reprocessadas, restantes = reprocessar_pendencias(gravadores)
+    print(f"\n✅ {reprocessadas} gravações reprocessadas; {restantes} continuam pendentes.")
+
+
+# ========================================
+# ATUALIZAÇÃO E REMOÇÃO LOCAIS (JSON)
+# ========================================
+
+def _escolher_colheita(colheitas):
+    """
+    Pede o número de uma colheita (conforme a listagem da opção 2)
+
+    Retorno:
+        dict: Colheita escolhida ou None se o número for inválido
+    """
+    if not colheitas:
+        print("\n⚠️  Nenhuma colheita cadastrada ainda.")
+        return None
+    numero = input(f"Número da colheita (1 a {len(colheitas)}, ver opção 2): ").strip()
+    if not numero.isdigit() or not 1 <= int(numero) <= len(colheitas):
+        print("❌ Número inválido!")
+        return None
+    return colheitas[int(numero) - 1]
+
+
+def atualizar_colheita_menu(colheitas, cubo=None):
+    """
+    Atualiza um campo de uma colheita local (perda e prejuízo são recalculados)
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários (memória)
+        cubo (dict): Cubo de agregados (retira a versão antiga e soma a nova)
+
+    Retorno:
+        bool: True se atualizou
+    """
+    colheita = _escolher_colheita(colheitas)
+    if colheita is None:
+        return False
+
+    print(f"\n{colheita['fazenda']} - {colheita['data']} - {colheita['tipo_colheita']} - "
+          f"{colheita['toneladas']:,.2f} t")
+    campo = input("Campo (fazenda/tipo_colheita/toneladas): ").strip().lower()
+    if campo == 'tipo_colheita':
+        novo_valor = validar_tipo_colheita("Novo tipo (manual/mecanica): ")
+    elif campo == 'toneladas':
+        novo_valor = validar_numero_positivo("Novas toneladas: ")
+    else:
+        novo_valor = input("Novo valor: ").strip()
+
+    with perfilar('opcao_13'):
+        resultado = atualizar_colheita_json(colheitas, colheita['id'], campo, novo_valor, 'dados_colheitas.json')
+        if resultado is None:
+            return False
+
+        antiga, nova = resultado
+        if cubo is not None:
+            atualizar_cubo(cubo, [antiga], sinal=-1)
+            atualizar_cubo(cubo, [nova])
+            salvar_cubo(cubo)
+        descartar_esbocos()
+        return True
+
+
+def remover_colheita_menu(colheitas, cubo=None):
+    """
+    Remove uma colheita local após confirmação
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários (memória)
+        cubo (dict): Cubo de agregados (a colheita é retirada das células)
+
+    Retorno:
+        bool: True se removeu
+    """
+    colheita = _escolher_colheita(colheitas)
+    if colheita is None:
+        return False
+
+    print(f"\n{colheita['fazenda']} - {colheita['data']} - {colheita['tipo_colheita']} - "
+          f"{colheita['toneladas']:,.2f} t")
+    if input("Confirmar remoção? (S/N): ").strip().upper() != 'S':
+        print("\n❌ Remoção cancelada.")
+        return False
+
+    with perfilar('opcao_14'):
+        removida = deletar_colheita_json(colheitas, colheita['id'], 'dados_colheitas.json')
+        if removida is None:
+            return False
+
+        if cubo is not None:
+            atualizar_cubo(cubo, [removida], sinal=-1)
+            salvar_cubo(cubo)
+        descartar_esbocos()
+        return True
+
+
+def _ler_data_opcional(mensagem):
+    """
+    Lê uma data DD/MM/AAAA opcional (Enter = sem limite)
+
+    Retorno:
+        str: Data válida ou None
+    """
+    while True:
+        data = input(mensagem).strip()
+        if not data:
+            return None
+        try:
+            datetime.strptime(data, '%d/%m/%Y')
+            return data
+        except ValueError:
+            print("❌ Data inválida! Use DD/MM/AAAA.")
+
+
+def remover_em_lote_menu(colheitas, conn, cubo=None):
+    """
+    Remove colheitas por fazenda e/ou período no JSON e no Oracle
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários (memória)
+        conn: Conexão Oracle (None = só o JSON)
+        cubo (dict): Cubo de agregados (colheitas removidas são retiradas)
+
+    Retorno:
+        bool: True se removeu algo no JSON
+    """
+    fazenda = input("Fazenda (nome exato, Enter = todas): ").strip() or None
+    data_inicio = _ler_data_opcional("Data inicial DD/MM/AAAA (Enter = sem limite): ")
+    data_fim = _ler_data_opcional("Data final DD/MM/AAAA (Enter = sem limite): ")
+    if not (fazenda or data_inicio or data_fim):
+        print("❌ Informe fazenda e/ou período!")
+        return False
+
+    quantidade = len(filtrar_colheitas(colheitas, fazenda=fazenda, data_inicio=data_inicio, data_fim=data_fim))
+    print(f"\n⚠️  {quantidade} colheitas no JSON atendem ao filtro"
+          f"{' (o Oracle também será filtrado)' if conn else ''}.")
+    if input("Confirmar remoção em lote? (S/N): ").strip().upper() != 'S':
+        print("\n❌ Remoção cancelada.")
+        return False
+
+    with perfilar('opcao_16'):
+        removidas = deletar_colheitas_json_lote(colheitas, fazenda=fazenda, data_inicio=data_inicio,
+                                                data_fim=data_fim, caminho_dados='dados_colheitas.json')
+        if removidas:
+            print(f"✅ {len(removidas)} colheitas removidas do JSON!")
+            if cubo is not None:
+                atualizar_cubo(cubo, removidas, sinal=-1)
+                salvar_cubo(cubo)
+            descartar_esbocos()
+
+        if conn:
+            def exibir_progresso(feitas, total):
+                print(f"   Oracle: {feitas}/{total} removidas", end='\r')
+            total_oracle = deletar_colheitas_filtro(conn, fazenda, data_inicio, data_fim,
+                                                    progresso=exibir_progresso)
+            if total_oracle is not None:
+                print(f"\n✅ {total_oracle} colheitas removidas do Oracle!")
+        return bool(removidas)
 
 
 # ========================================
@@ -295,60 +454,47 @@ def listar_colheitas_oracle_menu(conn):
     print("="*60)
 
 
-def exibir_estatisticas_oracle_menu(conn):
-    """
-    Exibe estatísticas do Oracle
+def agrupar_por_tipo_oracle(conn):
     """
-    if not conn:
-        print("❌ Não conectado ao Oracle!")
-        return
-
-    stats = obter_estatisticas_oracle(conn)
-
-    if not stats or stats['total_colheitas'] == 0:
-        print("\n⚠️  Nenhum dado no Oracle ainda.")
-        return
-
-    print("\n" + "="*60)
-    print("📊 ESTATÍSTICAS DO ORACLE DATABASE")
-    print("="*60)
-    print(f"Total de colheitas: {stats['total_colheitas']}")
-    print(f"Total produzido: {stats['total_toneladas']:,.2f} toneladas")
-    print(f"Total perdido: {stats['total_perda_toneladas']:,.2f} toneladas")
-    print(f"Prejuízo total: R$ {stats['total_prejuizo']:,.2f}")
-    print(f"Perda média: {stats['media_perda_percentual']*100:.1f}%")
-    print("="*60)
+    Agrupamento por tipo do Oracle para estatísticas e comparativo
 
+    Retorno:
+        dict: Agrupamento por ('tipo_colheita',), ou None sem conexão ou em erro
 
-def exibir_comparativo_oracle_menu(conn):
-    """
-    Exibe comparativo manual vs mecânica do Oracle
+    Aplicação: o banco devolve uma linha por tipo (GROUP BY), no mesmo
+    formato que as opções 3 e 4 exibem
     """
     if not conn:
         print("❌ Não conectado ao Oracle!")
-        return
+        return None
+    return obter_agrupamento_tipos_oracle(conn)
 
-    manual, mecanica = obter_comparativo_tipos_oracle(conn)
 
-    print("\n" + "="*60)
-    print("📊 COMPARATIVO: MANUAL vs MECÂNICA (ORACLE)")
-    print("="*60)
-
-    if manual['quantidade'] > 0:
-        print("\n🌾 COLHEITA MANUAL:")
-        print(f"  Quantidade: {manual['quantidade']} colheitas")
-        print(f"  Total produzido: {manual['total_toneladas']:,.2f} t")
-        print(f"  Total perdido: {manual['total_perda']:,.2f} t")
-        print(f"  Prejuízo: R$ {manual['total_prejuizo']:,.2f}")
+def agrupar_por_tipo(colheitas, diretorio_fragmentos=None):
+    """
+    Agrupamento por tipo para estatísticas e comparativo
 
-    if mecanica['quantidade'] > 0:
-        print("\n🚜 COLHEITA MECÂNICA:")
-        print(f"  Quantidade: {mecanica['quantidade']} colheitas")
-        print(f"  Total produzido: {mecanica['total_toneladas']:,.2f} t")
-        print(f"  Total perdido: {mecanica['total_perda']:,.2f} t")
-        print(f"  Prejuízo: R$ {mecanica['total_prejuizo']:,.2f}")
+    Retorno:
+        dict: Agrupamento por ('tipo_colheita',)
 
-    print("="*60)
+    Aplicação: com fragmentos, cada um é agregado no seu processo e os grupos
+    mesclados; com segmentos em dia, soma os grupos pré-calculados do índice
+    sem ler nenhum segmento; senão, com a cópia colunar ainda válida, agrupa
+    direto das colunas mapeadas; depois de uma atualização ou remoção na
+    sessão nenhuma das duas vale e o agrupamento vem dos registros em memória
+    """
+    if diretorio_fragmentos:
+        return agregar_fragmentos(diretorio_fragmentos, (('tipo_colheita',),))[('tipo_colheita',)]
+    por_tipo = agrupar_colheitas_gravadas('dados_colheitas.json')
+    if por_tipo is not None:
+        return por_tipo
+    tabela = abrir_colunar_atual('dados_colheitas.json')
+    if tabela is None:
+        return agrupar_colheitas(colheitas, ('tipo_colheita',))
+    try:
+        return agrupar_colunar(tabela)
+    finally:
+        fechar_colunar(tabela)
 
 
 # ========================================
@@ -361,15 +507,54 @@ def menu_principal():
 
     Aplica: Todos os conteúdos dos capítulos 3, 4, 5 e 6
     """
-    # Carrega dados do JSON (Capítulo 5)
-    colheitas = carregar_json()
-
-    # Conecta ao Oracle (Capítulo 6)
-    print("\n🔌 Conectando ao Oracle Database...")
-    conn = conectar_oracle()
-
-    if conn:
-        criar_tabela(conn)
+    # Carrega dados do JSON (Capítulo 5), ou dos fragmentos se configurados.
+    # Com o JSON inalterado desde a última execução, tudo vem do cache de inicialização
+    with perfilar('inicializacao'):
+        diretorio_fragmentos = os.getenv('AGROTECH_FRAGMENTOS')
+        instantaneo = None if diretorio_fragmentos else carregar_instantaneo()
+
+        if instantaneo:
+            colheitas = instantaneo['colheitas']
+            cubo = instantaneo['cubo']
+            esbocos = instantaneo['esbocos']
+            indice_fazendas = instantaneo['indice_fazendas']
+            print(f"✅ {len(colheitas)} colheitas carregadas do cache de inicialização")
+        else:
+            assinatura = None if diretorio_fragmentos else assinatura_dados()
+            identidade = None if diretorio_fragmentos else identidade_dados()
+            if diretorio_fragmentos:
+                colheitas = carregar_fragmentos(diretorio_fragmentos)
+                # Cubo e esboços salvos descrevem o JSON único: com fragmentos
+                # são montados em memória (os esboços por fragmento, nos processos)
+                cubo = reconstruir_cubo(colheitas)
+                esbocos = esbocos_fragmentos(diretorio_fragmentos)
+            else:
+                colheitas = carregar_json(assinatura)
+                cubo = carregar_cubo(colheitas, identidade=identidade)
+                esbocos = carregar_esbocos(colheitas, identidade=identidade)
+            indice_fazendas = indexar_fazendas(colheitas)
+
+            if assinatura:
+                salvar_instantaneo({
+                    'colheitas': colheitas,
+                    'cubo': cubo,
+                    'esbocos': esbocos,
+                    'indice_fazendas': indice_fazendas,
+                }, assinatura=assinatura)
+
+    # Conexão Oracle (Capítulo 6) sob demanda: o driver é importado e a conexão
+    # aberta só na primeira opção que usa o banco. Com AGROTECH_AQUECER_ORACLE=1
+    # isso acontece em segundo plano enquanto o menu já está na tela
+    oracle = criar_conexao_sob_demanda(aquecer=os.getenv('AGROTECH_AQUECER_ORACLE') == '1')
+
+    # Métricas do banco (AGROTECH_METRICAS=1); /metrics com AGROTECH_METRICAS_PORTA
+    servidor_metricas = iniciar_servidor_metricas()
+    if servidor_metricas:
+        print(f"📈 Métricas em http://127.0.0.1:{servidor_metricas.server_address[1]}/metrics")
+
+    pendencias = carregar_pendencias()
+    if pendencias:
+        print(f"⚠️  {len(pendencias)} gravações pendentes (reprocessar pela opção 15)")
 
     # Loop principal
     while True:
@@ -385,60 +570,162 @@ def menu_principal():
         print("7 - Estatísticas (Oracle)")
         print("8 - Comparativo (Oracle)")
         print("9 - Buscar colheita por fazenda")
+        print("10 - Tendência de perdas (mês/safra)")
+        print("11 - Ranking das fazendas que mais perdem")
+        print("12 - Estatísticas aproximadas (quantis e fazendas distintas)")
+        print("13 - Atualizar colheita (JSON)")
+        print("14 - Remover colheita (JSON)")
+        print("15 - Reprocessar gravações pendentes")
+        print("16 - Remover colheitas em lote (fazenda/período)")
+        print("17 - Métricas do banco de dados")
+        print("18 - Planos de execução (rastreio SQL)")
         print("0 - Sair")
         print("="*60)
 
         opcao = input("Escolha uma opção: ").strip()
 
+        # Com AGROTECH_PERFIL=1 ou --perfil (perfis/), cada opção perfila só o
+        # trabalho feito depois das perguntas (as opções 1, 13, 14 e 16 perguntam
+        # dentro das funções e perfilam lá, depois da confirmação)
+
         # Match case (Python 3.10+)
         match opcao:
             case '1':
-                cadastrar_colheita(colheitas, conn)
+                antes = len(colheitas)
+                if esbocos is None:
+                    esbocos = carregar_esbocos(colheitas)
+                cadastrar_colheita(colheitas, obter_conexao(oracle), cubo, esbocos, diretorio_fragmentos)
+                indexar_fazendas(colheitas, indice_fazendas, antes)
 
             case '2':
-                listar_colheitas_json(colheitas)
+                with perfilar('opcao_2'):
+                    listar_colheitas_json(colheitas)
 
+            # Com fragmentos, cada um é agregado no seu processo (agregar_fragmentos)
             case '3':
-                exibir_estatisticas(colheitas)
+                with perfilar('opcao_3'):
+                    exibir_estatisticas_agrupadas(agrupar_por_tipo(colheitas, diretorio_fragmentos))
 
             case '4':
-                exibir_comparativo_tipos(colheitas)
+                with perfilar('opcao_4'):
+                    exibir_comparativo_agrupado(agrupar_por_tipo(colheitas, diretorio_fragmentos))
 
             case '5':
-                gerar_relatorio_txt(colheitas)
+                with perfilar('opcao_5'):
+                    gerar_relatorio_txt(colheitas, cubo)
 
             case '6':
-                listar_colheitas_oracle_menu(conn)
+                with perfilar('opcao_6'):
+                    listar_colheitas_oracle_menu(obter_conexao(oracle))
 
             case '7':
-                exibir_estatisticas_oracle_menu(conn)
+                with perfilar('opcao_7'):
+                    por_tipo = agrupar_por_tipo_oracle(obter_conexao(oracle))
+                    if por_tipo is not None:
+                        exibir_estatisticas_agrupadas(por_tipo, 'Oracle')
 
             case '8':
-                exibir_comparativo_oracle_menu(conn)
+                with perfilar('opcao_8'):
+                    por_tipo = agrupar_por_tipo_oracle(obter_conexao(oracle))
+                    if por_tipo is not None:
+                        exibir_comparativo_agrupado(por_tipo, 'Oracle')
 
             case '9':
                 nome = input("Nome da fazenda: ").strip()
-                # Busca no JSON
-                encontradas = buscar_colheitas_por_fazenda(colheitas, nome)
-                if encontradas:
-                    print(f"\n✅ {len(encontradas)} colheitas encontradas (JSON):")
-                    for col in encontradas:
-                        print(f"  • {col['fazenda']} - {col['data']} - {col['tipo_colheita']}")
+                with perfilar('opcao_9'):
+                    # Busca no JSON
+                    encontradas = buscar_colheitas_indexadas(colheitas, indice_fazendas, nome)
+                    if encontradas:
+                        print(f"\n✅ {len(encontradas)} colheitas encontradas (JSON):")
+                        for col in encontradas:
+                            print(f"  • {col['fazenda']} - {col['data']} - {col['tipo_colheita']}")
+                    else:
+                        print("⚠️  Nenhuma colheita encontrada no JSON.")
+
+                    # Busca no Oracle
+                    conn = obter_conexao(oracle)
+                    if conn:
+                        encontradas_oracle = buscar_colheitas_por_fazenda(conn, nome)
+                        if encontradas_oracle:
+                            print(f"\n✅ {len(encontradas_oracle)} colheitas encontradas (Oracle):")
+                            for reg in encontradas_oracle:
+                                print(f"  • ID {reg[0]} - {reg[1]} - {reg[2]} - {reg[3]}")
+
+            case '10':
+                nivel = input("Nível (dia/mes/safra) [mes]: ").strip().lower() or 'mes'
+                if nivel in NIVEIS:
+                    with perfilar('opcao_10'):
+                        exibir_tendencia(consultar_tendencia(cubo, nivel), ROTULOS_NIVEIS[nivel])
                 else:
-                    print("⚠️  Nenhuma colheita encontrada no JSON.")
-
-                # Busca no Oracle
-                if conn:
-                    encontradas_oracle = buscar_colheitas_por_fazenda(conn, nome)
-                    if encontradas_oracle:
-                        print(f"\n✅ {len(encontradas_oracle)} colheitas encontradas (Oracle):")
-                        for reg in encontradas_oracle:
-                            print(f"  • ID {reg[0]} - {reg[1]} - {reg[2]} - {reg[3]}")
+                    print("❌ Nível inválido! Use dia, mes ou safra.")
+
+            case '11':
+                criterio = input("Critério (prejuizo_reais/perda_toneladas/razao_perda) "
+                                 "[prejuizo_reais]: ").strip() or 'prejuizo_reais'
+                if criterio not in CRITERIOS_RANKING:
+                    print("❌ Critério inválido!")
+                    continue
+                k = input("Quantidade de fazendas [5]: ").strip()
+                k = int(k) if k.isdigit() else 5
+
+                with perfilar('opcao_11'):
+                    exibir_ranking_fazendas(top_k_fazendas(colheitas, k, criterio), criterio)
+                    conn = obter_conexao(oracle)
+                    if conn:
+                        exibir_ranking_fazendas(obter_top_fazendas_oracle(conn, k, criterio),
+                                                criterio, 'Oracle')
+
+            case '12':
+                with perfilar('opcao_12'):
+                    if esbocos is None:
+                        esbocos = carregar_esbocos(colheitas)
+                    exibir_estatisticas_aproximadas(resumir_esbocos(esbocos))
+
+            case '13' | '14':
+                if diretorio_fragmentos:
+                    print("⚠️  Atualização e remoção disponíveis apenas no JSON único.")
+                    continue
+                if opcao == '13':
+                    alterou = atualizar_colheita_menu(colheitas, cubo)
+                else:
+                    alterou = remover_colheita_menu(colheitas, cubo)
+                if alterou:
+                    # Esboços não aceitam retirada: reconstruídos no próximo uso
+                    esbocos = None
+                    indice_fazendas = indexar_fazendas(colheitas)
+
+            case '15':
+                with perfilar('opcao_15'):
+                    reprocessar_pendencias_menu(obter_conexao(oracle), diretorio_fragmentos)
+
+            case '16':
+                if diretorio_fragmentos:
+                    print("⚠️  Remoção em lote disponível apenas no JSON único.")
+                    continue
+                if remover_em_lote_menu(colheitas, obter_conexao(oracle), cubo):
+                    esbocos = None
+                    indice_fazendas = indexar_fazendas(colheitas)
+
+            case '17':
+                with perfilar('opcao_17'):
+                    exibir_metricas()
+                    if instrumentacao.ATIVA:
+                        salvar_metricas()
+                        print(f"💾 Métricas salvas em {instrumentacao.ARQUIVO_METRICAS}")
+
+            case '18':
+                conn = obter_conexao(oracle) if rastreamento.ATIVO else None
+                recapturar = bool(conn) and input("Recapturar os planos agora? (s/N): ").strip().lower() == 's'
+                with perfilar('opcao_18'):
+                    exibir_planos(conn, recapturar)
 
             case '0':
                 print("\n👋 Encerrando sistema...")
-                if conn:
-                    fechar_conexao(conn)
+                encerrar_conexao_sob_demanda(oracle)
+                if instrumentacao.ATIVA:
+                    salvar_metricas()
+                if servidor_metricas:
+                    servidor_metricas.shutdown()
                 print("✅ Sistema encerrado com sucesso!")
                 break
 
@@ -460,6 +747,12 @@ if __name__ == "__main__":
     print("Ano: 2025")
     print("="*60)
 
+    # Modo de perfil por ação (o mesmo que AGROTECH_PERFIL=1)
+    if '--perfil' in sys.argv[1:]:
+        perfil.ativar()
+    if perfil.ATIVO:
+        print(f"🔬 Modo de perfil ativo: resultados em {perfil.DIRETORIO_PERFIS}/")
+
     try:
         menu_principal()
     except KeyboardInterrupt:
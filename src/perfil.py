@@ -0,0 +1,248 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: perfil.py
+Descrição: Modo de perfil opcional: cProfile, pilhas amostradas (formato de
+           flame graph) e principais alocações (tracemalloc) por ação
+
+Ativação: AGROTECH_PERFIL=1 ou python main.py --perfil
+Saída (em perfis/, uma trinca por ação executada):
+    <momento>_<acao>.prof    estatísticas do cProfile (pstats, snakeviz)
+    <momento>_<acao>.folded  pilhas colapsadas (flamegraph.pl, speedscope)
+    <momento>_<acao>.txt     resumo: funções mais caras e sites de alocação
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+ATIVO = os.getenv('AGROTECH_PERFIL') == '1'
+DIRETORIO_PERFIS = os.getenv('AGROTECH_PERFIL_DIRETORIO', 'perfis')
+INTERVALO_AMOSTRAGEM = float(os.getenv('AGROTECH_PERFIL_INTERVALO_MS', 5)) / 1000
+QUADROS_ALOCACAO = 1
+TOPO_RESUMO = 15
+
+_contexto = threading.local()
+
+
+def ativar(diretorio=None):
+    """
+    Liga o modo de perfil (usado pela opção --perfil do main.py)
+    """
+    global ATIVO, DIRETORIO_PERFIS
+    ATIVO = True
+    if diretorio:
+        DIRETORIO_PERFIS = diretorio
+
+
+# ========================================
+# AMOSTRAGEM DE PILHAS
+# ========================================
+
+class _Amostrador(threading.Thread):
+    """
+    Thread que fotografa a pilha da thread perfilada a intervalos fixos
+
+    As pilhas são contadas do quadro de quem abriu a seção até a folha, no
+    formato colapsado ('a;b;c contagem') usado por flame graphs
+    """
+
+    def __init__(self, alvo, base, intervalo):
+        super().__init__(daemon=True)
+        self.alvo = alvo
+        self.base = base
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._rotulos = {}
+
+    def _rotulo(self, codigo):
+        rotulo = self._rotulos.get(codigo)
+        if rotulo is None:
+            rotulo = self._rotulos[codigo] = \
+                f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+        return rotulo
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.alvo)
+            pilha = []
+            while quadro is not None and quadro is not self.base:
+                pilha.append(self._rotulo(quadro.f_code))
+                quadro = quadro.f_back
+            if pilha:
+                self.pilhas[tuple(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+# ========================================
+# SEÇÕES PERFILADAS
+# ========================================
+
+class _Secao:
+    """
+    Seção perfilada; seções aninhadas (ex: relatório dentro da opção 5) geram
+    arquivos próprios e também entram no perfil da seção externa
+    """
+
+    def __init__(self, acao):
+        self.acao = acao
+
+    def __enter__(self):
+        if not ATIVO:
+            self.ativa = False
+            return self
+        self.ativa = True
+        self.pilha = getattr(_contexto, 'pilha', None)
+        if self.pilha is None:
+            self.pilha = _contexto.pilha = []
+        self.externa = self.pilha[-1] if self.pilha else None
+        self.internas = []
+        self.pico = 0
+
+        # Memória: uma única ativação do tracemalloc para as seções aninhadas
+        self.iniciou_tracemalloc = not tracemalloc.is_tracing()
+        if self.iniciou_tracemalloc:
+            tracemalloc.start(QUADROS_ALOCACAO)
+        elif self.externa:
+            self.externa.pico = max(self.externa.pico, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.memoria_inicial = tracemalloc.take_snapshot()
+
+        # cProfile: só um perfilador por vez; a seção externa pausa e depois soma o da interna
+        if self.externa and self.externa.perfilador:
+            self.externa.perfilador.disable()
+        self.perfilador = cProfile.Profile()
+        try:
+            self.perfilador.enable()
+        except ValueError:
+            # Outra ferramenta (cobertura, depurador) já usa o gancho de perfil
+            self.perfilador = None
+
+        self.amostrador = _Amostrador(threading.get_ident(), sys._getframe(1), INTERVALO_AMOSTRAGEM)
+        self.amostrador.start()
+        self.pilha.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        if not self.ativa:
+            return False
+        decorrido = time.perf_counter() - self.inicio
+        if self.perfilador:
+            self.perfilador.disable()
+        self.amostrador.parar()
+        self.pilha.pop()
+
+        self.pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+        memoria_final = tracemalloc.take_snapshot()
+        if self.iniciou_tracemalloc:
+            tracemalloc.stop()
+
+        # Falha ao gravar (disco cheio, permissão) não interrompe a ação perfilada
+        try:
+            caminho = _gravar_perfil(self, decorrido, memoria_final)
+            print(f"🔬 Perfil '{self.acao}': {decorrido * 1000:.1f} ms, pico de memória "
+                  f"{self.pico / 2 ** 20:.1f} MB → {caminho}.*")
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Perfil '{self.acao}' não gravado: {e}")
+
+        if self.externa:
+            self.externa.pico = max(self.externa.pico, self.pico)
+            if self.perfilador:
+                self.externa.internas.append(self.perfilador)
+            if self.externa.perfilador:
+                self.externa.perfilador.enable()
+        return False
+
+
+def perfilar(acao):
+    """
+    Context manager que perfila um trecho (sem custo se o modo estiver desligado)
+
+    Parâmetros:
+        acao (str): Nome da ação nos arquivos gerados (ex: 'opcao_3')
+    """
+    return _Secao(acao)
+
+
+def perfilado(acao=None):
+    """
+    Decorador: perfila cada chamada da função quando o modo estiver ligado
+    """
+    def decorador(funcao):
+        nome = acao or funcao.__name__
+
+        @functools.wraps(funcao)
+        def embrulhada(*args, **kwargs):
+            if not ATIVO:
+                return funcao(*args, **kwargs)
+            with _Secao(nome):
+                return funcao(*args, **kwargs)
+        return embrulhada
+    return decorador
+
+
+# ========================================
+# ARQUIVOS DE SAÍDA
+# ========================================
+
+def _filtrar_perfil(snapshot):
+    # Tira do relatório as alocações do próprio perfilador
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, pstats.__file__),
+        tracemalloc.Filter(False, threading.__file__),
+    ))
+
+
+def _gravar_perfil(secao, decorrido, memoria_final):
+    """
+    Grava .prof, .folded e .txt da seção
+
+    Retorno:
+        str: Caminho base dos arquivos (sem extensão)
+    """
+    os.makedirs(DIRETORIO_PERFIS, exist_ok=True)
+    momento = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    caminho = os.path.join(DIRETORIO_PERFIS, f"{momento}_{secao.acao}")
+
+    resumo = io.StringIO()
+    resumo.write(f"Ação: {secao.acao}\n")
+    resumo.write(f"Duração: {decorrido * 1000:.1f} ms\n")
+    resumo.write(f"Pico de memória: {secao.pico / 2 ** 20:.2f} MB\n")
+
+    if secao.perfilador:
+        estatisticas = pstats.Stats(secao.perfilador, stream=resumo)
+        for interna in secao.internas:
+            estatisticas.add(interna)
+        estatisticas.dump_stats(caminho + '.prof')
+        resumo.write(f"\nFunções com maior tempo acumulado (top {TOPO_RESUMO}):\n")
+        estatisticas.sort_stats('cumulative').print_stats(TOPO_RESUMO)
+
+    with open(caminho + '.folded', 'w', encoding='utf-8') as arquivo:
+        for pilha, contagem in sorted(secao.amostrador.pilhas.items()):
+            arquivo.write(f"{';'.join((secao.acao,) + pilha)} {contagem}\n")
+
+    diferencas = _filtrar_perfil(memoria_final).compare_to(_filtrar_perfil(secao.memoria_inicial), 'lineno')
+    resumo.write(f"\nSites de alocação com maior crescimento (top {TOPO_RESUMO}):\n")
+    for diferenca in diferencas[:TOPO_RESUMO]:
+        quadro = diferenca.traceback[0]
+        resumo.write(f"  {diferenca.size_diff / 1024:>+12.1f} KiB {diferenca.count_diff:>+9} blocos  "
+                     f"{quadro.filename}:{quadro.lineno}\n")
+
+    with open(caminho + '.txt', 'w', encoding='utf-8') as arquivo:
+        arquivo.write(resumo.getvalue())
+    return caminho
@@ -0,0 +1,475 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: rastreamento.py
+Descrição: Rastreio dos comandos SQL (sql_id, forma dos binds, tempo e linhas)
+           com captura do plano de execução (DBMS_XPLAN) e alerta de varredura
+           completa em tabelas grandes
+
+Ativação: AGROTECH_RASTREIO=1 (AGROTECH_RASTREIO_LIMIAR ajusta o tamanho a
+partir do qual uma tabela é "grande"; padrão 10000 linhas)
+Saída:
+    rastreio_sql.jsonl  uma linha por execução de comando
+    planos_sql.json     último plano de cada sql_id e histórico de plan hash
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+ATIVO = os.getenv('AGROTECH_RASTREIO') == '1'
+ARQUIVO_RASTREIO = os.getenv('AGROTECH_RASTREIO_ARQUIVO', 'rastreio_sql.jsonl')
+ARQUIVO_PLANOS = os.getenv('AGROTECH_RASTREIO_PLANOS', 'planos_sql.json')
+LIMIAR_TABELA_GRANDE = int(os.getenv('AGROTECH_RASTREIO_LIMIAR', 10000))
+
+# Comandos com plano de execução interessante (INSERT ... VALUES é sempre trivial)
+COMANDOS_COM_PLANO = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'MERGE')
+
+# Faixas de tamanho de VARCHAR2 usadas pelo Oracle no bind: mudar de faixa
+# cria outro cursor filho para o mesmo sql_id
+FAIXAS_TEXTO = (32, 128, 2000, 4000)
+
+ALFABETO_SQL_ID = '0123456789abcdfghjkmnpqrstuvwxyz'
+
+# sql_ids com plano já capturado neste processo
+_capturados = set()
+_trava = threading.Lock()
+
+
+def ativar(arquivo=None):
+    """
+    Liga o rastreio em tempo de execução (testes e ferramentas)
+    """
+    global ATIVO, ARQUIVO_RASTREIO
+    ATIVO = True
+    if arquivo:
+        ARQUIVO_RASTREIO = arquivo
+
+
+# ========================================
+# IDENTIFICAÇÃO DOS COMANDOS
+# ========================================
+
+def calcular_sql_id(sql):
+    """
+    Calcula o SQL_ID do Oracle para o texto exato do comando
+
+    Parâmetros:
+        sql (str): Texto enviado ao servidor (espaços e quebras de linha contam)
+
+    Retorno:
+        str: 13 caracteres em base 32, o mesmo valor mostrado em V$SQL
+
+    Aplicação: os 64 bits finais do MD5 do texto (com o terminador nulo) em
+    base 32; assim o rastreio local pode ser cruzado com o AWR do servidor
+    """
+    resumo = hashlib.md5(sql.encode('utf-8') + b'\0').digest()
+    _, _, alto, baixo = struct.unpack('<IIII', resumo)
+    numero = alto * 2 ** 32 + baixo
+    caracteres = []
+    for _ in range(13):
+        numero, resto = divmod(numero, 32)
+        caracteres.append(ALFABETO_SQL_ID[resto])
+    return ''.join(reversed(caracteres))
+
+
+def _tipo_bind(valor):
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, (int, float)):
+        return 'NUMBER'
+    if isinstance(valor, date):
+        return 'DATE'
+    if isinstance(valor, str):
+        tamanho = len(valor.encode('utf-8'))
+        faixa = next((faixa for faixa in FAIXAS_TEXTO if tamanho <= faixa), None)
+        return f"VARCHAR2({faixa})" if faixa else 'CLOB'
+    return type(valor).__name__.upper()
+
+
+def forma_binds(parametros):
+    """
+    Forma dos binds (tipo e faixa de tamanho), sem os valores
+
+    Parâmetros:
+        parametros (dict | list | tuple | None): Binds de um execute
+
+    Retorno:
+        dict: {nome ou posição: tipo}, ex: {'nome': 'VARCHAR2(32)'}
+    """
+    if not parametros:
+        return {}
+    if isinstance(parametros, dict):
+        return {nome: _tipo_bind(valor) for nome, valor in parametros.items()}
+    return {str(posicao): _tipo_bind(valor) for posicao, valor in enumerate(parametros, 1)}
+
+
+def _operacao_chamadora():
+    """
+    Função de database.py que emitiu o comando (a mais interna na pilha)
+    """
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        if os.path.basename(quadro.f_code.co_filename) == 'database.py':
+            return quadro.f_code.co_name.lstrip('_')
+        quadro = quadro.f_back
+    return None
+
+
+def _sql_compacto(sql):
+    return ' '.join(sql.split())
+
+
+# ========================================
+# PLANOS DE EXECUÇÃO
+# ========================================
+
+PLAN_HASH = re.compile(r'Plan hash value:\s*(\d+)')
+
+
+def _interpretar_plano(linhas):
+    """
+    Extrai o plan hash e as operações da saída do DBMS_XPLAN.DISPLAY
+
+    Retorno:
+        tuple: (plan_hash ou None, [{'id', 'operacao', 'objeto', 'linhas'}])
+    """
+    plan_hash = None
+    operacoes = []
+    for linha in linhas:
+        encontrado = PLAN_HASH.search(linha)
+        if encontrado:
+            plan_hash = int(encontrado.group(1))
+            continue
+        if not linha.startswith('|'):
+            continue
+        celulas = [celula.strip() for celula in linha.strip('|').split('|')]
+        if len(celulas) < 3 or not celulas[0].lstrip('* ').isdigit():
+            continue
+        operacoes.append({
+            'id': int(celulas[0].lstrip('* ')),
+            'operacao': celulas[1],
+            'objeto': celulas[2] or None,
+            'linhas': celulas[3] if len(celulas) > 3 and celulas[3] else None,
+        })
+    return plan_hash, operacoes
+
+
+def _linhas_tabela(cursor, tabela, tamanhos):
+    """
+    Linhas da tabela segundo as estatísticas do dicionário (USER_TABLES.NUM_ROWS)
+    """
+    if tabela not in tamanhos:
+        cursor.execute("SELECT num_rows FROM user_tables WHERE table_name = :tabela", {'tabela': tabela.upper()})
+        linha = cursor.fetchone()
+        tamanhos[tabela] = linha[0] if linha else None
+    return tamanhos[tabela]
+
+
+def _varreduras_completas(cursor, operacoes):
+    """
+    Alertas de TABLE ACCESS FULL em tabelas com LIMIAR_TABELA_GRANDE linhas ou
+    mais (ou sem estatísticas, quando o tamanho é desconhecido)
+    """
+    alertas = []
+    tamanhos = {}
+    for operacao in operacoes:
+        if 'TABLE ACCESS' not in operacao['operacao'] or 'FULL' not in operacao['operacao']:
+            continue
+        tabela = operacao['objeto']
+        linhas = _linhas_tabela(cursor, tabela, tamanhos) if tabela else None
+        if linhas is None:
+            alertas.append(f"varredura completa em {tabela} (tabela sem estatísticas)")
+        elif linhas >= LIMIAR_TABELA_GRANDE:
+            alertas.append(f"varredura completa em {tabela} ({linhas} linhas)")
+    return alertas
+
+
+def _conexao_real(conn):
+    # Desembrulha instrumentação/rastreio até a conexão do driver
+    while hasattr(conn, '_conn'):
+        conn = conn._conn
+    return conn
+
+
+def _carregar_planos(caminho=None):
+    caminho = caminho or ARQUIVO_PLANOS
+    if not os.path.exists(caminho):
+        return {}
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _salvar_planos(planos, caminho=None):
+    caminho = caminho or ARQUIVO_PLANOS
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(planos, arquivo, indent=4, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def capturar_plano(conn, sql, sql_id=None, exibir=True):
+    """
+    Captura o plano de um comando com EXPLAIN PLAN + DBMS_XPLAN.DISPLAY
+
+    Parâmetros:
+        conn: Conexão (instrumentada, rastreada ou do driver)
+        sql (str): Comando exatamente como é executado
+        sql_id (str): SQL_ID já calculado (opcional)
+        exibir (bool): Exibe os alertas no terminal
+
+    Retorno:
+        dict: {'sql_id', 'plan_hash', 'plano', 'operacoes', 'alertas'}
+
+    Aplicação: o plano é registrado em planos_sql.json; um plan hash diferente
+    do anterior para o mesmo sql_id vira alerta de regressão de plano.
+    Os binds ficam sem valor (o otimizador os trata como desconhecidos) e
+    nada é confirmado: a PLAN_TABLE é limpa na mesma transação
+    """
+    sql_id = sql_id or calcular_sql_id(sql)
+    cursor = _conexao_real(conn).cursor()
+    try:
+        cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{sql_id}' FOR {sql}")
+        cursor.execute("SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY('PLAN_TABLE', :id, 'TYPICAL'))",
+                       {'id': sql_id})
+        plano = [linha[0] or '' for linha in cursor.fetchall()]
+        cursor.execute("DELETE FROM plan_table WHERE statement_id = :id", {'id': sql_id})
+        plan_hash, operacoes = _interpretar_plano(plano)
+        alertas = _varreduras_completas(cursor, operacoes)
+    finally:
+        cursor.close()
+
+    momento = datetime.now().isoformat(timespec='seconds')
+    with _trava:
+        _capturados.add(sql_id)
+        planos = _carregar_planos()
+        anterior = planos.get(sql_id)
+        if anterior and anterior.get('plan_hash') != plan_hash:
+            alertas.append(f"plano mudou: hash {anterior.get('plan_hash')} → {plan_hash}")
+        historico = anterior.get('historico', []) if anterior else []
+        if not historico or historico[-1]['plan_hash'] != plan_hash:
+            historico.append({'plan_hash': plan_hash, 'capturado_em': momento})
+        planos[sql_id] = {
+            'sql': _sql_compacto(sql),
+            'texto': sql,
+            'plan_hash': plan_hash,
+            'capturado_em': momento,
+            'alertas': alertas,
+            'plano': plano,
+            'historico': historico,
+        }
+        _salvar_planos(planos)
+
+    if exibir:
+        for alerta in alertas:
+            print(f"⚠️  [{sql_id}] {alerta}")
+    return {'sql_id': sql_id, 'plan_hash': plan_hash, 'plano': plano, 'operacoes': operacoes, 'alertas': alertas}
+
+
+def _deve_capturar(sql, sql_id):
+    if sql_id in _capturados:
+        return False
+    primeira = sql.lstrip().split(None, 1)
+    return bool(primeira) and primeira[0].upper() in COMANDOS_COM_PLANO
+
+
+# ========================================
+# CONEXÃO E CURSOR RASTREADOS
+# ========================================
+
+def _gravar_registro(registro):
+    linha = json.dumps(registro, ensure_ascii=False, default=str)
+    with _trava:
+        with open(ARQUIVO_RASTREIO, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha + '\n')
+
+
+class CursorRastreado:
+    """
+    Cursor que registra cada comando executado, repassando tudo ao cursor real
+
+    O registro de um comando fica aberto enquanto as linhas são lidas e é
+    gravado no próximo execute ou no close (linhas e tempo de leitura completos)
+    """
+
+    def __init__(self, cursor, conn):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_conexao', conn)
+        object.__setattr__(self, '_registro', None)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._cursor, nome, valor)
+
+    def _abrir_registro(self, sql, binds, execucoes):
+        self._fechar_registro()
+        sql_id = calcular_sql_id(sql)
+        registro = {
+            'momento': datetime.now().isoformat(timespec='milliseconds'),
+            'sql_id': sql_id,
+            'operacao': _operacao_chamadora(),
+            'sql': _sql_compacto(sql),
+            'binds': forma_binds(binds),
+            'execucoes': execucoes,
+            'linhas': 0,
+            'execucao_ms': 0.0,
+            'leitura_ms': 0.0,
+            'alertas': [],
+        }
+        if _deve_capturar(sql, sql_id):
+            # Antes de executar: o plano é o que o otimizador escolheria agora
+            try:
+                registro['plan_hash'] = None
+                captura = capturar_plano(self._conexao, sql, sql_id)
+                registro['plan_hash'] = captura['plan_hash']
+                registro['alertas'] = captura['alertas']
+            except Exception as e:
+                with _trava:
+                    _capturados.add(sql_id)
+                registro['erro_plano'] = str(e)
+        object.__setattr__(self, '_registro', registro)
+        return registro
+
+    def _fechar_registro(self):
+        registro = self._registro
+        if registro is None:
+            return
+        object.__setattr__(self, '_registro', None)
+        registro['execucao_ms'] = round(registro['execucao_ms'], 3)
+        registro['leitura_ms'] = round(registro['leitura_ms'], 3)
+        _gravar_registro(registro)
+
+    def _executar(self, registro, funcao, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+        except Exception as e:
+            registro['erro'] = str(e)
+            raise
+        finally:
+            registro['execucao_ms'] += (time.perf_counter() - inicio) * 1000
+        # DML: linhas afetadas; SELECT: contadas na leitura
+        if self._cursor.description is None and (getattr(self._cursor, 'rowcount', -1) or 0) > 0:
+            registro['linhas'] = self._cursor.rowcount
+        return resultado
+
+    def execute(self, sql, parametros=None, **binds):
+        registro = self._abrir_registro(sql, binds or parametros, 1)
+        self._executar(registro, self._cursor.execute, sql, parametros, **binds)
+        return self
+
+    def executemany(self, sql, sequencia, *args, **kwargs):
+        sequencia = sequencia if isinstance(sequencia, (list, tuple)) else list(sequencia)
+        registro = self._abrir_registro(sql, sequencia[0] if sequencia else None, len(sequencia))
+        return self._executar(registro, self._cursor.executemany, sql, sequencia, *args, **kwargs)
+
+    def _ler(self, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        registro = self._registro
+        if registro is not None:
+            registro['leitura_ms'] += (time.perf_counter() - inicio) * 1000
+        return resultado
+
+    def _contar(self, quantidade):
+        if self._registro is not None:
+            self._registro['linhas'] += quantidade
+
+    def fetchone(self):
+        linha = self._ler(self._cursor.fetchone)
+        self._contar(linha is not None)
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        linhas = self._ler(lambda: self._cursor.fetchmany(*args, **kwargs))
+        self._contar(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._ler(self._cursor.fetchall)
+        self._contar(len(linhas))
+        return linhas
+
+    def __iter__(self):
+        while True:
+            linhas = self.fetchmany()
+            if not linhas:
+                return
+            yield from linhas
+
+    def close(self):
+        self._fechar_registro()
+        return self._cursor.close()
+
+
+class ConexaoRastreada:
+    """
+    Conexão que devolve cursores rastreados
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def cursor(self, *args, **kwargs):
+        return CursorRastreado(self._conn.cursor(*args, **kwargs), self._conn)
+
+
+def rastrear_conexao(conn):
+    """
+    Embrulha a conexão se o rastreio estiver ativo (senão devolve a própria)
+    """
+    if not ATIVO or conn is None:
+        return conn
+    return ConexaoRastreada(conn)
+
+
+# ========================================
+# EXIBIÇÃO (MENU)
+# ========================================
+
+def exibir_planos(conn=None, recapturar=False):
+    """
+    Exibe os planos registrados (opção do menu); com recapturar=True e uma
+    conexão, captura de novo o plano de cada comando conhecido (sob demanda)
+    """
+    planos = _carregar_planos()
+    if not ATIVO and not planos:
+        print("\n⚠️  Rastreio desligado. Inicie com AGROTECH_RASTREIO=1 para registrar os comandos SQL.")
+        return
+
+    if recapturar and conn:
+        for sql_id, registro in list(planos.items()):
+            try:
+                capturar_plano(conn, registro['texto'], sql_id, exibir=False)
+            except Exception as e:
+                print(f"❌ Erro ao capturar o plano de {sql_id}: {e}")
+        planos = _carregar_planos()
+
+    print("\n" + "="*92)
+    print("🧭 PLANOS DE EXECUÇÃO DOS COMANDOS SQL")
+    print("="*92)
+    if not planos:
+        print("⚠️  Nenhum plano capturado ainda.")
+        return
+    print(f"{'SQL_ID':<15}{'Plan hash':>12}  {'Versões':>7}  Comando")
+    print("-"*92)
+    for sql_id, registro in sorted(planos.items(), key=lambda item: item[1]['capturado_em'], reverse=True):
+        print(f"{sql_id:<15}{str(registro['plan_hash']):>12}  {len(registro['historico']):>7}  "
+              f"{registro['sql'][:55]}")
+        for alerta in registro['alertas']:
+            print(f"{'':<15}⚠️  {alerta}")
+    print("="*92)
+    print(f"📄 Planos completos em {ARQUIVO_PLANOS}; execuções em {ARQUIVO_RASTREIO}")
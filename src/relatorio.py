@@ -0,0 +1,143 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: relatorio.py
+Descrição: Relatório TXT das colheitas (opção 5 do menu, cli.py report e
+           benchmark), sem depender do menu
+"""
+
+from datetime import datetime
+
+from analises import agrupar_colheitas, obter_grupo, totalizar, top_k, totais_por_fazenda
+from cubo import reconstruir_cubo, consultar_tendencia, ROTULOS_NIVEIS
+from perfil import perfilado
+
+
+# ========================================
+# MANIPULAÇÃO DE ARQUIVO TEXTO
+# ========================================
+
+@perfilado()
+def gerar_relatorio_txt(colheitas, cubo=None, agregados=None, caminho='relatorio.txt'):
+    """
+    Gera relatório detalhado em arquivo texto
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com colheitas
+        cubo (dict): Cubo de agregados para as tendências (None = reconstrói)
+        agregados (dict): Agrupamentos já calculados por ('tipo_colheita',) e
+                          ('fazenda',), ex: mesclados dos fragmentos (None = calcula)
+        caminho (str): Arquivo do relatório (o cli.py permite escolher)
+
+    Retorno:
+        bool: True se o relatório foi gerado
+
+    Aplicação: Manipulação de arquivo TXT (Capítulo 5)
+    """
+    if not colheitas:
+        print("⚠️  Nenhuma colheita para gerar relatório.")
+        return False
+
+    try:
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            # Cabeçalho
+            arquivo.write("="*70 + "\n")
+            arquivo.write("RELATÓRIO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR\n")
+            arquivo.write("Sistema de Monitoramento - FIAP\n")
+            arquivo.write(f"Data de geração: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+            arquivo.write("="*70 + "\n\n")
+
+            # Estatísticas gerais (agregação por tipo em passada única)
+            if agregados is None:
+                agregados = {
+                    ('tipo_colheita',): agrupar_colheitas(colheitas, ('tipo_colheita',)),
+                    ('fazenda',): agrupar_colheitas(colheitas, ('fazenda',)),
+                }
+            por_tipo = agregados[('tipo_colheita',)]
+            total = totalizar(por_tipo)
+            total_ton = total['toneladas']['soma']
+            total_perda = total['perda_toneladas']['soma']
+            total_prejuizo = total['prejuizo_reais']['soma']
+
+            arquivo.write("RESUMO GERAL\n")
+            arquivo.write("-"*70 + "\n")
+            arquivo.write(f"Total de colheitas: {len(colheitas)}\n")
+            arquivo.write(f"Total produzido: {total_ton:,.2f} toneladas\n")
+            arquivo.write(f"Total perdido: {total_perda:,.2f} toneladas\n")
+            arquivo.write(f"Prejuízo total: R$ {total_prejuizo:,.2f}\n")
+            arquivo.write(f"Perda média: {(total_perda/total_ton*100):.2f}%\n")
+            arquivo.write("="*70 + "\n\n")
+
+            # Detalhamento de cada colheita
+            arquivo.write("DETALHAMENTO DAS COLHEITAS\n")
+            arquivo.write("="*70 + "\n\n")
+
+            for i, col in enumerate(colheitas, 1):
+                arquivo.write(f"COLHEITA #{i:03d}\n")
+                arquivo.write("-"*70 + "\n")
+                arquivo.write(f"Fazenda: {col['fazenda']}\n")
+                arquivo.write(f"Data: {col['data']}\n")
+                arquivo.write(f"Tipo de colheita: {col['tipo_colheita'].upper()}\n")
+                arquivo.write(f"Toneladas colhidas: {col['toneladas']:,.2f} t\n")
+                arquivo.write(f"Perda percentual: {col['perda_percentual']*100:.1f}%\n")
+                arquivo.write(f"Perda em toneladas: {col['perda_toneladas']:,.2f} t\n")
+                arquivo.write(f"Prejuízo estimado: R$ {col['prejuizo_reais']:,.2f}\n")
+                arquivo.write("-"*70 + "\n\n")
+
+            # Comparativo por tipo (reaproveita o agrupamento)
+            manual = obter_grupo(por_tipo, 'manual')
+            mecanica = obter_grupo(por_tipo, 'mecanica')
+
+            arquivo.write("COMPARATIVO: MANUAL vs MECÂNICA\n")
+            arquivo.write("="*70 + "\n\n")
+
+            if manual['quantidade']:
+                arquivo.write("COLHEITA MANUAL:\n")
+                arquivo.write(f"  Quantidade: {manual['quantidade']} colheitas\n")
+                arquivo.write(f"  Total produzido: {manual['toneladas']['soma']:,.2f} t\n")
+                arquivo.write(f"  Total perdido: {manual['perda_toneladas']['soma']:,.2f} t\n")
+                arquivo.write(f"  Prejuízo: R$ {manual['prejuizo_reais']['soma']:,.2f}\n\n")
+
+            if mecanica['quantidade']:
+                arquivo.write("COLHEITA MECÂNICA:\n")
+                arquivo.write(f"  Quantidade: {mecanica['quantidade']} colheitas\n")
+                arquivo.write(f"  Total produzido: {mecanica['toneladas']['soma']:,.2f} t\n")
+                arquivo.write(f"  Total perdido: {mecanica['perda_toneladas']['soma']:,.2f} t\n")
+                arquivo.write(f"  Prejuízo: R$ {mecanica['prejuizo_reais']['soma']:,.2f}\n\n")
+
+            # Ranking das fazendas que mais perdem
+            arquivo.write("TOP 5 FAZENDAS COM MAIOR PREJUÍZO\n")
+            arquivo.write("="*70 + "\n")
+            ranking = top_k(totais_por_fazenda(agregados[('fazenda',)]), 5,
+                            lambda t: t['prejuizo_reais'])
+            for posicao, fazenda in enumerate(ranking, 1):
+                arquivo.write(f"  {posicao}. {fazenda['fazenda']}: R$ {fazenda['prejuizo_reais']:,.2f} | "
+                              f"perda {fazenda['perda_toneladas']:,.2f} t "
+                              f"({fazenda['razao_perda']*100:.1f}%)\n")
+            arquivo.write("\n")
+
+            # Tendências lidas do cubo de agregados
+            if cubo is None:
+                cubo = reconstruir_cubo(colheitas)
+
+            for nivel in ('safra', 'mes'):
+                arquivo.write(f"TENDÊNCIA DE PERDAS POR {ROTULOS_NIVEIS[nivel]}\n")
+                arquivo.write("="*70 + "\n")
+                for periodo, totais in consultar_tendencia(cubo, nivel):
+                    arquivo.write(f"  {periodo:<12} {totais['quantidade']:>6} colheitas | "
+                                  f"{totais['toneladas']:,.2f} t | "
+                                  f"perda {totais['perda_toneladas']:,.2f} t | "
+                                  f"R$ {totais['prejuizo_reais']:,.2f}\n")
+                arquivo.write("\n")
+
+            # Rodapé
+            arquivo.write("="*70 + "\n")
+            arquivo.write("Fim do relatório\n")
+            arquivo.write("Sistema desenvolvido para FIAP - 2025\n")
+
+        print(f"✅ Relatório gerado: {caminho}")
+        print(f"📄 Total de colheitas incluídas: {len(colheitas)}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao gerar relatório: {e}")
+        return False
@@ -0,0 +1,348 @@
+"""
+SISTEMA DE MONITORAMENTO DE PERDAS NA COLHEITA DE CANA-DE-AÇÚCAR
+Arquivo: segmentos.py
+Descrição: Armazenamento em segmentos de tamanho fixo com mapas de zona
+           (datas mín/máx, tipos, filtro de Bloom de fazendas e somas pré-calculadas)
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+
+from analises import agrupar_colheitas, mesclar_agrupamentos
+from colunar import data_para_inteiro
+
+# Diretório e índice dos segmentos (ao lado de dados_colheitas.json)
+DIRETORIO_SEGMENTOS = 'dados_segmentos'
+ARQUIVO_INDICE = 'indice.json'
+VERSAO_INDICE = 1
+TAMANHO_SEGMENTO = 4096
+FALSO_POSITIVO_BLOOM = 0.01
+
+
+# ========================================
+# FILTRO DE BLOOM DE FAZENDAS
+# ========================================
+
+def _normalizar_fazenda(fazenda):
+    """
+    Normaliza o nome para o filtro de Bloom (busca exata sem diferenciar maiúsculas)
+    """
+    return fazenda.strip().lower()
+
+
+def _posicoes_bloom(fazenda, bits, funcoes):
+    """
+    Posições do filtro para um nome (hash duplo derivado de um blake2b de 128 bits)
+    """
+    digest = hashlib.blake2b(_normalizar_fazenda(fazenda).encode('utf-8'), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(funcoes)]
+
+
+def criar_bloom(fazendas):
+    """
+    Cria um filtro de Bloom dimensionado para as fazendas informadas
+
+    Parâmetros:
+        fazendas (set): Nomes distintos de fazendas do segmento
+
+    Retorno:
+        dict: {'bits', 'funcoes', 'mapa' (hex)}
+    """
+    n = max(1, len(fazendas))
+    bits = max(64, math.ceil(-n * math.log(FALSO_POSITIVO_BLOOM) / math.log(2) ** 2))
+    funcoes = max(1, round(bits / n * math.log(2)))
+    mapa = bytearray((bits + 7) // 8)
+    for fazenda in fazendas:
+        for posicao in _posicoes_bloom(fazenda, bits, funcoes):
+            mapa[posicao >> 3] |= 1 << (posicao & 7)
+    return {'bits': bits, 'funcoes': funcoes, 'mapa': mapa.hex()}
+
+
+def bloom_pode_conter(bloom, fazenda):
+    """
+    Testa se a fazenda pode estar no segmento (False = certamente não está)
+    """
+    mapa = bytes.fromhex(bloom['mapa'])
+    return all(mapa[p >> 3] & (1 << (p & 7)) for p in _posicoes_bloom(fazenda, bloom['bits'], bloom['funcoes']))
+
+
+# ========================================
+# ESCRITA DOS SEGMENTOS E DO ÍNDICE
+# ========================================
+
+def resumir_segmento(arquivo, colheitas):
+    """
+    Calcula o mapa de zona de um segmento
+
+    Retorno:
+        dict: arquivo, registros, data_min/data_max (AAAAMMDD), tipos,
+              bloom de fazendas e grupos por tipo pré-calculados
+    """
+    datas = [data_para_inteiro(c['data']) for c in colheitas]
+    por_tipo = agrupar_colheitas(colheitas, ('tipo_colheita',))
+    return {
+        'arquivo': arquivo,
+        'registros': len(colheitas),
+        'data_min': min(datas),
+        'data_max': max(datas),
+        'tipos': sorted(tipo for (tipo,) in por_tipo),
+        'bloom': criar_bloom({c['fazenda'] for c in colheitas}),
+        'grupos': {tipo: grupo for (tipo,), grupo in por_tipo.items()},
+    }
+
+
+def _gravar_json_atomico(caminho, dados, **opcoes):
+    """
+    Grava JSON em arquivo temporário e troca pelo definitivo (os.replace)
+    """
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, **opcoes)
+    os.replace(temporario, caminho)
+
+
+def carregar_indice(diretorio=DIRETORIO_SEGMENTOS):
+    """
+    Lê o índice (mapas de zona) dos segmentos
+
+    Retorno:
+        dict: Índice ou None se não existir
+    """
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_INDICE), 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def gravar_segmentos(colheitas, diretorio=DIRETORIO_SEGMENTOS, tamanho=TAMANHO_SEGMENTO, identidade=None):
+    """
+    Grava as colheitas em segmentos de tamanho fixo, ordenadas por data
+
+    Parâmetros:
+        colheitas (list): Lista de dicionários com dados das colheitas
+        diretorio (str): Diretório dos segmentos (recriado do zero)
+        tamanho (int): Colheitas por segmento
+        identidade (list): Versão dos dados espelhados (ver armazenamento.identidade_dados)
+
+    Retorno:
+        dict: Índice gravado
+
+    Aplicação: a ordenação por data deixa as faixas de datas dos segmentos
+    disjuntas, o que maximiza os segmentos ignorados nas consultas por período
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    anterior = carregar_indice(diretorio)
+
+    ordenadas = sorted(colheitas, key=lambda c: data_para_inteiro(c['data']))
+    indice = {'versao': VERSAO_INDICE, 'tamanho': tamanho, 'identidade': identidade, 'segmentos': []}
+    for numero, inicio in enumerate(range(0, len(ordenadas), tamanho), 1):
+        arquivo = f"segmento_{numero:06d}.json"
+        parte = ordenadas[inicio:inicio + tamanho]
+        _gravar_json_atomico(os.path.join(diretorio, arquivo), parte, separators=(',', ':'))
+        indice['segmentos'].append(resumir_segmento(arquivo, parte))
+    _gravar_json_atomico(os.path.join(diretorio, ARQUIVO_INDICE), indice, indent=1)
+
+    # Remove segmentos antigos que sobraram de uma gravação maior
+    if anterior:
+        atuais = {s['arquivo'] for s in indice['segmentos']}
+        for segmento in anterior['segmentos']:
+            if segmento['arquivo'] not in atuais:
+                os.remove(os.path.join(diretorio, segmento['arquivo']))
+    return indice
+
+
+def acrescentar_segmentos(colheitas_novas, diretorio=DIRETORIO_SEGMENTOS, identidade=None):
+    """
+    Acrescenta colheitas completando o último segmento e abrindo novos
+
+    Parâmetros:
+        colheitas_novas (list): Colheitas a acrescentar
+        diretorio (str): Diretório dos segmentos
+        identidade (list): Versão dos dados espelhados depois do acréscimo
+
+    Retorno:
+        dict: Índice atualizado (só o último segmento e os novos são regravados)
+    """
+    indice = carregar_indice(diretorio)
+    if indice is None:
+        return gravar_segmentos(colheitas_novas, diretorio, identidade=identidade)
+
+    pendentes = list(colheitas_novas)
+    tamanho = indice['tamanho']
+    segmentos = indice['segmentos']
+
+    if segmentos and segmentos[-1]['registros'] < tamanho:
+        ultimo = segmentos.pop()
+        pendentes = ler_segmento(diretorio, ultimo) + pendentes
+    numero = len(segmentos) + 1
+
+    while pendentes:
+        arquivo = f"segmento_{numero:06d}.json"
+        parte, pendentes = pendentes[:tamanho], pendentes[tamanho:]
+        _gravar_json_atomico(os.path.join(diretorio, arquivo), parte, separators=(',', ':'))
+        segmentos.append(resumir_segmento(arquivo, parte))
+        numero += 1
+
+    indice['identidade'] = identidade
+    _gravar_json_atomico(os.path.join(diretorio, ARQUIVO_INDICE), indice, indent=1)
+    return indice
+
+
+def ler_segmento(diretorio, segmento):
+    """
+    Lê as colheitas de um segmento
+
+    Retorno:
+        list: Lista de dicionários com dados das colheitas
+    """
+    with open(os.path.join(diretorio, segmento['arquivo']), 'r', encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+# ========================================
+# PODA DE SEGMENTOS PELOS MAPAS DE ZONA
+# ========================================
+
+def classificar_segmento(segmento, inicio=None, fim=None, fazenda=None, tipo=None):
+    """
+    Decide como um segmento participa de uma consulta
+
+    Parâmetros:
+        segmento (dict): Mapa de zona do segmento
+        inicio, fim (int): Período AAAAMMDD (None = aberto)
+        fazenda (str): Nome exato da fazenda (None = todas)
+        tipo (str): Tipo de colheita (None = todos)
+
+    Retorno:
+        str: 'ignorar' (nenhum registro pode atender),
+             'completo' (todos atendem; responde pelo resumo) ou
+             'parcial' (é preciso ler e filtrar)
+    """
+    if inicio is not None and segmento['data_max'] < inicio:
+        return 'ignorar'
+    if fim is not None and segmento['data_min'] > fim:
+        return 'ignorar'
+    if tipo is not None and tipo not in segmento['tipos']:
+        return 'ignorar'
+    if fazenda is not None and not bloom_pode_conter(segmento['bloom'], fazenda):
+        return 'ignorar'
+
+    cobre_periodo = ((inicio is None or segmento['data_min'] >= inicio) and
+                     (fim is None or segmento['data_max'] <= fim))
+    if cobre_periodo and fazenda is None:
+        return 'completo'
+    return 'parcial'
+
+
+def _filtro_registro(inicio, fim, fazenda, tipo):
+    """
+    Monta o predicado aplicado aos registros dos segmentos parciais
+    """
+    nome = _normalizar_fazenda(fazenda) if fazenda is not None else None
+
+    def atende(colheita):
+        data = data_para_inteiro(colheita['data'])
+        return ((inicio is None or data >= inicio) and
+                (fim is None or data <= fim) and
+                (tipo is None or colheita['tipo_colheita'] == tipo) and
+                (nome is None or _normalizar_fazenda(colheita['fazenda']) == nome))
+    return atende
+
+
+def _converter_periodo(data_inicio, data_fim):
+    """
+    Converte o período DD/MM/AAAA em inteiros AAAAMMDD (None = aberto)
+    """
+    inicio = data_para_inteiro(data_inicio) if data_inicio else None
+    fim = data_para_inteiro(data_fim) if data_fim else None
+    return inicio, fim
+
+
+def consultar_segmentos(diretorio=DIRETORIO_SEGMENTOS, data_inicio=None, data_fim=None,
+                        fazenda=None, tipo=None):
+    """
+    Busca colheitas lendo apenas os segmentos que podem atender ao filtro
+
+    Parâmetros:
+        diretorio (str): Diretório dos segmentos
+        data_inicio, data_fim (str): Período DD/MM/AAAA (inclusivo, None = aberto)
+        fazenda (str): Nome exato da fazenda, sem diferenciar maiúsculas
+        tipo (str): 'manual' ou 'mecanica'
+
+    Retorno:
+        tuple: (colheitas encontradas, segmentos lidos, segmentos ignorados)
+    """
+    indice = carregar_indice(diretorio)
+    if indice is None:
+        return ([], 0, 0)
+
+    inicio, fim = _converter_periodo(data_inicio, data_fim)
+    atende = _filtro_registro(inicio, fim, fazenda, tipo)
+    encontradas, lidos, ignorados = [], 0, 0
+    for segmento in indice['segmentos']:
+        if classificar_segmento(segmento, inicio, fim, fazenda, tipo) == 'ignorar':
+            ignorados += 1
+            continue
+        lidos += 1
+        encontradas.extend(c for c in ler_segmento(diretorio, segmento) if atende(c))
+    return (encontradas, lidos, ignorados)
+
+
+def agrupar_segmentos(diretorio=DIRETORIO_SEGMENTOS, data_inicio=None, data_fim=None,
+                      fazenda=None, tipo=None):
+    """
+    Agrupamento por tipo para as estatísticas, usando os resumos sempre que possível
+
+    Parâmetros:
+        (mesmos filtros de consultar_segmentos)
+
+    Retorno:
+        tuple: (agrupamento por ('tipo_colheita',), segmentos lidos, segmentos resolvidos pelo resumo)
+
+    Aplicação: segmentos ignorados não são abertos; segmentos que atendem por
+    completo entram com os grupos pré-calculados do índice, sem leitura
+    """
+    indice = carregar_indice(diretorio)
+    if indice is None:
+        return ({}, 0, 0)
+
+    inicio, fim = _converter_periodo(data_inicio, data_fim)
+    atende = _filtro_registro(inicio, fim, fazenda, tipo)
+    agrupamento, lidos, resumidos = {}, 0, 0
+    for segmento in indice['segmentos']:
+        situacao = classificar_segmento(segmento, inicio, fim, fazenda, tipo)
+        if situacao == 'ignorar':
+            continue
+        if situacao == 'completo':
+            resumidos += 1
+            parcial = {(t,): g for t, g in segmento['grupos'].items() if tipo is None or t == tipo}
+        else:
+            lidos += 1
+            filtradas = [c for c in ler_segmento(diretorio, segmento) if atende(c)]
+            parcial = agrupar_colheitas(filtradas, ('tipo_colheita',))
+        agrupamento = mesclar_agrupamentos(agrupamento, parcial)
+    return (agrupamento, lidos, resumidos)
+
+
+# ========================================
+# EXECUÇÃO DIRETA: DIVIDIR O JSON EM SEGMENTOS
+# ========================================
+
+if __name__ == "__main__":
+    from armazenamento import diretorio_segmentos, identidade_dados, ler_colheitas, travar_escrita
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else 'dados_colheitas.json'
+    tamanho = int(sys.argv[2]) if len(sys.argv) > 2 else TAMANHO_SEGMENTO
+
+    # Sob a trava: os acréscimos seguintes são espelhados a partir desta versão
+    destino = diretorio_segmentos(origem)
+    with travar_escrita(origem):
+        dados = ler_colheitas(origem)
+        indice = gravar_segmentos(dados, destino, tamanho, identidade_dados(origem))
+    print(f"✅ {len(dados)} colheitas gravadas em {len(indice['segmentos'])} segmentos ({destino})")
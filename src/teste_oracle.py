@@ -3,6 +3,8 @@ TESTE DE CONEXÃO E OPERAÇÕES ORACLE
 Arquivo para validar banco de dados
 """
 
+import sys
+
 from database import *
 
 print("="*60)
@@ -108,6 +110,9 @@ print("\n🏠 TESTE 7: BUSCAR POR FAZENDA")
 print("-"*60)
 
 resultados = buscar_colheitas_por_fazenda(conn, 'Teste')
+if resultados is None:
+    print("❌ Busca por fazenda falhou!")
+    sys.exit(1)
 print(f"✅ Busca por 'Teste': {len(resultados)} resultado(s)")
 
 # ========================================